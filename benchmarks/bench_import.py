@@ -0,0 +1,66 @@
+"""Cold-start import cost, measured with `python -X importtime` in fresh interpreters.
+
+Usage: python -m benchmarks.bench_import [--repeat 5] [--budget-ms 300]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+MODULES = ("src.config", "src.security.guardrails", "src.orchestration.workflow", "src.api.app")
+HEAVY = ("groq", "langgraph", "langchain_core", "gradio", "plotly", "httpx", "prometheus_client", "pydantic_settings")
+BUDGET_MODULE = "src.orchestration.workflow"
+BUDGET_MS = 300
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """(module, self_us, cumulative_us) for every line of -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure(module: str, repeat: int = 5) -> Dict[str, object]:
+    """Wall-clock import time over `repeat` fresh interpreters, plus one -X importtime run for the breakdown"""
+    env = {**os.environ, "GROQ_API_KEY": os.environ.get("GROQ_API_KEY", "gsk_benchmark_placeholder_key")}
+    probe = (f"import time; start = time.perf_counter(); import {module}; elapsed = time.perf_counter() - start; "
+             f"import sys, json; print(json.dumps([elapsed * 1000, [m for m in {HEAVY!r} if m in sys.modules]]))")
+    totals = []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, env=env, check=True)
+        elapsed_ms, heavy = json.loads(proc.stdout)
+        totals.append(elapsed_ms)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True,
+                          text=True, env=env, check=True)
+    slowest = sorted(parse_importtime(proc.stderr), key=lambda row: row[1], reverse=True)[:8]
+    return {"median_ms": round(statistics.median(totals), 1), "min_ms": round(min(totals), 1),
+            "heavy_modules_loaded": heavy, "slowest_self_ms": {name: round(us / 1000, 1) for name, us, _ in slowest}}
+
+
+def run(repeat: int = 5) -> dict:
+    return {module: measure(module, repeat) for module in MODULES}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS, help=f"fail if {BUDGET_MODULE} is slower")
+    args = parser.parse_args(argv)
+    results = run(args.repeat)
+    print(json.dumps(results, indent=2))
+    if results[BUDGET_MODULE]["median_ms"] > args.budget_ms:
+        print(f"{BUDGET_MODULE} took {results[BUDGET_MODULE]['median_ms']}ms (budget {args.budget_ms}ms)",
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
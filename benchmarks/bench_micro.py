@@ -0,0 +1,67 @@
+"""Micro-benchmarks for guardrails, recommendation parsing, the response cache and similarity lookup"""
+import random
+import tempfile
+from pathlib import Path
+from typing import Dict
+from benchmarks.common import time_calls
+from src.simulation.fake_groq import fake_completion
+
+SAMPLE = fake_completion([{"role": "user", "content": "Cloud computing market analysis"}], 800)
+FLAGGED_SAMPLE = SAMPLE + "\nAnalysts expect guaranteed returns for anyone who invests now."
+
+
+def bench_guardrails(iterations: int) -> Dict[str, dict]:
+    from src.security.guardrails import ContentGuardrails
+    guardrails = ContentGuardrails()
+    return {
+        "clean": time_calls(lambda: guardrails.validate_content(SAMPLE, "analysis"), iterations),
+        "flagged": time_calls(lambda: guardrails.validate_content(FLAGGED_SAMPLE, "analysis"), iterations),
+        "sample_chars": len(SAMPLE),
+    }
+
+
+def bench_parse_recommendations(iterations: int) -> dict:
+    from src.agents.strategic_advisor import StrategicAdvisorAgent
+    agent = StrategicAdvisorAgent()
+    return time_calls(lambda: agent._parse_recommendations(SAMPLE), iterations)
+
+
+def bench_cache(iterations: int) -> Dict[str, dict]:
+    from src.cache.response_cache import MemoryCacheBackend, ResponseCache, SQLiteCacheBackend
+    results = {"make_key": time_calls(
+        lambda: ResponseCache.make_key("RiskAssessment", "Cloud computing market", SAMPLE, max_tokens=900,
+                                       temperature=0.1), iterations)}
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = {"memory": MemoryCacheBackend(max_bytes=64 * 1024 * 1024),
+                    "sqlite": SQLiteCacheBackend(str(Path(tmp) / "bench.sqlite3"), max_bytes=64 * 1024 * 1024)}
+        for name, backend in backends.items():
+            cache = ResponseCache(backend)
+            keys = [f"key-{i}" for i in range(256)]
+            counter = iter(range(10 ** 9))
+            results[f"{name}_set"] = time_calls(lambda: cache.set(keys[next(counter) % 256], SAMPLE, ttl=3600),
+                                                iterations)
+            results[f"{name}_get_hit"] = time_calls(lambda: cache.get(keys[next(counter) % 256]), iterations)
+            results[f"{name}_get_miss"] = time_calls(lambda: cache.get("missing"), iterations)
+    return results
+
+
+def bench_similarity(iterations: int, stored: int = 100_000) -> dict:
+    from src.cache.similarity import SimilarityIndex
+    rng = random.Random(7)
+    vocab = [f"term{i}" for i in range(5000)]
+    index = SimilarityIndex(max_entries=stored)
+    for i in range(stored):
+        index.add("analysis", " ".join(rng.sample(vocab, rng.randint(3, 8))), f"ana_{i}")
+    queries = [" ".join(rng.sample(vocab, rng.randint(3, 8))) for _ in range(256)]
+    counter = iter(range(10 ** 9))
+    return {"stored": stored, "lookup": time_calls(lambda: index.lookup("analysis", queries[next(counter) % 256]),
+                                                   iterations)}
+
+
+def run(iterations: int = 2000, similarity_entries: int = 100_000) -> dict:
+    return {
+        "guardrails.validate_content": bench_guardrails(iterations),
+        "strategic._parse_recommendations": bench_parse_recommendations(iterations),
+        "cache": bench_cache(iterations),
+        "similarity": bench_similarity(iterations, similarity_entries),
+    }
@@ -0,0 +1,64 @@
+"""End-to-end load test of IntelligenceWorkflow.execute_analysis against the fake Groq server"""
+import asyncio
+import time
+from collections import Counter
+from typing import Optional
+from benchmarks.common import BackgroundServer, peak_rss_mb, percentiles
+from src.config import settings
+from src.simulation.fake_groq import FakeGroqProfile, create_fake_app
+
+TOPICS = ["cloud computing", "electric vehicles", "plant-based food", "cybersecurity", "telehealth",
+          "renewable storage", "fintech lending", "edtech platforms"]
+
+
+async def drive(analyses: int, concurrency: int, repeat_ratio: float) -> dict:
+    from src.orchestration.workflow import IntelligenceWorkflow
+    workflow = IntelligenceWorkflow()
+    semaphore = asyncio.Semaphore(concurrency)
+    unique = max(1, int(analyses * (1 - repeat_ratio)))
+    latencies, statuses = [], Counter()
+    
+    async def one(i: int):
+        query = f"{TOPICS[i % len(TOPICS)]} market analysis for segment {i % unique}"
+        async with semaphore:
+            start = time.perf_counter()
+            result = await workflow.execute_analysis(query)
+            latencies.append(time.perf_counter() - start)
+            statuses[result.status.value] += 1
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(analyses)))
+    elapsed = time.perf_counter() - start
+    return {"elapsed_s": elapsed, "throughput_per_s": analyses / elapsed, "latency_s": percentiles(latencies),
+            "statuses": dict(statuses)}
+
+
+def run(analyses: int = 32, concurrency: int = 8, profile: Optional[FakeGroqProfile] = None,
+        cache: bool = False, rate_limit: bool = False, repeat_ratio: float = 0.0, mode: Optional[str] = None) -> dict:
+    profile = profile or FakeGroqProfile(latency="lognormal:-2.0,0.4", tokens_per_second=4000, seed=7)
+    # No checkpoint or result-store writes: they would land in data/ and add SQLite time to the numbers
+    overrides = {"ENABLE_CACHE": cache, "RATE_LIMIT_ENABLED": rate_limit, "CHECKPOINT_ENABLED": False,
+                 "RESULT_STORE_ENABLED": False, **({"WORKFLOW_MODE": mode} if mode else {})}
+    previous = {name: getattr(settings, name) for name in (*overrides, "GROQ_BASE_URL")}
+    app = create_fake_app(profile)
+    try:
+        for name, value in overrides.items():
+            setattr(settings, name, value)
+        with BackgroundServer(app) as server:
+            settings.GROQ_BASE_URL = server.url
+            report = asyncio.run(drive(analyses, concurrency, repeat_ratio))
+        workflow_mode = settings.WORKFLOW_MODE
+    finally:
+        for name, value in previous.items():
+            setattr(settings, name, value)
+    stats = dict(app.state.stats)
+    report.update({
+        "config": {"analyses": analyses, "concurrency": concurrency, "cache": cache, "rate_limit": rate_limit,
+                   "repeat_ratio": repeat_ratio, "workflow_mode": workflow_mode,
+                   "fake_server": vars(profile)},
+        "groq_calls": stats["requests"],
+        "groq_calls_per_analysis": stats["requests"] / analyses,
+        "groq_rejections": {"rate_limited": stats["rate_limited"], "errors": stats["errors"]},
+        "peak_rss_mb": peak_rss_mb(),
+    })
+    return report
@@ -0,0 +1,97 @@
+"""Shared helpers for the benchmark suite"""
+import json
+import platform
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+    
+    return {"min": ordered[0], "mean": statistics.fmean(ordered), "p50": pick(0.50), "p95": pick(0.95),
+            "p99": pick(0.99), "max": ordered[-1]}
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def time_calls(fn: Callable[[], object], iterations: int, warmup: int = 10) -> Dict[str, float]:
+    """Per-call latency in microseconds plus throughput for a synchronous callable"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        call_start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - call_start) * 1e6)
+    elapsed = time.perf_counter() - start
+    return {"iterations": iterations, "ops_per_sec": iterations / elapsed,
+            **{f"{k}_us": v for k, v in percentiles(samples).items()}}
+
+
+def environment() -> Dict[str, Optional[str]]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {"commit": commit, "python": platform.python_version(), "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def write_results(results: dict, output: Optional[str]):
+    text = json.dumps(results, indent=2, default=str)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+        print(f"Results written to {output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class BackgroundServer:
+    """Run an ASGI app with uvicorn on a daemon thread for the duration of a benchmark"""
+    
+    def __init__(self, app, port: Optional[int] = None):
+        import uvicorn
+        self.port = port or free_port()
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+    
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+    
+    def __enter__(self) -> "BackgroundServer":
+        self.thread.start()
+        deadline = time.time() + 10
+        while not self.server.started:
+            if time.time() > deadline:
+                raise RuntimeError("Fake Groq server did not start")
+            time.sleep(0.05)
+        return self
+    
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
@@ -0,0 +1,41 @@
+"""Print numeric differences between two benchmark JSON files
+
+Usage: python -m benchmarks.compare baseline.json candidate.json
+"""
+import json
+import sys
+from typing import Dict
+
+
+def flatten(data, prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in data.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def main(argv=None) -> int:
+    argv = argv if argv is not None else sys.argv[1:]
+    if len(argv) != 2:
+        print(__doc__, file=sys.stderr)
+        return 2
+    with open(argv[0]) as f:
+        baseline = flatten(json.load(f))
+    with open(argv[1]) as f:
+        candidate = flatten(json.load(f))
+    print(f"{'metric':<60} {'baseline':>12} {'candidate':>12} {'change':>9}")
+    for key in sorted(baseline.keys() & candidate.keys()):
+        if key.startswith("environment") or ".config." in key:
+            continue
+        old, new = baseline[key], candidate[key]
+        change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        print(f"{key:<60} {old:>12.4g} {new:>12.4g} {change:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+"""Benchmark runner
+
+Usage: python -m benchmarks.run [--only pipeline|micro|import] [--analyses 32] [--concurrency 8] [--output run.json]
+Compare two runs with python -m benchmarks.compare old.json new.json
+"""
+import argparse
+import logging
+import os
+
+os.environ.setdefault("GROQ_API_KEY", "gsk_benchmark_placeholder_key")
+
+from benchmarks import bench_import, bench_micro, bench_pipeline  # noqa: E402
+from benchmarks.common import environment, write_results  # noqa: E402
+from src.simulation.fake_groq import FakeGroqProfile  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SRIP benchmark suite")
+    parser.add_argument("--only", choices=["pipeline", "micro", "import"])
+    parser.add_argument("--analyses", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mode", choices=["chained", "parallel"], default=None)
+    parser.add_argument("--cache", action="store_true", help="keep the response cache enabled")
+    parser.add_argument("--rate-limit", action="store_true", help="keep the client-side rate limiter enabled")
+    parser.add_argument("--repeat-ratio", type=float, default=0.0, help="share of analyses repeating a query")
+    parser.add_argument("--latency", default="lognormal:-2.0,0.4", help="fake server latency distribution")
+    parser.add_argument("--tokens-per-second", type=float, default=4000)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--iterations", type=int, default=2000, help="micro-benchmark iterations")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    
+    results = {"environment": environment()}
+    if args.only in (None, "micro"):
+        results["micro"] = bench_micro.run(args.iterations)
+    if args.only in (None, "import"):
+        results["import"] = bench_import.run()
+    if args.only in (None, "pipeline"):
+        profile = FakeGroqProfile(latency=args.latency, tokens_per_second=args.tokens_per_second,
+                                  rate_limit_rate=args.rate_limit_rate, error_rate=args.error_rate, seed=7)
+        results["pipeline"] = bench_pipeline.run(args.analyses, args.concurrency, profile, cache=args.cache,
+                                                 rate_limit=args.rate_limit, repeat_ratio=args.repeat_ratio,
+                                                 mode=args.mode)
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,81 +1,415 @@
 """Base agent with retry logic and caching"""
+import asyncio
 import time
-import hashlib
 import logging
-from typing import Dict, Optional, List
+from typing import AsyncIterator, Dict, Optional, List, Tuple
 from abc import ABC, abstractmethod
 import groq
-from groq import Groq
+from src.agents.cassette import Cassette, CassetteMissError, get_cassette
+from src.agents.groq_client import get_async_client, run_sync
+from src.agents.model_router import CircuitOpenError, get_model_router
+from src.cache.response_cache import agent_ttl, get_response_cache
+from src.cache.similarity import get_similarity_index
+from src.cache.singleflight import SingleFlight
+from src.security.rate_limiter import QuotaExceededError, estimate_tokens, get_rate_limiter
 from src.config import settings
+from src.monitoring.metrics import (count_cache, count_hedge, count_retry, count_tokens, observe_call,
+                                    observe_rate_limit_wait)
+from src.orchestration.deadline import Deadline, DeadlineExceeded
+from src.monitoring.tracing import finish_span, span, start_span
 
 logger = logging.getLogger(__name__)
 
+REPLAY_CHUNK_CHARS = 16
+
+
+def _retry_after(error: groq.RateLimitError) -> Optional[float]:
+    try:
+        return float(error.response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
 class BaseAgent(ABC):
+    max_tokens: int = 1000
+    temperature: float = 0.1
+    cache_ttl: Optional[int] = None
+    _inflight = SingleFlight("agents")
+    
     def __init__(self, agent_name: str):
         self.agent_name = agent_name
-        self.client = Groq(api_key=settings.GROQ_API_KEY)
-        self.cache: Dict[str, str] = {}
-        self.metrics = {"total_calls": 0, "successful_calls": 0, "failed_calls": 0, "cache_hits": 0, "total_duration": 0.0}
+        self.cache = get_response_cache()
+        self.metrics = {"total_calls": 0, "successful_calls": 0, "failed_calls": 0, "cache_hits": 0, "coalesced_calls": 0,
+                        "rate_limit_wait": 0.0, "hedged_calls": 0, "hedge_wins": 0, "total_duration": 0.0}
         logger.info(f"Initialized {agent_name}")
     
-    def _cache_key(self, content: str) -> str:
-        return hashlib.sha256(f"{self.agent_name}:{content}".encode()).hexdigest()[:20]
+    def _max_tokens(self, **kwargs) -> int:
+        """Completion budget for a request; subclasses may size it by request kwargs"""
+        return self.max_tokens
+    
+    def _cache_key(self, query: str, context: Optional[str] = None, **kwargs) -> str:
+        return self.cache.make_key(self.agent_name, query, context, max_tokens=self._max_tokens(**kwargs),
+                                   temperature=self.temperature, **kwargs)
     
     def _get_cached(self, key: str) -> Optional[str]:
-        if settings.ENABLE_CACHE and key in self.cache:
+        if not settings.ENABLE_CACHE:
+            return None
+        cached = self.cache.get(key)
+        count_cache(self.agent_name, cached is not None)
+        if cached is not None:
             self.metrics["cache_hits"] += 1
-            return self.cache[key]
-        return None
+        return cached
     
     def _set_cache(self, key: str, value: str):
         if settings.ENABLE_CACHE:
-            if len(self.cache) >= settings.CACHE_MAX_SIZE:
-                oldest = list(self.cache.keys())[0]
-                del self.cache[oldest]
-            self.cache[key] = value
+            self.cache.set(key, value, ttl=agent_ttl(self.agent_name, self.cache_ttl))
+    
+    def _similarity_namespace(self, context: Optional[str], **kwargs) -> str:
+        # Everything except the query must match exactly for a reworded query to share an answer
+        return self._cache_key("", context, **kwargs)
     
-    def _execute_with_retry(self, messages: List[Dict], max_tokens: int, temperature: float = 0.1) -> str:
-        models = [settings.GROQ_DEFAULT_MODEL] + settings.GROQ_FALLBACK_MODELS
+    def _get_similar(self, query: str, context: Optional[str], **kwargs) -> Optional[Tuple[str, float]]:
+        if not (settings.ENABLE_CACHE and settings.SIMILARITY_CACHE_ENABLED):
+            return None
+        match = get_similarity_index().lookup(self._similarity_namespace(context, **kwargs), query)
+        cached = self.cache.get(match.value) if match else None
+        if cached is None:
+            return None
+        count_cache(self.agent_name, True, "similar")
+        self.metrics["cache_hits"] += 1
+        logger.info(f"{self.agent_name} served similar query '{match.query}' (score {match.score:.2f})")
+        return cached, match.score
+    
+    def _index_similar(self, cache_key: str, query: str, context: Optional[str], **kwargs):
+        if settings.ENABLE_CACHE and settings.SIMILARITY_CACHE_ENABLED:
+            get_similarity_index().add(self._similarity_namespace(context, **kwargs), query, cache_key)
+    
+    def _execute_with_retry(self, messages: List[Dict], max_tokens: int, temperature: float = 0.1,
+                            deadline: Optional[Deadline] = None) -> str:
+        return run_sync(self._aexecute_with_retry(messages, max_tokens, temperature, deadline))
+    
+    async def _aexecute_with_retry(self, messages: List[Dict], max_tokens: int, temperature: float = 0.1,
+                                   deadline: Optional[Deadline] = None) -> str:
+        request = {"messages": messages, "max_tokens": max_tokens, "temperature": temperature,
+                   "reserved_tokens": estimate_tokens(messages, max_tokens), "deadline": deadline}
         self.metrics["total_calls"] += 1
+        cassette = get_cassette()
+        if cassette is not None and cassette.replaying:
+            return self._replay(cassette, request)
+        models = get_model_router().route([settings.GROQ_DEFAULT_MODEL] + settings.GROQ_FALLBACK_MODELS)
+        if not models:
+            logger.error(f"{self.agent_name}: All model circuits are open")
         start_time = time.time()
         
-        for model in models:
+        for index, model in enumerate(models):
+            hedge_model = models[index + 1] if index + 1 < len(models) else None
             for attempt in range(settings.GROQ_MAX_RETRIES):
                 try:
-                    response = self.client.chat.completions.create(
-                        model=model, messages=messages, max_tokens=max_tokens,
-                        temperature=temperature, timeout=settings.GROQ_TIMEOUT
-                    )
-                    content = response.choices[0].message.content
+                    if deadline is not None:
+                        deadline.check(self.agent_name)
+                    request["attempt"] = attempt + 1
+                    used_model, content = await self._call_with_hedge(model, hedge_model, request)
                     duration = time.time() - start_time
                     self.metrics["successful_calls"] += 1
                     self.metrics["total_duration"] += duration
-                    logger.info(f"{self.agent_name}: Success with {model} in {duration:.2f}s")
+                    logger.info(f"{self.agent_name}: Success with {used_model} in {duration:.2f}s")
                     return content
+                except CircuitOpenError:
+                    break
+                except (QuotaExceededError, DeadlineExceeded):
+                    self.metrics["failed_calls"] += 1
+                    raise
                 except groq.RateLimitError:
-                    wait_time = (attempt + 1) * 15
-                    logger.warning(f"{self.agent_name}: Rate limit, waiting {wait_time}s")
-                    time.sleep(wait_time)
+                    logger.warning(f"{self.agent_name}: Rate limit on {model} (attempt {attempt + 1})")
+                    count_retry(self.agent_name, model, "rate_limit")
                 except Exception as e:
                     logger.error(f"{self.agent_name}: Error with {model}: {e}")
+                    count_retry(self.agent_name, model, "error")
                     break
         
         self.metrics["failed_calls"] += 1
         raise RuntimeError(f"{self.agent_name}: All models failed")
     
-    def execute(self, query: str, context: Optional[str] = None, **kwargs) -> str:
-        cache_key = self._cache_key(f"{query}:{context}")
-        cached = self._get_cached(cache_key)
-        if cached:
-            return cached
-        result = self._analyze(query, context, **kwargs)
+    def _replay(self, cassette: Cassette, request: Dict) -> str:
+        """Recorded content for a request; replays never reach Groq, so breakers and the rate limiter are skipped
+        and a CassetteMissError reaches the caller unchanged instead of failing over to the next model"""
+        try:
+            content = cassette.load(request["messages"], request["max_tokens"], request["temperature"])["content"]
+        except CassetteMissError:
+            self.metrics["failed_calls"] += 1
+            raise
+        self.metrics["successful_calls"] += 1
+        return content
+    
+    async def _call_model(self, model: str, request: Dict) -> str:
+        """One attempt against one model, reported to the rate limiter and the model's breaker"""
+        with span("groq.attempt", agent=self.agent_name, model=model, attempt=request.get("attempt", 1),
+                  hedge=request.get("hedge", False)) as attempt_span:
+            health = get_model_router().health(model)
+            limiter = get_rate_limiter()
+            deadline: Optional[Deadline] = request["deadline"]
+            if not health.try_acquire():
+                raise CircuitOpenError(model)
+            call_start = time.time()
+            try:
+                waited = await limiter.acquire(model, request["reserved_tokens"], deadline)
+                self.metrics["rate_limit_wait"] += waited
+                observe_rate_limit_wait(model, waited)
+                attempt_span.set(waited=round(waited, 3))
+                timeout = deadline.timeout(settings.GROQ_TIMEOUT) if deadline else settings.GROQ_TIMEOUT
+                if timeout <= 0:
+                    raise DeadlineExceeded(f"{self.agent_name}: no budget left for {model}")
+                call_start = time.time()
+                with span("groq.http", model=model) as http_span:
+                    response = await self._create_completion(model, request, timeout)
+                    usage = getattr(response, "usage", None)
+                    http_span.set(tokens_in=getattr(usage, "prompt_tokens", None),
+                                  tokens_out=getattr(usage, "completion_tokens", None))
+                health.record_success(time.time() - call_start)
+                observe_call(self.agent_name, model, "success", time.time() - call_start)
+                count_tokens(self.agent_name, model, usage)
+                limiter.record_usage(model, request["reserved_tokens"], getattr(usage, "total_tokens", None))
+                return response.choices[0].message.content
+            except groq.RateLimitError as e:
+                observe_call(self.agent_name, model, "rate_limited", time.time() - call_start)
+                limiter.penalize(model, _retry_after(e) or settings.RATE_LIMIT_DEFAULT_BACKOFF)
+                raise
+            except (QuotaExceededError, CircuitOpenError, DeadlineExceeded):
+                raise
+            except asyncio.CancelledError:
+                observe_call(self.agent_name, model, "cancelled", time.time() - call_start)
+                raise
+            except Exception:
+                health.record_failure(time.time() - call_start)
+                observe_call(self.agent_name, model, "error", time.time() - call_start)
+                raise
+            finally:
+                health.release()
+    
+    async def _create_completion(self, model: str, request: Dict, timeout: float):
+        """The HTTP call itself, recorded when GROQ_CASSETTE_MODE is record"""
+        cassette = get_cassette()
+        response = await get_async_client().chat.completions.create(
+            model=model, messages=request["messages"], max_tokens=request["max_tokens"],
+            temperature=request["temperature"], timeout=timeout
+        )
+        if cassette is not None:
+            cassette.record(request["messages"], request["max_tokens"], request["temperature"], model,
+                            response.choices[0].message.content, getattr(response, "usage", None))
+        return response
+    
+    async def _call_with_hedge(self, model: str, hedge_model: Optional[str], request: Dict) -> Tuple[str, str]:
+        """Call `model`; if it is slower than its usual tail latency, race `hedge_model` and keep the winner"""
+        router = get_model_router()
+        if not settings.HEDGING_ENABLED or hedge_model is None or not router.health(hedge_model).available():
+            return model, await self._call_model(model, request)
+        observed = router.health(model).latency_percentile(settings.HEDGING_PERCENTILE)
+        delay = max(settings.HEDGING_MIN_DELAY, observed if observed is not None else settings.GROQ_TIMEOUT / 2)
+        if request["deadline"] is not None:
+            delay = min(delay, request["deadline"].remaining() / 2)
+        
+        primary = asyncio.ensure_future(self._call_model(model, request))
+        contenders = {primary: model}
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done or not router.hedge_budget(self.agent_name).try_spend():
+                return model, await primary
+            
+            self.metrics["hedged_calls"] += 1
+            logger.info(f"{self.agent_name}: {model} slower than {delay:.1f}s, hedging with {hedge_model}")
+            hedge = asyncio.ensure_future(self._call_model(hedge_model, {**request, "hedge": True}))
+            contenders[hedge] = hedge_model
+            pending = set(contenders)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.metrics["hedge_wins"] += 1
+                        count_hedge(self.agent_name, "hedge" if task is hedge else "primary")
+                        return contenders[task], task.result()
+                    error = error or task.exception()
+            raise primary.exception() or error
+        finally:
+            # A cancelled caller, expired deadline or guardrail abort must not leave requests spending quota
+            unfinished = [task for task in contenders if not task.done()]
+            for task in unfinished:
+                task.cancel()
+            if unfinished:
+                await asyncio.gather(*unfinished, return_exceptions=True)
+    
+    def execute(self, query: str, context: Optional[str] = None, deadline: Optional[Deadline] = None, **kwargs) -> str:
+        return run_sync(self.aexecute(query, context, deadline=deadline, **kwargs))
+    
+    async def aexecute(self, query: str, context: Optional[str] = None, deadline: Optional[Deadline] = None,
+                       **kwargs) -> str:
+        with span("agent.execute", agent=self.agent_name) as agent_span:
+            cache_key = self._cache_key(query, context, **kwargs)
+            cached = self._get_cached(cache_key)
+            if cached is not None:
+                agent_span.set(cache="hit")
+                return cached
+            similar = self._get_similar(query, context, **kwargs)
+            if similar is not None:
+                agent_span.set(cache="similar", similarity=similar[1])
+                return similar[0]
+            if self._inflight.is_in_flight(cache_key):
+                self.metrics["coalesced_calls"] += 1
+                agent_span.set(cache="coalesced")
+            else:
+                agent_span.set(cache="miss")
+            return await self._inflight.do(
+                cache_key, lambda: self._aexecute_uncached(cache_key, query, context, deadline, **kwargs))
+    
+    async def _aexecute_uncached(self, cache_key: str, query: str, context: Optional[str],
+                                 deadline: Optional[Deadline], **kwargs) -> str:
+        result = await self._aanalyze(query, context, deadline=deadline, **kwargs)
         self._set_cache(cache_key, result)
+        self._index_similar(cache_key, query, context, **kwargs)
         return result
     
+    async def astream(self, query: str, context: Optional[str] = None, deadline: Optional[Deadline] = None,
+                      **kwargs) -> AsyncIterator[str]:
+        """Yield the completion as it is generated; a cached answer arrives as a single chunk"""
+        cache_key = self._cache_key(query, context, **kwargs)
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            finish_span(start_span("agent.execute", agent=self.agent_name, cache="hit", stream=True))
+            yield cached
+            return
+        similar = self._get_similar(query, context, **kwargs)
+        if similar is not None:
+            finish_span(start_span("agent.execute", agent=self.agent_name, cache="similar", stream=True,
+                                   similarity=similar[1]))
+            yield similar[0]
+            return
+        messages = self._build_messages(query, context, **kwargs)
+        parts = []
+        async for delta in self._astream_with_retry(messages, self._max_tokens(**kwargs), self.temperature, deadline):
+            parts.append(delta)
+            yield delta
+        self._set_cache(cache_key, "".join(parts))
+        self._index_similar(cache_key, query, context, **kwargs)
+    
+    async def _astream_with_retry(self, messages: List[Dict], max_tokens: int, temperature: float = 0.1,
+                                  deadline: Optional[Deadline] = None) -> AsyncIterator[str]:
+        request = {"messages": messages, "max_tokens": max_tokens, "temperature": temperature,
+                   "reserved_tokens": estimate_tokens(messages, max_tokens), "deadline": deadline}
+        self.metrics["total_calls"] += 1
+        cassette = get_cassette()
+        if cassette is not None and cassette.replaying:
+            content = self._replay(cassette, request)
+            for start in range(0, len(content), REPLAY_CHUNK_CHARS):
+                yield content[start:start + REPLAY_CHUNK_CHARS]
+            return
+        models = get_model_router().route([settings.GROQ_DEFAULT_MODEL] + settings.GROQ_FALLBACK_MODELS)
+        start_time = time.time()
+        
+        for model in models:
+            emitted = False
+            try:
+                if deadline is not None:
+                    deadline.check(self.agent_name)
+                async for delta in self._stream_model(model, request):
+                    emitted = True
+                    yield delta
+                duration = time.time() - start_time
+                self.metrics["successful_calls"] += 1
+                self.metrics["total_duration"] += duration
+                logger.info(f"{self.agent_name}: Streamed with {model} in {duration:.2f}s")
+                return
+            except (QuotaExceededError, DeadlineExceeded):
+                self.metrics["failed_calls"] += 1
+                raise
+            except CircuitOpenError:
+                continue
+            except Exception as e:
+                logger.error(f"{self.agent_name}: Stream error with {model}: {e}")
+                count_retry(self.agent_name, model, "error")
+                if emitted:
+                    # Tokens already reached the caller, so switching models would splice two answers
+                    self.metrics["failed_calls"] += 1
+                    raise
+        
+        self.metrics["failed_calls"] += 1
+        raise RuntimeError(f"{self.agent_name}: All models failed")
+    
+    async def _stream_model(self, model: str, request: Dict) -> AsyncIterator[str]:
+        health = get_model_router().health(model)
+        limiter = get_rate_limiter()
+        deadline: Optional[Deadline] = request["deadline"]
+        if not health.try_acquire():
+            raise CircuitOpenError(model)
+        call_start = time.time()
+        # Started but never made current: the span must not leak into the consumer between yields
+        attempt_span = start_span("groq.attempt", agent=self.agent_name, model=model, stream=True)
+        error: Optional[BaseException] = None
+        try:
+            waited = await limiter.acquire(model, request["reserved_tokens"], deadline)
+            self.metrics["rate_limit_wait"] += waited
+            observe_rate_limit_wait(model, waited)
+            attempt_span.set(waited=round(waited, 3))
+            timeout = deadline.timeout(settings.GROQ_TIMEOUT) if deadline else settings.GROQ_TIMEOUT
+            if timeout <= 0:
+                raise DeadlineExceeded(f"{self.agent_name}: no budget left for {model}")
+            call_start = time.time()
+            async for delta in self._stream_deltas(model, request, timeout):
+                if delta:
+                    attempt_span.attributes["chunks"] = attempt_span.attributes.get("chunks", 0) + 1
+                    yield delta
+            health.record_success(time.time() - call_start)
+            observe_call(self.agent_name, model, "success", time.time() - call_start)
+        except groq.RateLimitError as e:
+            error = e
+            observe_call(self.agent_name, model, "rate_limited", time.time() - call_start)
+            limiter.penalize(model, _retry_after(e) or settings.RATE_LIMIT_DEFAULT_BACKOFF)
+            raise
+        except (QuotaExceededError, CircuitOpenError, DeadlineExceeded) as e:
+            error = e
+            raise
+        except Exception as e:
+            error = e
+            health.record_failure(time.time() - call_start)
+            observe_call(self.agent_name, model, "error", time.time() - call_start)
+            raise
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            health.release()
+            finish_span(attempt_span, error)
+    
+    async def _stream_deltas(self, model: str, request: Dict, timeout: float) -> AsyncIterator[str]:
+        cassette = get_cassette()
+        stream = await get_async_client().chat.completions.create(
+            model=model, messages=request["messages"], max_tokens=request["max_tokens"],
+            temperature=request["temperature"], timeout=timeout, stream=True
+        )
+        parts = []
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                yield delta
+        if cassette is not None:
+            cassette.record(request["messages"], request["max_tokens"], request["temperature"], model, "".join(parts))
+    
     @abstractmethod
-    def _analyze(self, query: str, context: Optional[str] = None, **kwargs) -> str:
+    def _build_messages(self, query: str, context: Optional[str] = None, **kwargs) -> List[Dict]:
         pass
     
+    def _analyze(self, query: str, context: Optional[str] = None, deadline: Optional[Deadline] = None, **kwargs) -> str:
+        messages = self._build_messages(query, context, **kwargs)
+        return self._execute_with_retry(messages, max_tokens=self._max_tokens(**kwargs),
+                                        temperature=self.temperature, deadline=deadline)
+    
+    async def _aanalyze(self, query: str, context: Optional[str] = None, deadline: Optional[Deadline] = None,
+                        **kwargs) -> str:
+        messages = self._build_messages(query, context, **kwargs)
+        return await self._aexecute_with_retry(messages, max_tokens=self._max_tokens(**kwargs),
+                                               temperature=self.temperature, deadline=deadline)
+    
     def get_metrics(self) -> dict:
         avg_duration = self.metrics["total_duration"] / self.metrics["successful_calls"] if self.metrics["successful_calls"] > 0 else 0.0
         return {"agent_name": self.agent_name, **self.metrics, "average_duration": avg_duration}
@@ -0,0 +1,76 @@
+"""Record/replay of Groq completions for deterministic offline runs"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CassetteMissError(LookupError):
+    """Replay mode found no recording for a request"""
+
+
+class Cassette:
+    """One JSON file per request, keyed by prompt and sampling parameters but not by model,
+    so replays do not depend on which model the router happens to pick"""
+    
+    def __init__(self, directory: str, mode: str):
+        self.directory = Path(directory)
+        self.mode = mode
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+    
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+    
+    @staticmethod
+    def key(messages: List[Dict], max_tokens: int, temperature: float) -> str:
+        payload = json.dumps({"messages": messages, "max_tokens": max_tokens, "temperature": temperature},
+                             sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+    
+    def load(self, messages: List[Dict], max_tokens: int, temperature: float) -> Dict:
+        key = self.key(messages, max_tokens, temperature)
+        path = self._path(key)
+        if not path.exists():
+            raise CassetteMissError(f"No recording {key[:12]} in {self.directory}")
+        return json.loads(path.read_text())
+    
+    def record(self, messages: List[Dict], max_tokens: int, temperature: float, model: str, content: str,
+               usage=None):
+        key = self.key(messages, max_tokens, temperature)
+        entry = {
+            "key": key, "model": model, "content": content, "recorded_at": time.time(),
+            "usage": {field: getattr(usage, field, None)
+                      for field in ("prompt_tokens", "completion_tokens", "total_tokens")} if usage else None,
+            "request": {"messages": messages, "max_tokens": max_tokens, "temperature": temperature},
+        }
+        tmp = self._path(key).with_suffix(".tmp")
+        with self._lock:
+            tmp.write_text(json.dumps(entry, indent=2))
+            tmp.replace(self._path(key))
+        logger.debug(f"Recorded cassette {key[:12]} from {model}")
+
+
+_cassette: Optional[Cassette] = None
+
+
+def get_cassette() -> Optional[Cassette]:
+    """The configured cassette, or None when GROQ_CASSETTE_MODE is off"""
+    global _cassette
+    if settings.GROQ_CASSETTE_MODE == "off":
+        return None
+    if _cassette is None or _cassette.mode != settings.GROQ_CASSETTE_MODE or \
+            _cassette.directory != Path(settings.GROQ_CASSETTE_DIR):
+        _cassette = Cassette(settings.GROQ_CASSETTE_DIR, settings.GROQ_CASSETTE_MODE)
+        logger.info(f"Groq cassette in {_cassette.mode} mode at {_cassette.directory}")
+    return _cassette
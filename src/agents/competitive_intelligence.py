@@ -1,15 +1,28 @@
 """Competitive Intelligence Agent"""
+import asyncio
 import logging
-from typing import List, Optional
+import re
+from typing import Dict, List, Optional
 from src.agents.base_agent import BaseAgent
+from src.config import settings
+from src.orchestration.deadline import Deadline
 
 logger = logging.getLogger(__name__)
 
 class CompetitiveIntelligenceAgent(BaseAgent):
+    max_tokens = 1000
+    cache_ttl = 21600
+    
     def __init__(self):
         super().__init__(agent_name="CompetitiveIntelligence")
     
-    def _analyze(self, query: str, context: Optional[str] = None, targets: Optional[List[str]] = None) -> str:
+    def _max_tokens(self, target: Optional[str] = None, **kwargs) -> int:
+        return settings.COMPETITIVE_TARGET_MAX_TOKENS if target else self.max_tokens
+    
+    def _build_messages(self, query: str, context: Optional[str] = None, targets: Optional[List[str]] = None,
+                        target: Optional[str] = None) -> List[Dict]:
+        if target:
+            return self._build_target_messages(query, target)
         target_list = targets if targets else []
         target_context = f" with focus on {', '.join(target_list)}" if target_list else ""
         
@@ -47,4 +60,54 @@ Provide specific, evidence-based insights."""
             {"role": "system", "content": "You are a competitive intelligence specialist. Provide specific, actionable insights."},
             {"role": "user", "content": prompt}
         ]
-        return self._execute_with_retry(messages, max_tokens=1000)
+        return messages
+    
+    def _build_target_messages(self, market: str, target: str) -> List[Dict]:
+        # Deliberately free of query-specific context so the profile is reusable across analyses
+        prompt = f"""Profile {target} as a competitor in the {market} market.
+
+**POSITIONING**
+- Market share and segment focus
+- Value proposition
+
+**STRENGTHS AND WEAKNESSES**
+- Key competitive advantages
+- Notable weaknesses
+
+**RECENT MOVES**
+- Strategic moves and likely next steps
+
+Be specific and concise."""
+        return [
+            {"role": "system", "content": "You are a competitive intelligence specialist. Provide specific, actionable insights."},
+            {"role": "user", "content": prompt}
+        ]
+    
+    async def aexecute_targets(self, query: str, targets: List[str], deadline: Optional[Deadline] = None) -> str:
+        """Profile each target concurrently as its own cached unit keyed by (target, market), then merge"""
+        market = market_key(query, targets)
+        unique = list(dict.fromkeys(" ".join(t.split()) for t in targets if t.strip()))
+        profiles = await asyncio.gather(
+            *(self.aexecute(market, deadline=deadline, target=target) for target in unique), return_exceptions=True)
+        failed = [target for target, profile in zip(unique, profiles) if isinstance(profile, BaseException)]
+        if len(failed) == len(unique):
+            raise profiles[0]
+        for target in failed:
+            logger.warning(f"{self.agent_name}: profile of {target} failed")
+        sections = [f"**{target.upper()}**\n{profile.strip()}" for target, profile in zip(unique, profiles)
+                    if not isinstance(profile, BaseException)]
+        header = f"**COMPETITIVE LANDSCAPE: {market.upper()}**\nCompetitors profiled: {', '.join(unique)}"
+        if failed:
+            header += f"\nProfiles unavailable: {', '.join(failed)}"
+        return "\n\n".join([header] + sections)
+
+
+_MARKET_STOPWORDS = {"a", "an", "and", "analysis", "analyze", "for", "in", "of", "on", "the", "to", "with", "vs",
+                     "versus", "competitive", "competitors", "compare", "comparison", "landscape", "market"}
+
+
+def market_key(query: str, targets: List[str]) -> str:
+    """Normalised market description: the query without its target names and filler words"""
+    target_words = {w for t in targets for w in re.findall(r"[a-z0-9]+", t.lower())}
+    words = [w for w in re.findall(r"[a-z0-9]+", query.lower()) if w not in _MARKET_STOPWORDS | target_words]
+    return " ".join(dict.fromkeys(words)) or query.strip().lower()
@@ -0,0 +1,50 @@
+"""Shared Groq client pool"""
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Awaitable, Optional, TypeVar
+import httpx
+from groq import AsyncGroq
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncGroq]" = weakref.WeakKeyDictionary()
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+_lock = threading.Lock()
+
+
+def get_async_client() -> AsyncGroq:
+    """Return the AsyncGroq client shared by every agent on the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        http_client = httpx.AsyncClient(
+            timeout=settings.GROQ_TIMEOUT,
+            limits=httpx.Limits(max_connections=settings.GROQ_MAX_CONNECTIONS,
+                                max_keepalive_connections=settings.GROQ_MAX_KEEPALIVE),
+        )
+        # Retries are owned by BaseAgent so the router and rate limiter see every attempt
+        client = AsyncGroq(api_key=settings.GROQ_API_KEY, base_url=settings.GROQ_BASE_URL,
+                           http_client=http_client, max_retries=0)
+        _clients[loop] = client
+        logger.info(f"Created shared AsyncGroq client (max_connections={settings.GROQ_MAX_CONNECTIONS}"
+                    f"{', base_url=' + settings.GROQ_BASE_URL if settings.GROQ_BASE_URL else ''})")
+    return client
+
+
+def _get_sync_loop() -> asyncio.AbstractEventLoop:
+    global _sync_loop
+    with _lock:
+        if _sync_loop is None:
+            _sync_loop = asyncio.new_event_loop()
+            threading.Thread(target=_sync_loop.run_forever, name="groq-sync-loop", daemon=True).start()
+        return _sync_loop
+
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """Run a coroutine to completion from synchronous code on a background loop"""
+    return asyncio.run_coroutine_threadsafe(coro, _get_sync_loop()).result()
@@ -1,18 +1,20 @@
 """Market Intelligence Agent"""
 import logging
-from typing import List, Optional
+from typing import Dict, List, Optional
 from src.agents.base_agent import BaseAgent
 
 logger = logging.getLogger(__name__)
 
 class MarketIntelligenceAgent(BaseAgent):
+    max_tokens = 1200
+    cache_ttl = 21600
+    
     def __init__(self):
         super().__init__(agent_name="MarketIntelligence")
     
-    def _analyze(self, query: str, context: Optional[str] = None, targets: Optional[List[str]] = None) -> str:
-        target_context = f" focusing on {', '.join(targets)}" if targets else ""
-        
-        prompt = f"""Conduct comprehensive market intelligence analysis for: {query}{target_context}
+    def _build_messages(self, query: str, context: Optional[str] = None) -> List[Dict]:
+        # Market-wide by design: targets only shape the competitive section, so adding one reuses this node
+        prompt = f"""Conduct comprehensive market intelligence analysis for: {query}
 
 Deliver structured analysis:
 
@@ -48,4 +50,4 @@ Provide specific, quantified insights."""
             {"role": "system", "content": "You are a senior market research analyst with 15+ years experience. Provide data-driven analysis."},
             {"role": "user", "content": prompt}
         ]
-        return self._execute_with_retry(messages, max_tokens=1200)
+        return messages
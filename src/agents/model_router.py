@@ -0,0 +1,192 @@
+"""Model health tracking, circuit breaking and latency-aware routing"""
+import logging
+import math
+import threading
+import time
+from collections import deque
+from datetime import date
+from enum import Enum
+from typing import Deque, Dict, List, Optional, Tuple
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a model's breaker rejects a call"""
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class ModelHealth:
+    """Rolling latency/error window and circuit breaker for one model"""
+    
+    def __init__(self, model: str):
+        self.model = model
+        self.state = CircuitState.CLOSED
+        self.opened_at = 0.0
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+        self.samples: Deque[Tuple[float, float, bool]] = deque()
+        self._lock = threading.Lock()
+    
+    def _prune(self, now: float):
+        while self.samples and self.samples[0][0] < now - settings.MODEL_HEALTH_WINDOW:
+            self.samples.popleft()
+    
+    def available(self, now: Optional[float] = None) -> bool:
+        now = now or time.time()
+        with self._lock:
+            if self.state == CircuitState.OPEN:
+                return now - self.opened_at >= settings.CIRCUIT_RESET_TIMEOUT
+            if self.state == CircuitState.HALF_OPEN:
+                return not self.probe_in_flight
+            return True
+    
+    def try_acquire(self) -> bool:
+        """Claim a call slot; after the reset timeout an open breaker lets exactly one probe through"""
+        now = time.time()
+        with self._lock:
+            if self.state == CircuitState.OPEN:
+                if now - self.opened_at < settings.CIRCUIT_RESET_TIMEOUT:
+                    return False
+                self.state = CircuitState.HALF_OPEN
+                logger.info(f"Circuit half-open for {self.model}")
+            if self.state == CircuitState.HALF_OPEN:
+                if self.probe_in_flight:
+                    return False
+                self.probe_in_flight = True
+            return True
+    
+    def release(self):
+        with self._lock:
+            self.probe_in_flight = False
+    
+    def record_success(self, latency: float):
+        now = time.time()
+        with self._lock:
+            self.samples.append((now, latency, True))
+            self._prune(now)
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+            if self.state != CircuitState.CLOSED:
+                logger.info(f"Circuit closed for {self.model}")
+            self.state = CircuitState.CLOSED
+    
+    def record_failure(self, latency: float):
+        now = time.time()
+        with self._lock:
+            self.samples.append((now, latency, False))
+            self._prune(now)
+            self.consecutive_failures += 1
+            self.probe_in_flight = False
+            if (self.state == CircuitState.HALF_OPEN
+                    or self.consecutive_failures >= settings.CIRCUIT_FAILURE_THRESHOLD
+                    or (len(self.samples) >= settings.MODEL_HEALTH_MIN_SAMPLES
+                        and self._error_rate() >= settings.CIRCUIT_ERROR_RATE_THRESHOLD)):
+                if self.state != CircuitState.OPEN:
+                    logger.warning(f"Circuit opened for {self.model}")
+                self.state = CircuitState.OPEN
+                self.opened_at = now
+    
+    def _error_rate(self) -> float:
+        return sum(1 for _, _, ok in self.samples if not ok) / len(self.samples) if self.samples else 0.0
+    
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        with self._lock:
+            self._prune(time.time())
+            latencies = sorted(latency for _, latency, ok in self.samples if ok)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, math.ceil(percentile * len(latencies)) - 1)]
+    
+    def score(self) -> float:
+        """Expected cost of routing here: median latency inflated by the error rate; unobserved = inf"""
+        median = self.latency_percentile(0.5)
+        if median is None:
+            return math.inf
+        with self._lock:
+            error_rate = self._error_rate()
+        return median * (1 + 4 * error_rate)
+    
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._prune(time.time())
+            samples = len(self.samples)
+            error_rate = self._error_rate()
+            state = self.state.value
+        return {"model": self.model, "state": state, "samples": samples, "error_rate": round(error_rate, 3),
+                "p50_latency": self.latency_percentile(0.5), "p95_latency": self.latency_percentile(0.95)}
+
+
+class HedgeBudget:
+    """Daily allowance of hedged (duplicate) requests for one agent"""
+    
+    def __init__(self, daily_limit: int):
+        self.daily_limit = daily_limit
+        self.day = date.today()
+        self.spent = 0
+        self._lock = threading.Lock()
+    
+    def try_spend(self) -> bool:
+        with self._lock:
+            if date.today() != self.day:
+                self.day, self.spent = date.today(), 0
+            if self.spent >= self.daily_limit:
+                return False
+            self.spent += 1
+            return True
+
+
+class ModelRouter:
+    """Process-wide model health registry shared by all agents"""
+    
+    def __init__(self):
+        self._health: Dict[str, ModelHealth] = {}
+        self._budgets: Dict[str, HedgeBudget] = {}
+        self._lock = threading.Lock()
+    
+    def health(self, model: str) -> ModelHealth:
+        with self._lock:
+            if model not in self._health:
+                self._health[model] = ModelHealth(model)
+            return self._health[model]
+    
+    def hedge_budget(self, agent_name: str) -> HedgeBudget:
+        with self._lock:
+            if agent_name not in self._budgets:
+                limit = settings.HEDGING_AGENT_BUDGETS.get(agent_name, settings.HEDGING_DAILY_BUDGET)
+                self._budgets[agent_name] = HedgeBudget(limit)
+            return self._budgets[agent_name]
+    
+    def route(self, models: List[str]) -> List[str]:
+        """Healthy models in configured order; models scoring over MODEL_LATENCY_SLO go last, fastest first.
+        
+        Unobserved models count as within the SLO, so a fast fallback never permanently displaces the default.
+        """
+        now = time.time()
+        healthy = [m for m in models if self.health(m).available(now)]
+        scores = {m: self.health(m).score() for m in healthy}
+        slow = [m for m in healthy if scores[m] != math.inf and scores[m] > settings.MODEL_LATENCY_SLO]
+        return [m for m in healthy if m not in slow] + sorted(slow, key=scores.get)
+    
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            models = list(self._health.values())
+        return [health.snapshot() for health in models]
+
+
+_router: Optional[ModelRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_model_router() -> ModelRouter:
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ModelRouter()
+        return _router
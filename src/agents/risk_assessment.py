@@ -1,15 +1,18 @@
 """Risk Assessment Agent"""
 import logging
-from typing import Optional
+from typing import Dict, List, Optional
 from src.agents.base_agent import BaseAgent
 
 logger = logging.getLogger(__name__)
 
 class RiskAssessmentAgent(BaseAgent):
+    max_tokens = 900
+    cache_ttl = 21600
+    
     def __init__(self):
         super().__init__(agent_name="RiskAssessment")
     
-    def _analyze(self, query: str, context: Optional[str] = None, **kwargs) -> str:
+    def _build_messages(self, query: str, context: Optional[str] = None, **kwargs) -> List[Dict]:
         prompt = f"""Conduct comprehensive risk assessment for: {query}
 
 Context: {context if context else "General business context"}
@@ -47,4 +50,4 @@ Provide actionable mitigation strategies."""
             {"role": "system", "content": "You are a senior risk management consultant. Provide quantified risk scores (1-10 scale)."},
             {"role": "user", "content": prompt}
         ]
-        return self._execute_with_retry(messages, max_tokens=900)
+        return messages
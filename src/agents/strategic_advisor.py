@@ -1,19 +1,23 @@
 """Strategic Advisor Agent"""
 import logging
 import re
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional
 from src.agents.base_agent import BaseAgent
 
 logger = logging.getLogger(__name__)
 
 class StrategicAdvisorAgent(BaseAgent):
+    max_tokens = 1000
+    cache_ttl = 3600
+    temperature = 0.15
+    
     def __init__(self):
         super().__init__(agent_name="StrategicAdvisor")
     
-    def _analyze(self, query: str, context: Optional[str] = None, 
-                 market_intelligence: Optional[str] = None,
-                 competitive_landscape: Optional[str] = None,
-                 risk_evaluation: Optional[str] = None) -> Tuple[str, List[str]]:
+    def _build_messages(self, query: str, context: Optional[str] = None, 
+                        market_intelligence: Optional[str] = None,
+                        competitive_landscape: Optional[str] = None,
+                        risk_evaluation: Optional[str] = None) -> List[Dict]:
         
         full_context = f"""
 MARKET: {market_intelligence if market_intelligence else "N/A"}
@@ -47,10 +51,7 @@ Focus on opportunities, positioning, and risk mitigation."""
             {"role": "system", "content": "You are a senior strategy consultant synthesizing business intelligence."},
             {"role": "user", "content": prompt}
         ]
-        
-        result = self._execute_with_retry(messages, max_tokens=1000, temperature=0.15)
-        recommendations = self._parse_recommendations(result)
-        return result, recommendations
+        return messages
     
     def _parse_recommendations(self, text: str) -> List[str]:
         recommendations = []
@@ -0,0 +1,163 @@
+"""FastAPI service"""
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from src.api.jobs import JobQueue, QueueFullError
+from src.config import settings
+from src.models import AnalysisRequest, AnalysisResponse, IntelligenceState
+from src.monitoring.metrics import render_latest
+from src.orchestration.result_store import ResultStore, get_result_store
+from src.orchestration.workflow import IntelligenceWorkflow
+
+logger = logging.getLogger(__name__)
+
+_workflow: Optional[IntelligenceWorkflow] = None
+
+
+def get_workflow() -> IntelligenceWorkflow:
+    global _workflow
+    if _workflow is None:
+        _workflow = IntelligenceWorkflow()
+    return _workflow
+
+
+def to_response(state: IntelligenceState) -> AnalysisResponse:
+    return AnalysisResponse(
+        analysis_id=state.analysis_id, status=state.status, query=state.query, targets=state.targets,
+        market_intelligence=state.market_intelligence, competitive_landscape=state.competitive_landscape,
+        risk_evaluation=state.risk_evaluation, strategic_recommendations=state.strategic_actions,
+        executive_summary=state.executive_briefing, quality_score=state.quality_score,
+        completeness=state.completion_status, processing_time=state.processing_duration,
+        created_at=state.created_at, errors=state.errors or None,
+        base_analysis_id=state.base_analysis_id, reused_nodes=state.reused_nodes if state.base_analysis_id else None,
+        similar_match=state.similar_match,
+    )
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _stream_events(request: AnalysisRequest) -> AsyncIterator[str]:
+    async for event in get_workflow().astream_analysis(query=request.query, targets=request.targets,
+                                                       base_analysis_id=request.base_analysis_id):
+        if event["type"] == "result":
+            yield _sse("result", event["result"].model_dump(mode="json"))
+        else:
+            yield _sse(event["type"], {k: v for k, v in event.items() if k != "type"})
+
+
+def create_app(queue: Optional[JobQueue] = None, results: Optional[ResultStore] = None) -> FastAPI:
+    queue = queue or JobQueue(workflow_factory=get_workflow)
+    
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await queue.start()
+        recovery = None
+        if settings.CHECKPOINT_ENABLED and settings.CHECKPOINT_RECOVER_ON_STARTUP:
+            # Analyses a previous process left mid-graph continue in the background from their checkpoints
+            recovery = asyncio.create_task(get_workflow().recover_inflight())
+        yield
+        if recovery is not None:
+            recovery.cancel()
+            await asyncio.gather(recovery, return_exceptions=True)
+        await queue.stop()
+        if _workflow is not None:
+            _workflow.close()
+    
+    app = FastAPI(title=settings.API_TITLE, version=settings.API_VERSION, lifespan=lifespan)
+    app.state.jobs = queue
+    
+    def _results() -> ResultStore:
+        # Resolved per request, so building the app neither opens the database nor starts its writer thread
+        store = results if results is not None else get_result_store()
+        if store is None:
+            raise HTTPException(status_code=503, detail="Result store is disabled")
+        return store
+    
+    def _job_or_404(job_id: str):
+        job = queue.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+        return job
+    
+    @app.post("/jobs", status_code=202)
+    async def submit_job(request: AnalysisRequest) -> dict:
+        try:
+            job = queue.submit(request)
+        except QueueFullError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        return job.to_dict()
+    
+    @app.get("/jobs/{job_id}")
+    async def job_status(job_id: str) -> dict:
+        job = _job_or_404(job_id)
+        return {**job.to_dict(), "queue_position": queue.pending.position(job)}
+    
+    @app.get("/jobs/{job_id}/result", response_model=AnalysisResponse)
+    async def job_result(job_id: str) -> AnalysisResponse:
+        job = _job_or_404(job_id)
+        if job.result is None:
+            raise HTTPException(status_code=409, detail=f"Job {job_id} is {job.status.value}")
+        return to_response(job.result)
+    
+    @app.delete("/jobs/{job_id}")
+    async def cancel_job(job_id: str) -> dict:
+        job = _job_or_404(job_id)
+        if not queue.cancel(job_id):
+            raise HTTPException(status_code=409, detail=f"Job {job_id} already {job.status.value}")
+        return job.to_dict()
+    
+    @app.get("/jobs")
+    async def queue_stats() -> dict:
+        return queue.stats()
+    
+    @app.get("/metrics")
+    async def metrics() -> Response:
+        payload, content_type = render_latest()
+        return Response(content=payload, media_type=content_type)
+    
+    # History endpoints query SQLite synchronously, so they are plain `def` and run in FastAPI's threadpool
+    @app.get("/analyses")
+    def list_analyses(limit: int = Query(20, ge=1, le=200), offset: int = Query(0, ge=0),
+                            status: Optional[str] = None, target: Optional[str] = None) -> dict:
+        return _results().list(limit=limit, offset=offset, status=status, target=target)
+    
+    @app.get("/analyses/search")
+    def search_analyses(q: str = Query(min_length=1), limit: int = Query(20, ge=1, le=200),
+                              offset: int = Query(0, ge=0)) -> dict:
+        return _results().search(q, limit=limit, offset=offset)
+    
+    @app.get("/analyses/{analysis_id}", response_model=AnalysisResponse)
+    def get_analysis(analysis_id: str) -> AnalysisResponse:
+        state = _results().get(analysis_id)
+        if state is None:
+            raise HTTPException(status_code=404, detail=f"Unknown analysis {analysis_id}")
+        return to_response(state)
+    
+    @app.post("/analyses/{analysis_id}/resume", response_model=AnalysisResponse)
+    async def resume_analysis(analysis_id: str) -> AnalysisResponse:
+        """Continue an interrupted or incomplete analysis from its last completed node"""
+        state = await get_workflow().resume_analysis(analysis_id)
+        if state is None:
+            raise HTTPException(status_code=404, detail=f"No resumable checkpoint for analysis {analysis_id}")
+        return to_response(state)
+    
+    @app.post("/analyses/stream")
+    async def stream_analysis(request: AnalysisRequest) -> StreamingResponse:
+        """Server-sent events: `delta` per token chunk, `section` per finished agent, then `result`"""
+        return StreamingResponse(_stream_events(request), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    
+    return app
+
+
+app = create_app()
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host=settings.API_HOST, port=settings.API_PORT)
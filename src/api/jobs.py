@@ -0,0 +1,182 @@
+"""In-process analysis job queue with weighted fair priority scheduling"""
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional
+from src.config import settings
+from src.models import AnalysisRequest, AnalysisStatus, IntelligenceState
+from src.orchestration.workflow import IntelligenceWorkflow
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the queue already holds JOB_MAX_QUEUED pending jobs"""
+
+
+@dataclass
+class Job:
+    request: AnalysisRequest
+    job_id: str = field(default_factory=lambda: f"job_{uuid.uuid4().hex[:12]}")
+    status: AnalysisStatus = AnalysisStatus.PENDING
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[IntelligenceState] = None
+    error: Optional[str] = None
+    task: Optional["asyncio.Task"] = field(default=None, repr=False)
+    
+    @property
+    def finished(self) -> bool:
+        return self.status in (AnalysisStatus.COMPLETED, AnalysisStatus.FAILED, AnalysisStatus.CANCELLED)
+    
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id, "status": self.status.value, "priority": self.request.priority,
+            "query": self.request.query, "analysis_id": self.result.analysis_id if self.result else None,
+            "submitted_at": self.submitted_at, "started_at": self.started_at, "finished_at": self.finished_at,
+            "queue_seconds": (self.started_at or time.time()) - self.submitted_at, "error": self.error,
+        }
+
+
+class WeightedFairQueue:
+    """FIFO per priority class; classes are interleaved by smooth weighted round-robin.
+    
+    With weights high=6, normal=3, low=1 a saturated queue serves 6:3:1, so high priority
+    jumps ahead without starving batch work.
+    """
+    
+    def __init__(self, weights: Dict[str, int]):
+        self.weights = weights
+        self._queues: Dict[str, Deque[Job]] = {name: deque() for name in weights}
+        self._current: Dict[str, int] = {name: 0 for name in weights}
+    
+    def push(self, job: Job):
+        self._queues[job.request.priority].append(job)
+    
+    def pop(self) -> Optional[Job]:
+        active = [name for name, queue in self._queues.items() if queue]
+        if not active:
+            return None
+        for name in active:
+            self._current[name] += self.weights[name]
+        chosen = max(active, key=lambda name: self._current[name])
+        self._current[chosen] -= sum(self.weights[name] for name in active)
+        return self._queues[chosen].popleft()
+    
+    def remove(self, job: Job) -> bool:
+        try:
+            self._queues[job.request.priority].remove(job)
+            return True
+        except ValueError:
+            return False
+    
+    def position(self, job: Job) -> Optional[int]:
+        queue = self._queues[job.request.priority]
+        return queue.index(job) if job in queue else None
+    
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+
+class JobQueue:
+    """Bounded-concurrency worker pool draining a WeightedFairQueue"""
+    
+    def __init__(self, workflow_factory: Callable[[], IntelligenceWorkflow] = IntelligenceWorkflow,
+                 max_concurrency: Optional[int] = None, weights: Optional[Dict[str, int]] = None):
+        self.workflow_factory = workflow_factory
+        self.max_concurrency = max_concurrency or settings.JOB_MAX_CONCURRENCY
+        self.pending = WeightedFairQueue(weights or settings.JOB_PRIORITY_WEIGHTS)
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._workflow: Optional[IntelligenceWorkflow] = None
+        self._ready: Optional[asyncio.Semaphore] = None
+        self._workers: List["asyncio.Task"] = []
+    
+    @property
+    def workflow(self) -> IntelligenceWorkflow:
+        if self._workflow is None:
+            self._workflow = self.workflow_factory()
+        return self._workflow
+    
+    async def start(self):
+        self._ready = asyncio.Semaphore(0)
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.max_concurrency)]
+        logger.info(f"Job queue started with {self.max_concurrency} workers")
+    
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+    
+    def submit(self, request: AnalysisRequest) -> Job:
+        if len(self.pending) >= settings.JOB_MAX_QUEUED:
+            raise QueueFullError(f"Job queue is full ({settings.JOB_MAX_QUEUED} pending)")
+        job = Job(request=request)
+        self.jobs[job.job_id] = job
+        self.pending.push(job)
+        self._ready.release()
+        self._prune()
+        return job
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+    
+    def cancel(self, job_id: str) -> bool:
+        job = self.jobs.get(job_id)
+        if job is None or job.finished:
+            return False
+        if job.status == AnalysisStatus.PENDING:
+            self.pending.remove(job)
+            self._mark(job, AnalysisStatus.CANCELLED)
+        elif job.task is not None:
+            job.task.cancel()
+        return True
+    
+    def stats(self) -> dict:
+        counts: Dict[str, int] = {}
+        for job in self.jobs.values():
+            counts[job.status.value] = counts.get(job.status.value, 0) + 1
+        return {"queued": len(self.pending), "workers": self.max_concurrency, "jobs": counts}
+    
+    async def _worker(self, index: int):
+        while True:
+            await self._ready.acquire()
+            job = self.pending.pop()
+            if job is None:
+                # Its job was cancelled while still queued
+                continue
+            job.status = AnalysisStatus.PROCESSING
+            job.started_at = time.time()
+            job.task = asyncio.create_task(
+                self.workflow.execute_analysis(query=job.request.query, targets=job.request.targets,
+                                               base_analysis_id=job.request.base_analysis_id))
+            try:
+                job.result = await job.task
+                self._mark(job, job.result.status)
+            except asyncio.CancelledError:
+                self._mark(job, AnalysisStatus.CANCELLED)
+                if asyncio.current_task().cancelling():
+                    raise
+            except Exception as e:
+                logger.error(f"Job {job.job_id} failed: {e}")
+                job.error = str(e)
+                self._mark(job, AnalysisStatus.FAILED)
+    
+    def _mark(self, job: Job, status: AnalysisStatus):
+        job.status = status
+        job.finished_at = time.time()
+        logger.info(f"Job {job.job_id} ({job.request.priority}) {status.value}")
+    
+    def _prune(self):
+        """Drop the oldest finished jobs beyond JOB_RETENTION"""
+        excess = len(self.jobs) - settings.JOB_RETENTION
+        for job_id in list(self.jobs):
+            if excess <= 0:
+                break
+            if self.jobs[job_id].finished:
+                del self.jobs[job_id]
+                excess -= 1
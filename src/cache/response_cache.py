@@ -0,0 +1,238 @@
+"""Shared LLM response cache with pluggable backends"""
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from src.config import get_settings, settings
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(ABC):
+    """Byte-bounded key/value store with per-entry expiry"""
+    
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        pass
+    
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: Optional[float] = None):
+        pass
+    
+    @abstractmethod
+    def delete(self, key: str):
+        pass
+    
+    @abstractmethod
+    def clear(self):
+        pass
+    
+    @abstractmethod
+    def stats(self) -> dict:
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU; OrderedDict gives O(1) lookup, promotion and eviction"""
+    
+    def __init__(self, max_bytes: int, max_entries: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, Tuple[str, Optional[float], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at, _ = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key: str, value: str, ttl: Optional[float] = None):
+        size = len(value.encode())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, None if ttl is None else time.time() + ttl, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes or (self.max_entries and len(self._entries) > self.max_entries):
+                oldest, (_, _, oldest_size) = self._entries.popitem(last=False)
+                self.total_bytes -= oldest_size
+    
+    def delete(self, key: str):
+        with self._lock:
+            self._remove(key)
+    
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[2]
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+    
+    def stats(self) -> dict:
+        return {"backend": "memory", "entries": len(self._entries), "bytes": self.total_bytes, "max_bytes": self.max_bytes}
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """SQLite-backed LRU shared by worker processes and surviving restarts"""
+    
+    EVICT_BATCH = 32
+    
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS cache (
+                    key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,
+                    expires_at REAL, accessed_at REAL NOT NULL);
+                CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache(accessed_at);
+                CREATE TABLE IF NOT EXISTS cache_stats (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL);
+                INSERT OR IGNORE INTO cache_stats VALUES (0, 0);
+                CREATE TRIGGER IF NOT EXISTS cache_ins AFTER INSERT ON cache
+                    BEGIN UPDATE cache_stats SET bytes = bytes + NEW.size WHERE id = 0; END;
+                CREATE TRIGGER IF NOT EXISTS cache_del AFTER DELETE ON cache
+                    BEGIN UPDATE cache_stats SET bytes = bytes - OLD.size WHERE id = 0; END;
+            """)
+    
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    def get(self, key: str) -> Optional[str]:
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] is not None and row[1] <= now:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            return None
+        conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return row[0]
+    
+    def set(self, key: str, value: str, ttl: Optional[float] = None):
+        size = len(value.encode())
+        if size > self.max_bytes:
+            return
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Delete first so the triggers keep the byte total exact on overwrite
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            conn.execute("INSERT INTO cache VALUES (?, ?, ?, ?, ?)",
+                         (key, value, size, None if ttl is None else now + ttl, now))
+            if self._total_bytes(conn) > self.max_bytes:
+                conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+            while self._total_bytes(conn) > self.max_bytes:
+                conn.execute("DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                             (self.EVICT_BATCH,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    
+    def _total_bytes(self, conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT bytes FROM cache_stats WHERE id = 0").fetchone()[0]
+    
+    def delete(self, key: str):
+        self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+    
+    def clear(self):
+        self._conn().execute("DELETE FROM cache")
+    
+    def stats(self) -> dict:
+        conn = self._conn()
+        entries = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        return {"backend": "sqlite", "entries": entries, "bytes": self._total_bytes(conn), "max_bytes": self.max_bytes}
+
+
+class ResponseCache:
+    """Agent-facing cache: builds parameter-aware keys and applies per-agent TTLs"""
+    
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(agent_name: str, query: str, context: Optional[str] = None, **params: Any) -> str:
+        payload = {
+            "agent": agent_name, "query": query, "context": context,
+            "models": [settings.GROQ_DEFAULT_MODEL] + list(settings.GROQ_FALLBACK_MODELS),
+            "params": params,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+    
+    def set(self, key: str, value: str, ttl: Optional[float] = None):
+        """`ttl=None` keeps the entry until evicted; a TTL of zero or less disables caching"""
+        if ttl is not None and ttl <= 0:
+            return
+        self.backend.set(key, value, ttl)
+    
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {**self.backend.stats(), "hits": self.hits, "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0}
+
+
+def create_backend() -> CacheBackend:
+    if settings.CACHE_BACKEND == "sqlite":
+        return SQLiteCacheBackend(settings.CACHE_SQLITE_PATH, settings.CACHE_MAX_BYTES)
+    return MemoryCacheBackend(settings.CACHE_MAX_BYTES, settings.CACHE_MAX_SIZE)
+
+
+_response_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    global _response_cache
+    with _cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache(create_backend())
+            logger.info(f"Response cache backend: {settings.CACHE_BACKEND}")
+        return _response_cache
+
+
+def agent_ttl(agent_name: str, default: Optional[int]) -> Optional[int]:
+    """CACHE_AGENT_TTLS for this agent, then CACHE_TTL when configured explicitly, then the agent's own default"""
+    ttls: Dict[str, int] = settings.CACHE_AGENT_TTLS
+    if agent_name in ttls:
+        return ttls[agent_name]
+    if default is None or "CACHE_TTL" in get_settings().model_fields_set:
+        return settings.CACHE_TTL
+    return default
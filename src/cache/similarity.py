@@ -0,0 +1,136 @@
+"""Near-duplicate query lookup: normalised word sets indexed with MinHash/LSH"""
+import hashlib
+import re
+import struct
+import threading
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+from src.config import settings
+
+STOPWORDS = frozenset("""a an and are as at be by do does for from give how i in into is it me my of on or our please
+provide show tell that the their this to us vs versus we what which with about analysis analyse analyze analyzing
+assessment overview report study review brief briefing deep dive""".split())
+SYNONYMS = {"infra": "infrastructure", "mkt": "market", "intl": "international", "ev": "electric vehicle",
+            "evs": "electric vehicle", "saas": "software service", "fintech": "financial technology",
+            "ai": "artificial intelligence", "ml": "machine learning"}
+# Matched before lowercasing: "US" is the country, "us" is a stopword
+CASED_SYNONYMS = {"US": "united states"}
+
+_WORD = re.compile(r"[A-Za-z0-9]+")
+
+
+def _stem(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def normalize_query(query: str) -> FrozenSet[str]:
+    """Content words of a query, lowercased, expanded and lightly stemmed, order-insensitive"""
+    words = []
+    for word in _WORD.findall(query):
+        if word in CASED_SYNONYMS:
+            words.extend(CASED_SYNONYMS[word].split())
+            continue
+        word = word.lower()
+        words.extend(SYNONYMS.get(word, word).split())
+    return frozenset(_stem(w) for w in words if w not in STOPWORDS)
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass(frozen=True)
+class SimilarMatch:
+    value: str
+    query: str
+    score: float
+
+
+class SimilarityIndex:
+    """MinHash signatures split into LSH bands; candidates from matching bands are confirmed with exact
+    Jaccard, so lookup cost depends on bucket sizes rather than on how many queries are stored"""
+    
+    def __init__(self, threshold: float = 0.85, num_perm: int = 64, bands: int = 16, max_entries: int = 100_000,
+                 max_candidates: int = 256):
+        assert num_perm % bands == 0
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._unpack = struct.Struct(f"<{num_perm}Q").unpack
+        self.max_entries = max_entries
+        self.max_candidates = max_candidates
+        self._entries: "OrderedDict[int, Tuple[str, FrozenSet[str], str, str, List[Tuple]]]" = OrderedDict()
+        self._buckets: Dict[Tuple, Set[int]] = defaultdict(set)
+        self._next_id = 0
+        self._lock = threading.Lock()
+    
+    def _signature(self, words: FrozenSet[str]) -> List[int]:
+        # One extendable-output digest per word stands in for num_perm independent hash functions
+        hashes = [self._unpack(hashlib.shake_128(w.encode()).digest(self.num_perm * 8)) for w in words]
+        return [min(column) for column in zip(*hashes)] if hashes else [0] * self.num_perm
+    
+    def _band_keys(self, namespace: str, signature: List[int]) -> List[Tuple]:
+        return [(namespace, band, tuple(signature[band * self.rows:(band + 1) * self.rows]))
+                for band in range(self.bands)]
+    
+    def add(self, namespace: str, query: str, value: str):
+        words = normalize_query(query)
+        keys = self._band_keys(namespace, self._signature(words))
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (namespace, words, query, value, keys)
+            for key in keys:
+                self._buckets[key].add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._evict(*self._entries.popitem(last=False))
+    
+    def _evict(self, entry_id: int, entry: Tuple):
+        for key in entry[4]:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+    
+    def lookup(self, namespace: str, query: str, threshold: Optional[float] = None) -> Optional[SimilarMatch]:
+        threshold = self.threshold if threshold is None else threshold
+        words = normalize_query(query)
+        keys = self._band_keys(namespace, self._signature(words))
+        best: Optional[SimilarMatch] = None
+        with self._lock:
+            candidates: Set[int] = set()
+            for key in keys:
+                candidates.update(self._buckets.get(key, ()))
+                if len(candidates) >= self.max_candidates:
+                    break
+            # Newest first, so a refreshed answer wins over an older one with the same score
+            for entry_id in sorted(candidates, reverse=True)[:self.max_candidates]:
+                _, stored_words, stored_query, value, _ = self._entries[entry_id]
+                score = jaccard(words, stored_words)
+                if score >= threshold and (best is None or score > best.score):
+                    best = SimilarMatch(value, stored_query, score)
+        return best
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_index: Optional[SimilarityIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_similarity_index() -> SimilarityIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SimilarityIndex(settings.SIMILARITY_THRESHOLD, max_entries=settings.SIMILARITY_MAX_ENTRIES)
+        return _index
@@ -0,0 +1,56 @@
+"""In-flight request coalescing"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Concurrent callers with the same key await one shared task instead of repeating the work.
+    
+    The task is cancelled once every caller awaiting it has been cancelled.
+    """
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.coalesced = 0
+        self._tasks: Dict[Tuple[int, str], "asyncio.Task[Any]"] = {}
+        self._waiters: Dict["asyncio.Task[Any]", int] = {}
+    
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        loop = asyncio.get_running_loop()
+        slot = (id(loop), key)
+        task = self._tasks.get(slot)
+        if task is None:
+            task = loop.create_task(fn())
+            self._tasks[slot] = task
+            task.add_done_callback(lambda done: self._forget(slot, done))
+        else:
+            self.coalesced += 1
+            logger.info(f"{self.name}: joined in-flight call {key[:12]}")
+        # Shield so one cancelled caller does not cancel the work the others are waiting on
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if not task.done():
+                    # The last caller was cancelled; nobody wants the result, so stop the work
+                    self._forget(slot, task)
+                    task.cancel()
+    
+    def _forget(self, slot: Tuple[int, str], task: "asyncio.Task[Any]"):
+        """Drop the slot unless a newer call already took it over"""
+        if self._tasks.get(slot) is task:
+            del self._tasks[slot]
+    
+    def is_in_flight(self, key: str) -> bool:
+        return (id(asyncio.get_running_loop()), key) in self._tasks
+    
+    def in_flight(self) -> int:
+        return len(self._tasks)
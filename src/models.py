@@ -1,8 +1,13 @@
 """Data models"""
 from datetime import datetime
 from enum import Enum
-from typing import Optional, List, Dict
-from pydantic import BaseModel, Field
+from typing import Any, Optional, List, Dict
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class _Model(BaseModel):
+    # Core schemas are built on first validation rather than at import, keeping cold starts cheap
+    model_config = ConfigDict(defer_build=True)
 
 
 class AnalysisStatus(str, Enum):
@@ -10,15 +15,17 @@ class AnalysisStatus(str, Enum):
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 
-class AnalysisRequest(BaseModel):
+class AnalysisRequest(_Model):
     query: str = Field(min_length=10, max_length=1000)
     targets: Optional[List[str]] = Field(default=None, max_length=8)
     priority: str = Field(default="normal", pattern="^(low|normal|high)$")
+    base_analysis_id: Optional[str] = None
 
 
-class IntelligenceState(BaseModel):
+class IntelligenceState(_Model):
     analysis_id: str
     query: str
     targets: Optional[List[str]] = None
@@ -34,11 +41,15 @@ class IntelligenceState(BaseModel):
     quality_score: float = 0.0
     completion_status: Dict[str, bool] = Field(default_factory=dict)
     errors: List[str] = Field(default_factory=list)
+    context_tokens: Dict[str, Dict[str, int]] = Field(default_factory=dict)
+    base_analysis_id: Optional[str] = None
+    reused_nodes: List[str] = Field(default_factory=list)
+    similar_match: Optional[Dict[str, Any]] = None
     
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
-class AnalysisResponse(BaseModel):
+class AnalysisResponse(_Model):
     analysis_id: str
     status: AnalysisStatus
     query: str
@@ -55,3 +66,6 @@ class AnalysisResponse(BaseModel):
     processing_time: float
     created_at: datetime
     errors: Optional[List[str]] = None
+    base_analysis_id: Optional[str] = None
+    reused_nodes: Optional[List[str]] = None
+    similar_match: Optional[Dict[str, Any]] = None
@@ -0,0 +1,106 @@
+"""Prometheus metrics"""
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Iterator, Optional
+from src.config import settings
+
+LLM_BUCKETS = (0.25, 0.5, 1, 2, 3, 5, 8, 13, 20, 30, 45, 60, 90, 120)
+FAST_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+
+@lru_cache(maxsize=None)
+def _collectors() -> SimpleNamespace:
+    """Register the collectors on first use so prometheus_client is only imported once metrics are recorded"""
+    from prometheus_client import Counter, Histogram
+    return SimpleNamespace(
+        agent_call_seconds=Histogram(
+            "srip_agent_call_seconds", "Latency of a single Groq call", ["agent", "model", "outcome"],
+            buckets=LLM_BUCKETS),
+        agent_retries=Counter(
+            "srip_agent_retries_total", "Groq attempts that had to be retried or failed over",
+            ["agent", "model", "reason"]),
+        hedged_requests=Counter(
+            "srip_hedged_requests_total", "Hedged duplicate requests fired", ["agent", "winner"]),
+        cache_requests=Counter(
+            "srip_cache_requests_total", "Response cache lookups", ["agent", "result"]),
+        tokens=Counter(
+            "srip_tokens_total", "Tokens reported by Groq", ["agent", "model", "direction"]),
+        context_tokens=Counter(
+            "srip_context_tokens_total", "Upstream context tokens before and after budgeting", ["agent", "kind"]),
+        rate_limit_wait_seconds=Histogram(
+            "srip_rate_limit_wait_seconds", "Time calls spent waiting on the client-side rate limiter", ["model"],
+            buckets=(0, 0.1, 0.5, 1, 2, 5, 10, 20, 30, 60)),
+        node_seconds=Histogram(
+            "srip_node_seconds", "Workflow node duration", ["node", "outcome"], buckets=LLM_BUCKETS),
+        guardrail_seconds=Histogram(
+            "srip_guardrail_seconds", "Guardrail evaluation time per section", ["content_type"],
+            buckets=FAST_BUCKETS),
+        analysis_seconds=Histogram(
+            "srip_analysis_seconds", "End-to-end execute_analysis duration", ["status", "mode"],
+            buckets=LLM_BUCKETS))
+
+
+def observe_call(agent: str, model: str, outcome: str, seconds: float):
+    if settings.ENABLE_METRICS:
+        _collectors().agent_call_seconds.labels(agent, model, outcome).observe(seconds)
+
+
+def count_retry(agent: str, model: str, reason: str):
+    if settings.ENABLE_METRICS:
+        _collectors().agent_retries.labels(agent, model, reason).inc()
+
+
+def count_hedge(agent: str, winner: str):
+    if settings.ENABLE_METRICS:
+        _collectors().hedged_requests.labels(agent, winner).inc()
+
+
+def count_cache(agent: str, hit: bool, result: Optional[str] = None):
+    if settings.ENABLE_METRICS:
+        _collectors().cache_requests.labels(agent, result or ("hit" if hit else "miss")).inc()
+
+
+def count_tokens(agent: str, model: str, usage) -> None:
+    if settings.ENABLE_METRICS and usage is not None:
+        _collectors().tokens.labels(agent, model, "in").inc(getattr(usage, "prompt_tokens", 0) or 0)
+        _collectors().tokens.labels(agent, model, "out").inc(getattr(usage, "completion_tokens", 0) or 0)
+
+
+def count_context_tokens(agent: str, original: int, sent: int):
+    if settings.ENABLE_METRICS:
+        _collectors().context_tokens.labels(agent, "original").inc(original)
+        _collectors().context_tokens.labels(agent, "sent").inc(sent)
+
+
+def observe_rate_limit_wait(model: str, seconds: float):
+    if settings.ENABLE_METRICS:
+        _collectors().rate_limit_wait_seconds.labels(model).observe(seconds)
+
+
+def observe_analysis(status: str, seconds: float):
+    if settings.ENABLE_METRICS:
+        _collectors().analysis_seconds.labels(status, settings.WORKFLOW_MODE).observe(seconds)
+
+
+def observe_node(node: str, outcome: str, seconds: float):
+    if settings.ENABLE_METRICS:
+        _collectors().node_seconds.labels(node, outcome).observe(seconds)
+
+
+@contextmanager
+def time_guardrail(content_type: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if settings.ENABLE_METRICS:
+            _collectors().guardrail_seconds.labels(content_type).observe(time.perf_counter() - start)
+
+
+def render_latest() -> tuple[bytes, str]:
+    """Exposition payload and content type for a /metrics endpoint"""
+    from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+    _collectors()
+    return generate_latest(), CONTENT_TYPE_LATEST
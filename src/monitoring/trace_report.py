@@ -0,0 +1,80 @@
+"""Flame-style breakdown of one analysis from exported JSONL spans
+
+Usage: python -m src.monitoring.trace_report <analysis_id> [--file logs/traces.jsonl]
+"""
+import argparse
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+BAR_WIDTH = 40
+SHOWN_ATTRIBUTES = ("agent", "model", "attempt", "cache", "tokens_in", "tokens_out", "waited", "error")
+
+
+def load_spans(path: Path, trace_id: str) -> List[dict]:
+    spans = []
+    with path.open() as f:
+        for line in f:
+            record = json.loads(line)
+            if record["trace_id"] == trace_id:
+                spans.append(record)
+    return spans
+
+
+def _bar(start: float, duration: float, origin: float, total: float) -> str:
+    offset = int((start - origin) / total * BAR_WIDTH) if total else 0
+    width = max(1, int(duration / total * BAR_WIDTH)) if total else 1
+    return " " * offset + "█" * min(width, BAR_WIDTH - offset)
+
+
+def render(spans: List[dict]) -> str:
+    by_parent: Dict[str, List[dict]] = defaultdict(list)
+    ids = {s["span_id"] for s in spans}
+    for s in spans:
+        by_parent[s["parent_id"] if s["parent_id"] in ids else None].append(s)
+    origin = min(s["start"] for s in spans)
+    total = max(s["end"] for s in spans) - origin
+    lines = [f"{'span':<44} {'start':>8} {'dur':>8}  timeline (total {total:.2f}s)"]
+    
+    def walk(parent_id, depth):
+        for s in sorted(by_parent.get(parent_id, []), key=lambda s: s["start"]):
+            duration = s["end"] - s["start"]
+            attrs = " ".join(f"{k}={s['attributes'][k]}" for k in SHOWN_ATTRIBUTES if k in s["attributes"])
+            flag = "" if s["status"] == "ok" else f" [{s['status']}]"
+            label = ("  " * depth + s["name"] + flag)[:44]
+            lines.append(f"{label:<44} {s['start'] - origin:>7.2f}s {duration:>7.2f}s  "
+                         f"|{_bar(s['start'], duration, origin, total):<{BAR_WIDTH}}| {attrs}")
+            walk(s["span_id"], depth + 1)
+    
+    walk(None, 0)
+    
+    totals: Dict[str, float] = defaultdict(float)
+    for s in spans:
+        totals[s["name"].split(".")[0] if s["name"].startswith("node.") else s["name"]] += s["end"] - s["start"]
+    lines.append("")
+    lines.append("Time by span kind (overlapping spans counted separately):")
+    for name, seconds in sorted(totals.items(), key=lambda item: -item[1]):
+        lines.append(f"  {name:<30} {seconds:>8.2f}s")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("analysis_id")
+    parser.add_argument("--file", default=None, help="JSONL span file (defaults to TRACING_JSONL_PATH)")
+    args = parser.parse_args(argv)
+    if args.file is None:
+        from src.config import settings
+        args.file = settings.TRACING_JSONL_PATH
+    spans = load_spans(Path(args.file), args.analysis_id)
+    if not spans:
+        print(f"No spans for {args.analysis_id} in {args.file}", file=sys.stderr)
+        return 1
+    print(render(spans))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
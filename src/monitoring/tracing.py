@@ -0,0 +1,172 @@
+"""Lightweight hierarchical span tracing with JSONL and OTLP-style exporters"""
+import asyncio
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    parent_id: Optional[str] = None
+    span_id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+    start: float = field(default_factory=time.time)
+    end: Optional[float] = None
+    status: str = "ok"
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    
+    def set(self, **attributes: Any):
+        self.attributes.update(attributes)
+    
+    @property
+    def duration(self) -> float:
+        return (self.end or time.time()) - self.start
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("srip_current_span", default=None)
+
+
+class SpanExporter(ABC):
+    @abstractmethod
+    def export(self, spans: List[Span]):
+        pass
+
+
+class JsonlSpanExporter(SpanExporter):
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+    
+    def export(self, spans: List[Span]):
+        with self.path.open("a") as f:
+            for span in spans:
+                f.write(json.dumps(asdict(span), default=str) + "\n")
+
+
+class OtlpHttpSpanExporter(SpanExporter):
+    """Posts span batches as JSON to an OTLP/HTTP-style collector endpoint"""
+    
+    def __init__(self, endpoint: str):
+        import httpx
+        self.endpoint = endpoint
+        self.client = httpx.Client(timeout=5)
+    
+    def export(self, spans: List[Span]):
+        payload = {"resourceSpans": [{"resource": {"service.name": settings.LANGCHAIN_PROJECT},
+                                      "spans": [asdict(span) for span in spans]}]}
+        try:
+            self.client.post(self.endpoint, content=json.dumps(payload, default=str),
+                             headers={"Content-Type": "application/json"})
+        except Exception as e:
+            logger.warning(f"Span export to {self.endpoint} failed: {e}")
+
+
+class Tracer:
+    """Finished spans are queued and written in batches by a daemon thread, off the event loop"""
+    
+    def __init__(self, exporter: SpanExporter, batch_size: int = 256, flush_interval: float = 1.0):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Span]" = queue.Queue()
+        self._flush_lock = threading.Lock()
+        threading.Thread(target=self._run, name="span-exporter", daemon=True).start()
+        atexit.register(self.flush)
+    
+    def submit(self, span: Span):
+        self._queue.put(span)
+    
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+    
+    def flush(self):
+        with self._flush_lock:
+            while not self._queue.empty():
+                batch = []
+                while len(batch) < self.batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                try:
+                    self.exporter.export(batch)
+                except Exception as e:
+                    logger.warning(f"Span export failed: {e}")
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Optional[Tracer]:
+    global _tracer
+    if not settings.TRACING_ENABLED:
+        return None
+    with _tracer_lock:
+        if _tracer is None:
+            if settings.TRACING_EXPORTER == "otlp":
+                exporter: SpanExporter = OtlpHttpSpanExporter(settings.TRACING_OTLP_ENDPOINT)
+            else:
+                exporter = JsonlSpanExporter(settings.TRACING_JSONL_PATH)
+            _tracer = Tracer(exporter)
+        return _tracer
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def start_span(name: str, trace_id: Optional[str] = None, **attributes: Any) -> Span:
+    """Create a span under the current one without making it current (for async generators)"""
+    parent = _current_span.get()
+    return Span(name=name, trace_id=trace_id or (parent.trace_id if parent else uuid.uuid4().hex[:16]),
+                parent_id=parent.span_id if parent else None, attributes=attributes)
+
+
+def finish_span(span: Span, error: Optional[BaseException] = None):
+    span.end = time.time()
+    if error is not None:
+        span.status = "cancelled" if isinstance(error, asyncio.CancelledError) else "error"
+        span.attributes["error"] = str(error) or type(error).__name__
+    tracer = get_tracer()
+    if tracer is not None:
+        tracer.submit(span)
+
+
+@contextmanager
+def span(name: str, trace_id: Optional[str] = None, **attributes: Any) -> Iterator[Span]:
+    """Open a child of the current span (or a new root) for the duration of the block"""
+    current = start_span(name, trace_id, **attributes)
+    token = _current_span.set(current)
+    error: Optional[BaseException] = None
+    try:
+        yield current
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _current_span.reset(token)
+        finish_span(current, error)
+
+
+@contextmanager
+def use_span(current: Span) -> Iterator[Span]:
+    """Make an already started span current without finishing it on exit"""
+    token = _current_span.set(current)
+    try:
+        yield current
+    finally:
+        _current_span.reset(token)
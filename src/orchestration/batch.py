@@ -0,0 +1,211 @@
+"""Batch runner: stream a CSV/JSONL file of queries through the workflow with bounded concurrency.
+
+    python -m src.orchestration.batch companies.csv results.jsonl --concurrency 4
+
+Each finished item is appended to the output JSONL straight away; rerunning with the same output
+skips items already completed there, so an interrupted batch picks up where it stopped.
+"""
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import logging
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from src.config import settings
+from src.orchestration.workflow import IntelligenceWorkflow
+
+logger = logging.getLogger(__name__)
+
+CALLS_PER_ANALYSIS = 4  # market, competitive, risk, strategic
+
+
+@dataclass
+class BatchItem:
+    query: str
+    targets: Optional[List[str]] = None
+    item_id: str = ""
+    
+    def __post_init__(self):
+        if not self.item_id:
+            # Stable across runs so resuming doesn't depend on the input's line order
+            self.item_id = hashlib.sha256(json.dumps([self.query, self.targets]).encode()).hexdigest()[:16]
+
+
+@dataclass
+class BatchProgress:
+    total: int
+    skipped: int = 0
+    completed: int = 0
+    failed: int = 0
+    started_at: float = field(default_factory=time.time)
+    
+    @property
+    def done(self) -> int:
+        return self.completed + self.failed
+    
+    @property
+    def remaining(self) -> int:
+        return self.total - self.skipped - self.done
+    
+    @property
+    def throughput(self) -> float:
+        """Items finished per minute in this run"""
+        elapsed = time.time() - self.started_at
+        return self.done / elapsed * 60 if elapsed > 0 else 0.0
+    
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        return self.remaining / self.throughput * 60 if self.throughput else None
+    
+    def to_dict(self) -> dict:
+        return {"total": self.total, "skipped": self.skipped, "completed": self.completed, "failed": self.failed,
+                "remaining": self.remaining, "elapsed_seconds": round(time.time() - self.started_at, 1),
+                "items_per_minute": round(self.throughput, 2),
+                "eta_seconds": round(self.eta_seconds, 1) if self.eta_seconds is not None else None}
+    
+    def __str__(self) -> str:
+        eta = f"{self.eta_seconds:.0f}s" if self.eta_seconds is not None else "?"
+        return (f"{self.done + self.skipped}/{self.total} done ({self.completed} ok, {self.failed} failed, "
+                f"{self.skipped} skipped) | {self.throughput:.1f}/min | ETA {eta}")
+
+
+def _targets(value) -> Optional[List[str]]:
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = value.replace("|", ";").split(";")
+    return [t.strip() for t in value if t.strip()] or None
+
+
+def load_items(path: Path) -> List[BatchItem]:
+    """JSONL objects or CSV rows with `query`, optional `targets` (list, or `;`-separated) and optional `id`"""
+    if path.suffix.lower() == ".csv":
+        with path.open(newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+    else:
+        with path.open(encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    items = [BatchItem(query=row["query"].strip(), targets=_targets(row.get("targets")), item_id=row.get("id") or "")
+             for row in rows if (row.get("query") or "").strip()]
+    logger.info(f"Loaded {len(items)} batch items from {path}")
+    return items
+
+
+def completed_ids(output: Path) -> Set[str]:
+    if not output.exists():
+        return set()
+    done = set()
+    with output.open(encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by a crash; that item simply runs again
+            if record.get("status") == "completed":
+                done.add(record["item_id"])
+    return done
+
+
+def _ends_with_newline(path: Path) -> bool:
+    with path.open("rb") as f:
+        f.seek(-1, 2)
+        return f.read(1) == b"\n"
+
+
+def concurrency_limit(requested: int) -> int:
+    """Cap concurrent analyses so one round of them fits inside the per-minute request quota"""
+    if not settings.RATE_LIMIT_ENABLED:
+        return max(1, requested)
+    return max(1, min(requested, settings.RATE_LIMIT_PER_MINUTE // CALLS_PER_ANALYSIS))
+
+
+class BatchRunner:
+    def __init__(self, workflow: Optional[IntelligenceWorkflow] = None, concurrency: Optional[int] = None,
+                 on_progress: Optional[Callable[[BatchProgress], None]] = None):
+        self.workflow = workflow or IntelligenceWorkflow()
+        concurrency = concurrency or settings.BATCH_CONCURRENCY
+        self.concurrency = concurrency_limit(concurrency)
+        if self.concurrency < concurrency:
+            logger.warning(f"Batch concurrency capped at {self.concurrency} by RATE_LIMIT_PER_MINUTE")
+        self.on_progress = on_progress
+    
+    async def run(self, items: Iterable[BatchItem], output: Path) -> BatchProgress:
+        items = list(items)
+        unique: Dict[str, BatchItem] = {}
+        for item in items:
+            unique.setdefault(item.item_id, item)
+        if len(unique) < len(items):
+            logger.warning(f"Ignoring {len(items) - len(unique)} duplicate batch items")
+        items = list(unique.values())
+        done = completed_ids(output)
+        pending = [item for item in items if item.item_id not in done]
+        progress = BatchProgress(total=len(items), skipped=len(items) - len(pending))
+        if progress.skipped:
+            logger.info(f"Resuming batch: {progress.skipped} items already completed in {output}")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        queue: "asyncio.Queue[BatchItem]" = asyncio.Queue()
+        for item in pending:
+            queue.put_nowait(item)
+        with output.open("a", encoding="utf-8") as out:
+            if out.tell() and not _ends_with_newline(output):
+                out.write("\n")  # don't glue the first new record onto a half-written line
+            workers = [asyncio.create_task(self._worker(queue, out, progress)) for _ in range(self.concurrency)]
+            try:
+                await asyncio.gather(*workers)
+            finally:
+                for worker in workers:
+                    worker.cancel()
+        return progress
+    
+    async def _worker(self, queue: "asyncio.Queue[BatchItem]", out, progress: BatchProgress):
+        while not queue.empty():
+            item = queue.get_nowait()
+            record = await self._run_item(item)
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            if record["status"] == "completed":
+                progress.completed += 1
+            else:
+                progress.failed += 1
+            logger.info(f"Batch item {item.item_id} {record['status']}: {progress}")
+            if self.on_progress:
+                self.on_progress(progress)
+    
+    async def _run_item(self, item: BatchItem) -> dict:
+        record = {"item_id": item.item_id, "query": item.query, "targets": item.targets}
+        start = time.time()
+        try:
+            result = await self.workflow.execute_analysis(item.query, targets=item.targets)
+        except Exception as e:
+            logger.error(f"Batch item {item.item_id} raised: {e}")
+            return {**record, "status": "failed", "duration": time.time() - start, "error": str(e)}
+        return {**record, "status": result.status.value, "duration": time.time() - start,
+                "analysis_id": result.analysis_id, "quality_score": result.quality_score,
+                "error": "; ".join(result.errors) or None, "result": result.model_dump(mode="json")}
+
+
+def run_batch(input_path: str, output_path: str, concurrency: Optional[int] = None,
+              workflow: Optional[IntelligenceWorkflow] = None, on_progress: Optional[Callable[[BatchProgress], None]] = None) -> BatchProgress:
+    runner = BatchRunner(workflow, concurrency, on_progress)
+    return asyncio.run(runner.run(load_items(Path(input_path)), Path(output_path)))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="CSV or JSONL with query[, targets, id]")
+    parser.add_argument("output", help="results JSONL (appended to; completed items are skipped on rerun)")
+    parser.add_argument("--concurrency", type=int, default=settings.BATCH_CONCURRENCY)
+    args = parser.parse_args(argv)
+    progress = run_batch(args.input, args.output, args.concurrency,
+                         on_progress=lambda p: print(p, file=sys.stderr, flush=True))
+    print(json.dumps(progress.to_dict()))
+    return 1 if progress.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
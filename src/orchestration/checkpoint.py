@@ -0,0 +1,238 @@
+"""Durable LangGraph checkpoints in SQLite, plus a ledger of analyses that have not finished yet"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (WRITES_IDX_MAP, BaseCheckpointSaver, ChannelVersions, Checkpoint,
+                                       CheckpointMetadata, CheckpointTuple, get_checkpoint_id,
+                                       get_checkpoint_metadata)
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver[int]):
+    """Stores each checkpoint whole (state values included) after every graph step, together with
+    the writes of nodes that finished in a step that did not, so a restarted process only reruns
+    the nodes that never completed"""
+    
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        # Identifies this saver's runs in the ledger; a run is only recovered once its owner stops renewing it
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._local = threading.local()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL,
+                    parent_checkpoint_id TEXT, type TEXT NOT NULL, checkpoint BLOB NOT NULL,
+                    metadata_type TEXT NOT NULL, metadata BLOB NOT NULL,
+                    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id));
+                CREATE TABLE IF NOT EXISTS writes (
+                    thread_id TEXT NOT NULL, checkpoint_ns TEXT NOT NULL, checkpoint_id TEXT NOT NULL,
+                    task_id TEXT NOT NULL, idx INTEGER NOT NULL, channel TEXT NOT NULL, type TEXT NOT NULL,
+                    value BLOB NOT NULL, PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx));
+                CREATE TABLE IF NOT EXISTS runs (
+                    analysis_id TEXT PRIMARY KEY, query TEXT NOT NULL, targets TEXT NOT NULL,
+                    base_analysis_id TEXT, status TEXT NOT NULL, updated_at REAL NOT NULL,
+                    owner TEXT, lease_until REAL);
+                CREATE INDEX IF NOT EXISTS idx_runs_status ON runs(status, updated_at);
+            """)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(runs)")}
+            for column in ("owner TEXT", "lease_until REAL"):
+                if column.split()[0] not in columns:  # ledgers written before runs had leases
+                    conn.execute(f"ALTER TABLE runs ADD COLUMN {column}")
+    
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+    
+    # --- BaseCheckpointSaver ---
+    
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        configurable = config["configurable"]
+        thread_id, checkpoint_ns = configurable["thread_id"], configurable.get("checkpoint_ns", "")
+        conn = self._conn()
+        if checkpoint_id := get_checkpoint_id(config):
+            row = conn.execute("""SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata
+                                  FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?""",
+                               (thread_id, checkpoint_ns, checkpoint_id)).fetchone()
+        else:
+            row = conn.execute("""SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata
+                                  FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?
+                                  ORDER BY checkpoint_id DESC LIMIT 1""", (thread_id, checkpoint_ns)).fetchone()
+        return self._tuple(thread_id, checkpoint_ns, row) if row else None
+    
+    def _tuple(self, thread_id: str, checkpoint_ns: str, row: Tuple) -> CheckpointTuple:
+        checkpoint_id, parent_id, type_, checkpoint, metadata_type, metadata = row
+        writes = self._conn().execute("""SELECT task_id, channel, type, value FROM writes
+                                         WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?
+                                         ORDER BY task_id, idx""", (thread_id, checkpoint_ns, checkpoint_id))
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                     "checkpoint_id": checkpoint_id}},
+            checkpoint=self.serde.loads_typed((type_, checkpoint)),
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                            "checkpoint_id": parent_id}} if parent_id else None,
+            pending_writes=[(task_id, channel, self.serde.loads_typed((t, v))) for task_id, channel, t, v in writes],
+        )
+    
+    def list(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+             before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        clauses, params = [], []
+        if config is not None:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if "checkpoint_ns" in config["configurable"]:
+                clauses.append("checkpoint_ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+        if before is not None and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._conn().execute(f"""SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type,
+                                               checkpoint, metadata_type, metadata
+                                        FROM checkpoints {where} ORDER BY checkpoint_id DESC""", params).fetchall()
+        yielded = 0
+        for row in rows:
+            item = self._tuple(row[0], row[1], row[2:])
+            if filter and any(item.metadata.get(k) != v for k, v in filter.items()):
+                continue
+            yield item
+            yielded += 1
+            if limit is not None and yielded >= limit:
+                return
+    
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        configurable = config["configurable"]
+        thread_id, checkpoint_ns = configurable["thread_id"], configurable.get("checkpoint_ns", "")
+        type_, blob = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_blob = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        self._conn().execute("INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                             (thread_id, checkpoint_ns, checkpoint["id"], configurable.get("checkpoint_id"),
+                              type_, blob, metadata_type, metadata_blob))
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                 "checkpoint_id": checkpoint["id"]}}
+    
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                   task_path: str = "") -> None:
+        configurable = config["configurable"]
+        # Special channels (errors, interrupts) overwrite; regular writes keep the first copy
+        verb = "REPLACE" if all(channel in WRITES_IDX_MAP for channel, _ in writes) else "IGNORE"
+        rows = [(configurable["thread_id"], configurable.get("checkpoint_ns", ""), configurable["checkpoint_id"],
+                 task_id, WRITES_IDX_MAP.get(channel, idx), channel, *self.serde.dumps_typed(value))
+                for idx, (channel, value) in enumerate(writes)]
+        conn = self._conn()
+        with conn:
+            conn.executemany(f"INSERT OR {verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    
+    def delete_thread(self, thread_id: str) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+            conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+    
+    # The async variants run the sqlite work in a worker thread so graph steps never block the event loop
+    
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+    
+    async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+                    before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+    
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+    
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+    
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+    
+    # --- run ledger ---
+    
+    def begin_run(self, analysis_id: str, query: str, targets: Optional[List[str]],
+                  base_analysis_id: Optional[str] = None):
+        now = time.time()
+        self._conn().execute("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, 'running', ?, ?, ?)",
+                             (analysis_id, query, json.dumps(targets), base_analysis_id, now, self.owner,
+                              now + settings.CHECKPOINT_LEASE))
+    
+    def claim(self, analysis_id: str) -> bool:
+        """Take over a run unless another owner still holds a live lease on it"""
+        now = time.time()
+        cursor = self._conn().execute(
+            "UPDATE runs SET status = 'running', updated_at = ?, owner = ?, lease_until = ? WHERE analysis_id = ? "
+            "AND (status != 'running' OR lease_until IS NULL OR lease_until < ?)",
+            (now, self.owner, now + settings.CHECKPOINT_LEASE, analysis_id, now))
+        return cursor.rowcount == 1
+    
+    def renew(self, analysis_id: str) -> bool:
+        """Extend the lease on a run this saver owns; False once another owner has taken it over"""
+        cursor = self._conn().execute(
+            "UPDATE runs SET lease_until = ? WHERE analysis_id = ? AND owner = ? AND status = 'running'",
+            (time.time() + settings.CHECKPOINT_LEASE, analysis_id, self.owner))
+        return cursor.rowcount == 1
+    
+    def end_run(self, analysis_id: str, status: str):
+        """A completed analysis needs no checkpoints; a failed or cancelled one keeps them so it can be resumed.
+        Runs another owner has taken over are left alone"""
+        if status == "completed":
+            cursor = self._conn().execute("DELETE FROM runs WHERE analysis_id = ? AND owner = ?",
+                                          (analysis_id, self.owner))
+            if cursor.rowcount:
+                self.delete_thread(analysis_id)
+        else:
+            self._conn().execute("UPDATE runs SET status = ?, updated_at = ? WHERE analysis_id = ? AND owner = ?",
+                                 (status, time.time(), analysis_id, self.owner))
+    
+    def get_run(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT * FROM runs WHERE analysis_id = ?", (analysis_id,)).fetchone()
+        return self._run(row) if row else None
+    
+    def inflight(self) -> List[Dict[str, Any]]:
+        """Runs still marked running whose lease expired: the process that owned them stopped"""
+        rows = self._conn().execute("SELECT * FROM runs WHERE status = 'running' AND (lease_until IS NULL OR "
+                                    "lease_until < ?) ORDER BY updated_at", (time.time(),)).fetchall()
+        return [self._run(row) for row in rows]
+    
+    def prune(self, max_age: float):
+        now = time.time()
+        for (analysis_id,) in self._conn().execute(
+                "SELECT analysis_id FROM runs WHERE updated_at < ? AND NOT (status = 'running' AND lease_until >= ?)",
+                (now - max_age, now)).fetchall():
+            self.delete_thread(analysis_id)
+            self._conn().execute("DELETE FROM runs WHERE analysis_id = ?", (analysis_id,))
+    
+    @staticmethod
+    def _run(row: Tuple) -> Dict[str, Any]:
+        return {"analysis_id": row[0], "query": row[1], "targets": json.loads(row[2]), "base_analysis_id": row[3],
+                "status": row[4], "updated_at": row[5], "owner": row[6], "lease_until": row[7]}
+
+
+def create_checkpointer() -> Optional[SQLiteCheckpointSaver]:
+    if not settings.CHECKPOINT_ENABLED:
+        return None
+    return SQLiteCheckpointSaver(settings.CHECKPOINT_PATH)
@@ -0,0 +1,102 @@
+"""Deterministic compression of upstream sections to fit downstream prompt budgets"""
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from src.config import settings
+
+_HEADING = re.compile(r'^(#{1,6}\s|\*\*[^*]+\*\*:?$|[A-Z][A-Z0-9 &/,\-()]{3,}:?$)')
+_BULLET = re.compile(r'^(\s*[-*•]\s+|\s*\d+[.)]\s+)')
+_FACT = re.compile(r'\d|%|\$|€|£')
+_SENTENCE = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9])')
+
+
+def approx_tokens(text: Optional[str]) -> int:
+    """Same ~4 chars/token heuristic the rate limiter reserves with"""
+    return (len(text) + 3) // 4 if text else 0
+
+
+@dataclass
+class ContextUsage:
+    original_tokens: int = 0
+    sent_tokens: int = 0
+    
+    @property
+    def saved_tokens(self) -> int:
+        return self.original_tokens - self.sent_tokens
+    
+    def to_dict(self) -> Dict[str, int]:
+        return {"original": self.original_tokens, "sent": self.sent_tokens, "saved": self.saved_tokens}
+
+
+def _units(text: str) -> List[Tuple[int, str]]:
+    """(priority, text) per line, prose split into sentences; lower priority is kept first, -1 marks headings"""
+    units = []
+    for line in text.splitlines():
+        line = " ".join(line.split())
+        if not line:
+            continue
+        if _HEADING.match(line):
+            units.append((-1, line))
+        elif _BULLET.match(line):
+            units.append((0 if _FACT.search(line) else 2, line))
+        else:
+            for sentence in _SENTENCE.split(line):
+                units.append((1 if _FACT.search(sentence) else 3, sentence))
+    return units
+
+
+def compress(text: Optional[str], budget_tokens: int) -> Optional[str]:
+    """Keep bullets and sentences carrying numbers first, then other bullets, then prose, each with its
+    section heading and in document order; returns `text` unchanged if it already fits"""
+    if not text or approx_tokens(text) <= budget_tokens:
+        return text
+    units = _units(text)
+    headings = []
+    current = None
+    for index, (priority, _) in enumerate(units):
+        current = index if priority == -1 else current
+        headings.append(current)
+    budget_chars = budget_tokens * 4
+    kept = set()
+    used = 0
+    for index in sorted((i for i, (p, _) in enumerate(units) if p >= 0), key=lambda i: (units[i][0], i)):
+        # An item brings its section heading along when both fit
+        wanted = [i for i in (headings[index], index) if i is not None and i not in kept]
+        size = sum(len(units[i][1]) + 1 for i in wanted)
+        if used + size > budget_chars and len(wanted) > 1:
+            wanted = [index]
+            size = len(units[index][1]) + 1
+        if used + size <= budget_chars:
+            kept.update(wanted)
+            used += size
+    if not kept:
+        return text[:budget_chars].rsplit(" ", 1)[0]
+    return "\n".join(units[i][1] for i in sorted(kept))
+
+
+class ContextBudget:
+    """Fits the upstream sections handed to an agent into that agent's CONTEXT_BUDGETS token allowance"""
+    
+    def __init__(self, budgets: Optional[Dict[str, int]] = None):
+        self.budgets = budgets if budgets is not None else settings.CONTEXT_BUDGETS
+    
+    def budget_for(self, agent_name: str) -> Optional[int]:
+        return self.budgets.get(agent_name) if settings.CONTEXT_BUDGET_ENABLED else None
+    
+    def fit(self, agent_name: str, sections: Dict[str, Optional[str]]) -> Tuple[Dict[str, Optional[str]], ContextUsage]:
+        """Split the budget evenly, handing what short sections leave unused to the longer ones"""
+        usage = ContextUsage(original_tokens=sum(approx_tokens(text) for text in sections.values()))
+        budget = self.budget_for(agent_name)
+        if budget is None or usage.original_tokens <= budget:
+            usage.sent_tokens = usage.original_tokens
+            return dict(sections), usage
+        fitted = dict(sections)
+        pending = sorted((name for name, text in sections.items() if text), key=lambda n: approx_tokens(sections[n]))
+        remaining = budget
+        while pending:
+            share = remaining // len(pending)
+            name = pending.pop(0)
+            fitted[name] = compress(sections[name], share)
+            remaining -= approx_tokens(fitted[name])
+        usage.sent_tokens = sum(approx_tokens(text) for text in fitted.values())
+        return fitted, usage
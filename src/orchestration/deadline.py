@@ -0,0 +1,36 @@
+"""End-to-end analysis deadlines"""
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when there is not enough budget left to start or finish a step"""
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """Absolute wall-clock deadline; stored as a timestamp so it can travel in workflow state"""
+    expires_at: float
+    
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        return cls(time.time() + seconds)
+    
+    @classmethod
+    def from_state(cls, expires_at: Optional[float]) -> Optional["Deadline"]:
+        return cls(expires_at) if expires_at is not None else None
+    
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.time())
+    
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+    
+    def timeout(self, default: float) -> float:
+        """Per-call timeout shrunk to the remaining budget"""
+        return min(default, self.remaining())
+    
+    def check(self, step: str):
+        if self.expired():
+            raise DeadlineExceeded(f"{step}: analysis deadline exceeded")
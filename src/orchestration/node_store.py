@@ -0,0 +1,85 @@
+"""Per-analysis record of each node's input hash and output, for incremental re-analysis"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+NodeRecords = Dict[str, Dict[str, str]]  # section -> {"input_hash": ..., "output": ...}
+
+
+class NodeStore(ABC):
+    @abstractmethod
+    def get(self, analysis_id: str) -> Optional[NodeRecords]:
+        pass
+    
+    @abstractmethod
+    def put(self, analysis_id: str, records: NodeRecords):
+        pass
+
+
+class MemoryNodeStore(NodeStore):
+    def __init__(self, max_analyses: int):
+        self.max_analyses = max_analyses
+        self._records: "OrderedDict[str, NodeRecords]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, analysis_id: str) -> Optional[NodeRecords]:
+        with self._lock:
+            return self._records.get(analysis_id)
+    
+    def put(self, analysis_id: str, records: NodeRecords):
+        with self._lock:
+            self._records[analysis_id] = records
+            self._records.move_to_end(analysis_id)
+            while len(self._records) > self.max_analyses:
+                self._records.popitem(last=False)
+
+
+class SQLiteNodeStore(NodeStore):
+    """Survives restarts, so an analysis from yesterday can still be the base of today's tweak"""
+    
+    def __init__(self, path: str, max_analyses: int):
+        self.path = path
+        self.max_analyses = max_analyses
+        self._local = threading.local()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS node_records (
+                    analysis_id TEXT PRIMARY KEY, records TEXT NOT NULL, created_at REAL NOT NULL);
+                CREATE INDEX IF NOT EXISTS idx_node_records_created ON node_records(created_at);
+            """)
+    
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+    
+    def get(self, analysis_id: str) -> Optional[NodeRecords]:
+        row = self._conn().execute("SELECT records FROM node_records WHERE analysis_id = ?", (analysis_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def put(self, analysis_id: str, records: NodeRecords):
+        conn = self._conn()
+        conn.execute("INSERT OR REPLACE INTO node_records VALUES (?, ?, ?)",
+                     (analysis_id, json.dumps(records), time.time()))
+        conn.execute("""DELETE FROM node_records WHERE analysis_id IN (
+                            SELECT analysis_id FROM node_records ORDER BY created_at DESC, rowid DESC LIMIT -1 OFFSET ?)""",
+                     (self.max_analyses,))
+
+
+def create_node_store() -> NodeStore:
+    if settings.NODE_STORE_BACKEND == "sqlite":
+        return SQLiteNodeStore(settings.NODE_STORE_PATH, settings.NODE_STORE_MAX_ANALYSES)
+    return MemoryNodeStore(settings.NODE_STORE_MAX_ANALYSES)
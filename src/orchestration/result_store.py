@@ -0,0 +1,218 @@
+"""Persistent analysis history: SQLite rows with indexed metadata and an FTS5 index over the sections"""
+import atexit
+import json
+import logging
+import queue
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from src.config import settings
+from src.models import IntelligenceState
+
+logger = logging.getLogger(__name__)
+
+FTS_COLUMNS = ("query", "targets", "market_intelligence", "competitive_landscape", "risk_evaluation",
+               "strategic_actions", "executive_briefing")
+_SUMMARY = "a.analysis_id, a.query, a.targets, a.status, a.quality_score, a.created_at"
+_TERM = re.compile(r"\w+")
+_INSERT_FTS = f"INSERT INTO analyses_fts(rowid, {', '.join(FTS_COLUMNS)}) VALUES (?{', ?' * len(FTS_COLUMNS)})"
+
+
+def _summary(row) -> Dict[str, Any]:
+    return {"analysis_id": row[0], "query": row[1], "targets": json.loads(row[2]), "status": row[3],
+            "quality_score": row[4], "created_at": row[5]}
+
+
+def _match_expression(text: str) -> str:
+    # Quote every term so user input can't be parsed as FTS5 query syntax; prefix-match the last one
+    terms = [f'"{term}"' for term in _TERM.findall(text)]
+    if terms:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+class ResultStore:
+    """Writes are queued and committed in batches by a daemon thread, so persisting an analysis never
+    blocks the request; `get` also sees queued results, listing and search see them once flushed"""
+    
+    def __init__(self, path: str, batch_size: int = 64, flush_interval: float = 1.0, max_attempts: int = 3):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        self._queue: "queue.Queue[IntelligenceState]" = queue.Queue()
+        self._pending: Dict[str, IntelligenceState] = {}
+        self._attempts: Dict[str, int] = {}
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript(f"""
+                CREATE TABLE IF NOT EXISTS analyses (
+                    analysis_id TEXT PRIMARY KEY, query TEXT NOT NULL, targets TEXT NOT NULL, status TEXT NOT NULL,
+                    quality_score REAL NOT NULL, created_at TEXT NOT NULL, payload TEXT NOT NULL);
+                CREATE INDEX IF NOT EXISTS idx_analyses_query ON analyses(query);
+                CREATE INDEX IF NOT EXISTS idx_analyses_status ON analyses(status, created_at);
+                CREATE INDEX IF NOT EXISTS idx_analyses_created ON analyses(created_at);
+                CREATE TABLE IF NOT EXISTS analysis_targets (analysis_id TEXT NOT NULL, target TEXT NOT NULL,
+                    PRIMARY KEY (target, analysis_id)) WITHOUT ROWID;
+                CREATE VIRTUAL TABLE IF NOT EXISTS analyses_fts USING fts5({", ".join(FTS_COLUMNS)});
+            """)
+        threading.Thread(target=self._run, name="result-store-writer", daemon=True).start()
+        atexit.register(self.flush)
+    
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+    
+    def put(self, state: IntelligenceState):
+        with self._pending_lock:
+            self._pending[state.analysis_id] = state
+            self._attempts.pop(state.analysis_id, None)
+        self._queue.put(state)
+    
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+    
+    def flush(self):
+        with self._flush_lock:
+            while not self._queue.empty():
+                batch = []
+                while len(batch) < self.batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    if self._retry_later(batch, e):
+                        return
+                    continue
+                self._done(batch)
+    
+    def _retry_later(self, batch: List[IntelligenceState], error: Exception) -> bool:
+        """Requeue a failed batch (still visible to `get`) for the next flush. Once a record has failed
+        `max_attempts` times the batch is written one record at a time, and records that still fail on
+        their own are dropped so they cannot block everything queued behind them"""
+        with self._pending_lock:
+            batch = [state for state in batch if self._pending.get(state.analysis_id) is state]
+            for state in batch:
+                self._attempts[state.analysis_id] = self._attempts.get(state.analysis_id, 0) + 1
+            exhausted = any(self._attempts[state.analysis_id] >= self.max_attempts for state in batch)
+        if not exhausted:
+            logger.warning(f"Persisting {len(batch)} analyses failed, retrying later: {error}")
+            for state in batch:
+                self._queue.put(state)
+            return True
+        retry = False
+        for state in batch:
+            try:
+                self._write([state])
+            except Exception as e:
+                if self._attempts[state.analysis_id] >= self.max_attempts:
+                    logger.error(f"Dropping analysis {state.analysis_id} after "
+                                 f"{self._attempts[state.analysis_id]} failed writes: {e}")
+                    self._done([state])
+                else:
+                    self._queue.put(state)
+                    retry = True
+                continue
+            self._done([state])
+        return retry
+    
+    def _done(self, batch: List[IntelligenceState]):
+        with self._pending_lock:
+            for state in batch:
+                if self._pending.get(state.analysis_id) is state:
+                    del self._pending[state.analysis_id]
+                    self._attempts.pop(state.analysis_id, None)
+    
+    def _write(self, batch: List[IntelligenceState]):
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            for state in batch:
+                targets = state.targets or []
+                conn.execute("""INSERT INTO analyses VALUES (?, ?, ?, ?, ?, ?, ?)
+                                ON CONFLICT(analysis_id) DO UPDATE SET query = excluded.query,
+                                    targets = excluded.targets, status = excluded.status,
+                                    quality_score = excluded.quality_score, created_at = excluded.created_at,
+                                    payload = excluded.payload""",
+                             (state.analysis_id, state.query, json.dumps(targets), state.status.value,
+                              state.quality_score, state.created_at.isoformat(), state.model_dump_json()))
+                rowid = conn.execute("SELECT rowid FROM analyses WHERE analysis_id = ?",
+                                     (state.analysis_id,)).fetchone()[0]
+                conn.execute("DELETE FROM analysis_targets WHERE analysis_id = ?", (state.analysis_id,))
+                conn.executemany("INSERT OR IGNORE INTO analysis_targets VALUES (?, ?)",
+                                 [(state.analysis_id, target.strip().lower()) for target in targets])
+                conn.execute("DELETE FROM analyses_fts WHERE rowid = ?", (rowid,))
+                conn.execute(_INSERT_FTS, (rowid, state.query, " ".join(targets), state.market_intelligence,
+                                           state.competitive_landscape, state.risk_evaluation,
+                                           "\n".join(state.strategic_actions or []), state.executive_briefing))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    
+    def get(self, analysis_id: str) -> Optional[IntelligenceState]:
+        with self._pending_lock:
+            pending = self._pending.get(analysis_id)
+        if pending is not None:
+            return pending.model_copy(deep=True)
+        row = self._conn().execute("SELECT payload FROM analyses WHERE analysis_id = ?", (analysis_id,)).fetchone()
+        return IntelligenceState.model_validate_json(row[0]) if row else None
+    
+    def list(self, limit: int = 20, offset: int = 0, status: Optional[str] = None,
+             target: Optional[str] = None) -> Dict[str, Any]:
+        """Newest first, optionally filtered by status and/or target"""
+        clauses, params = [], []
+        if status:
+            clauses.append("a.status = ?")
+            params.append(status)
+        if target:
+            clauses.append("a.analysis_id IN (SELECT analysis_id FROM analysis_targets WHERE target = ?)")
+            params.append(target.strip().lower())
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        conn = self._conn()
+        total = conn.execute(f"SELECT COUNT(*) FROM analyses a {where}", params).fetchone()[0]
+        rows = conn.execute(f"SELECT {_SUMMARY} FROM analyses a {where} ORDER BY a.created_at DESC LIMIT ? OFFSET ?",
+                            params + [limit, offset]).fetchall()
+        return {"items": [_summary(row) for row in rows], "total": total, "limit": limit, "offset": offset}
+    
+    def search(self, text: str, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+        """Best-ranked matches across query, targets and every section, with a highlighted snippet"""
+        expression = _match_expression(text)
+        if not expression:
+            return {"items": [], "total": 0, "limit": limit, "offset": offset}
+        conn = self._conn()
+        total = conn.execute("SELECT COUNT(*) FROM analyses_fts WHERE analyses_fts MATCH ?",
+                             (expression,)).fetchone()[0]
+        rows = conn.execute(f"""SELECT {_SUMMARY}, snippet(analyses_fts, -1, '[', ']', '...', 16)
+                                FROM analyses_fts JOIN analyses a ON a.rowid = analyses_fts.rowid
+                                WHERE analyses_fts MATCH ? ORDER BY analyses_fts.rank LIMIT ? OFFSET ?""",
+                            (expression, limit, offset)).fetchall()
+        return {"items": [{**_summary(row), "snippet": row[6]} for row in rows], "total": total,
+                "limit": limit, "offset": offset}
+
+
+_store: Optional[ResultStore] = None
+_store_lock = threading.Lock()
+
+
+def get_result_store() -> Optional[ResultStore]:
+    global _store
+    if not settings.RESULT_STORE_ENABLED:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = ResultStore(settings.RESULT_STORE_PATH, settings.RESULT_STORE_BATCH_SIZE,
+                                 settings.RESULT_STORE_FLUSH_INTERVAL)
+        return _store
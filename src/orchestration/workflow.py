@@ -1,135 +1,636 @@
 """Workflow orchestration with LangGraph"""
+import asyncio
+import contextlib
+import hashlib
+import json
 import logging
+import operator
 import time
 import uuid
-from typing import Dict, Any
-from langgraph.graph import StateGraph, END
+from collections import OrderedDict
+from datetime import datetime
+from functools import cached_property
+from typing import TYPE_CHECKING, Annotated, Any, AsyncIterator, Dict, List, Optional, Tuple, TypedDict
 from src.models import IntelligenceState, AnalysisStatus
-from src.agents.market_intelligence import MarketIntelligenceAgent
-from src.agents.competitive_intelligence import CompetitiveIntelligenceAgent
-from src.agents.risk_assessment import RiskAssessmentAgent
-from src.agents.strategic_advisor import StrategicAdvisorAgent
-from src.security.guardrails import ContentGuardrails
+from src.security.guardrails import ContentGuardrails, GuardrailAbort, GuardrailViolation, StreamingGuardrail
+from src.cache.similarity import get_similarity_index
+from src.cache.singleflight import SingleFlight
+from src.orchestration.context_budget import ContextBudget
+from src.orchestration.deadline import Deadline
+from src.orchestration.node_store import create_node_store
+from src.orchestration.result_store import get_result_store
+from src.monitoring.metrics import count_context_tokens, observe_analysis, observe_node, time_guardrail
+from src.monitoring.tracing import Span, current_span, finish_span, span, start_span, use_span
 from src.config import settings
 
+# langgraph, langchain_core, groq and the agents are imported on first use, keeping this module cheap to import
+if TYPE_CHECKING:
+    from langchain_core.runnables import RunnableConfig
+    from langgraph.graph.state import CompiledStateGraph
+    from langgraph.types import StreamWriter
+    from src.agents.base_agent import BaseAgent
+    from src.agents.competitive_intelligence import CompetitiveIntelligenceAgent
+    from src.agents.market_intelligence import MarketIntelligenceAgent
+    from src.agents.risk_assessment import RiskAssessmentAgent
+    from src.agents.strategic_advisor import StrategicAdvisorAgent
+    from src.orchestration.checkpoint import SQLiteCheckpointSaver
+
 logger = logging.getLogger(__name__)
 
+
+def _merge_dicts(left: Dict[str, bool], right: Dict[str, bool]) -> Dict[str, bool]:
+    return {**left, **right}
+
+
+class WorkflowState(TypedDict, total=False):
+    """Graph state; reducers let parallel nodes write their own keys in one step"""
+    analysis_id: str
+    query: str
+    targets: Optional[List[str]]
+    market_intelligence: Optional[str]
+    competitive_landscape: Optional[str]
+    risk_evaluation: Optional[str]
+    strategic_actions: Optional[List[str]]
+    executive_briefing: Optional[str]
+    status: AnalysisStatus
+    processing_duration: float
+    quality_score: float
+    completion_status: Annotated[Dict[str, bool], _merge_dicts]
+    errors: Annotated[List[str], operator.add]
+    context_tokens: Annotated[Dict[str, Dict[str, int]], _merge_dicts]
+    base_analysis_id: Optional[str]
+    base_nodes: Dict[str, Dict[str, str]]
+    node_records: Annotated[Dict[str, Dict[str, str]], _merge_dicts]
+    reused_nodes: Annotated[List[str], operator.add]
+    deadline_at: Optional[float]
+    stream: bool
+
+
+def _discard(chunk: Any):
+    pass
+
+
+SECTIONS = ("market_intelligence", "competitive_landscape", "risk_evaluation", "executive_briefing")
+
+
 class IntelligenceWorkflow:
     def __init__(self):
-        self.market_agent = MarketIntelligenceAgent()
-        self.competitive_agent = CompetitiveIntelligenceAgent()
-        self.risk_agent = RiskAssessmentAgent()
-        self.strategic_agent = StrategicAdvisorAgent()
+        # Per instance: workflows with different agents or settings must not share each other's runs
+        self._inflight = SingleFlight("analyses")
         if settings.ENABLE_GUARDRAILS:
-            self.guardrails = ContentGuardrails(strict_mode=True)
-        self.workflow = self._build_workflow()
+            self.guardrails = ContentGuardrails(strict_mode=True, capacity=settings.GUARDRAIL_VIOLATION_RETENTION,
+                                                spill_path=settings.GUARDRAIL_VIOLATION_LOG)
+        self.context_budget = ContextBudget()
+        self.node_store = create_node_store()
+        self._completed: "OrderedDict[str, Tuple[float, IntelligenceState]]" = OrderedDict()
         logger.info("Workflow initialized")
     
-    def _build_workflow(self) -> StateGraph:
-        workflow = StateGraph(dict)
-        workflow.add_node("market_analysis", self._market_node)
-        workflow.add_node("competitive_analysis", self._competitive_node)
-        workflow.add_node("risk_assessment", self._risk_node)
-        workflow.add_node("strategic_planning", self._strategic_node)
-        workflow.set_entry_point("market_analysis")
-        workflow.add_edge("market_analysis", "competitive_analysis")
-        workflow.add_edge("competitive_analysis", "risk_assessment")
-        workflow.add_edge("risk_assessment", "strategic_planning")
+    @cached_property
+    def market_agent(self) -> "MarketIntelligenceAgent":
+        from src.agents.market_intelligence import MarketIntelligenceAgent
+        return MarketIntelligenceAgent()
+    
+    @cached_property
+    def competitive_agent(self) -> "CompetitiveIntelligenceAgent":
+        from src.agents.competitive_intelligence import CompetitiveIntelligenceAgent
+        return CompetitiveIntelligenceAgent()
+    
+    @cached_property
+    def risk_agent(self) -> "RiskAssessmentAgent":
+        from src.agents.risk_assessment import RiskAssessmentAgent
+        return RiskAssessmentAgent()
+    
+    @cached_property
+    def strategic_agent(self) -> "StrategicAdvisorAgent":
+        from src.agents.strategic_advisor import StrategicAdvisorAgent
+        return StrategicAdvisorAgent()
+    
+    @cached_property
+    def checkpointer(self) -> Optional["SQLiteCheckpointSaver"]:
+        from src.orchestration.checkpoint import create_checkpointer
+        return create_checkpointer()
+    
+    @cached_property
+    def workflow(self) -> "CompiledStateGraph":
+        """The compiled graph, built on first use"""
+        return self._build_workflow()
+    
+    def close(self):
+        """Release the guardrails audit log; call once the workflow is no longer used"""
+        guardrails = getattr(self, "guardrails", None)
+        if guardrails is not None:
+            guardrails.close()
+    
+    def _build_workflow(self) -> "CompiledStateGraph":
+        from langgraph.graph import StateGraph, START, END
+        workflow = StateGraph(WorkflowState)
+        workflow.add_node("market_analysis", self._timed("market_analysis", self._market_node))
+        workflow.add_node("competitive_analysis", self._timed("competitive_analysis", self._competitive_node))
+        workflow.add_node("risk_assessment", self._timed("risk_assessment", self._risk_node))
+        workflow.add_node("strategic_planning", self._timed("strategic_planning", self._strategic_node))
+        if settings.WORKFLOW_MODE == "parallel":
+            # Fan out the three independent agents; strategic planning joins on all of them
+            for node in ("market_analysis", "competitive_analysis", "risk_assessment"):
+                workflow.add_edge(START, node)
+            workflow.add_edge(["market_analysis", "competitive_analysis", "risk_assessment"], "strategic_planning")
+        else:
+            workflow.set_entry_point("market_analysis")
+            workflow.add_edge("market_analysis", "competitive_analysis")
+            workflow.add_edge("competitive_analysis", "risk_assessment")
+            workflow.add_edge("risk_assessment", "strategic_planning")
         workflow.add_edge("strategic_planning", END)
-        return workflow.compile()
+        logger.info(f"Workflow mode: {settings.WORKFLOW_MODE}")
+        return workflow.compile(checkpointer=self.checkpointer)
+    
+    def _timed(self, name: str, node):
+        # LangGraph reads the node's type hints to decide what to inject, so this must be a real type
+        from langchain_core.runnables import RunnableConfig
+        
+        async def run(state: Dict[str, Any], config: RunnableConfig) -> Dict[str, Any]:
+            # A resumed analysis gets a fresh deadline through the run config; its checkpoint keeps the old one
+            configurable = config.get("configurable", {})
+            deadline_at = configurable.get("deadline_at")
+            writer = configurable.get("stream_writer") or _discard
+            if deadline_at is not None:
+                state = {**state, "deadline_at": deadline_at}
+            start = time.perf_counter()
+            with span(f"node.{name}") as node_span:
+                update = await node(state, writer)
+                outcome = "ok" if all(update.get("completion_status", {}).values()) else "failed"
+                node_span.set(outcome=outcome)
+            observe_node(name, outcome, time.perf_counter() - start)
+            return update
+        return run
+    
+    def _skip_if_out_of_budget(self, state: Dict[str, Any], key: str, label: str) -> Optional[Dict[str, Any]]:
+        deadline = Deadline.from_state(state.get('deadline_at'))
+        if deadline is not None and deadline.remaining() < settings.NODE_MIN_BUDGET:
+            logger.warning(f"{label} skipped: {deadline.remaining():.1f}s left of analysis budget")
+            return {"completion_status": {key: False}, "errors": [f"{label}: skipped, analysis deadline reached"]}
+        return None
+    
+    async def _run_agent(self, agent: "BaseAgent", section: str, state: Dict[str, Any], writer: "StreamWriter",
+                         **kwargs) -> Tuple[str, Dict[str, Any]]:
+        """The section plus its provenance update; the hash covers every input the agent would see"""
+        input_hash = agent._cache_key(state['query'], **kwargs)
+        return await self._reuse_or_run(section, input_hash, state, writer,
+                                        lambda: self._generate(agent, section, state, writer, **kwargs))
+    
+    async def _reuse_or_run(self, section: str, input_hash: str, state: Dict[str, Any], writer: "StreamWriter",
+                            run) -> Tuple[str, Dict[str, Any]]:
+        """Take the base analysis's output when this node's inputs are unchanged, otherwise run it"""
+        prior = (state.get('base_nodes') or {}).get(section)
+        if prior is not None and prior['input_hash'] == input_hash:
+            result = prior['output']
+            if settings.ENABLE_GUARDRAILS:
+                self._screen(section, self.guardrails.scan(result))
+            if state.get('stream'):
+                writer({"section": section, "text": result})
+            provenance = {"reused_nodes": [section]}
+        else:
+            result = await run()
+            provenance = {}
+        provenance["node_records"] = {section: {"input_hash": input_hash, "output": result}}
+        return result, provenance
+    
+    async def _generate(self, agent: "BaseAgent", section: str, state: Dict[str, Any], writer: "StreamWriter",
+                        **kwargs) -> str:
+        """Run an agent, forwarding tokens to the graph's custom stream when the caller is streaming.
+        
+        The section is screened as it is produced when streaming, and in full on completion either way.
+        """
+        deadline = Deadline.from_state(state.get('deadline_at'))
+        if not state.get('stream'):
+            result = await agent.aexecute(query=state['query'], deadline=deadline, **kwargs)
+            if settings.ENABLE_GUARDRAILS:
+                self._screen(section, self.guardrails.scan(result))
+            return result
+        parts = []
+        validator = StreamingGuardrail(self.guardrails) if settings.ENABLE_GUARDRAILS else None
+        # aclosing ends the upstream Groq stream immediately if screening aborts mid-section
+        async with contextlib.aclosing(agent.astream(query=state['query'], deadline=deadline, **kwargs)) as stream:
+            async for delta in stream:
+                parts.append(delta)
+                writer({"section": section, "text": delta})
+                if validator is not None:
+                    self._screen(section, validator.feed(delta))
+        result = "".join(parts)
+        if validator is not None:
+            self._screen(section, validator.finish())
+            # Over-long lines are scanned early and trimmed, so the whole section is checked once more
+            self._screen(section, self.guardrails.scan(result))
+        return result
     
-    def _market_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    def _screen(self, section: str, violations: List[GuardrailViolation]):
+        """Raising out of a node makes LangGraph cancel the rest of the step and skip every later node"""
+        high = [v for v in violations if v.severity == "high"]
+        if high and settings.GUARDRAILS_EARLY_ABORT:
+            raise GuardrailAbort(section, high)
+    
+    async def _market_node(self, state: Dict[str, Any], writer: "StreamWriter") -> Dict[str, Any]:
+        skipped = self._skip_if_out_of_budget(state, "market", "Market")
+        if skipped:
+            return skipped
         try:
             logger.info(f"Market analysis: {state['query']}")
-            result = self.market_agent.execute(query=state['query'], targets=state.get('targets'))
-            state['market_intelligence'] = result
-            state['completion_status']['market'] = True
+            result, provenance = await self._run_agent(self.market_agent, "market_intelligence", state, writer)
+            return {"market_intelligence": result, "completion_status": {"market": True}, **provenance}
+        except GuardrailAbort:
+            raise
         except Exception as e:
             logger.error(f"Market failed: {e}")
-            state['errors'].append(f"Market: {str(e)}")
-            state['completion_status']['market'] = False
-        return state
+            return {"completion_status": {"market": False}, "errors": [f"Market: {str(e)}"]}
     
-    def _competitive_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    async def _competitive_node(self, state: Dict[str, Any], writer: "StreamWriter") -> Dict[str, Any]:
+        skipped = self._skip_if_out_of_budget(state, "competitive", "Competitive")
+        if skipped:
+            return skipped
         try:
-            result = self.competitive_agent.execute(
-                query=state['query'], context=state.get('market_intelligence'), targets=state.get('targets'))
-            state['competitive_landscape'] = result
-            state['completion_status']['competitive'] = True
+            if settings.COMPETITIVE_FANOUT and state.get('targets'):
+                result, provenance = await self._competitive_fanout(state, writer)
+                return {"competitive_landscape": result, "completion_status": {"competitive": True}, **provenance}
+            fitted, context_tokens = self._fit_context(
+                "competitive", self.competitive_agent, {"market": state.get('market_intelligence')})
+            result, provenance = await self._run_agent(self.competitive_agent, "competitive_landscape", state, writer,
+                                                       context=fitted["market"], targets=state.get('targets'))
+            return {"competitive_landscape": result, "completion_status": {"competitive": True},
+                    "context_tokens": context_tokens, **provenance}
+        except GuardrailAbort:
+            raise
         except Exception as e:
             logger.error(f"Competitive failed: {e}")
-            state['errors'].append(f"Competitive: {str(e)}")
-            state['completion_status']['competitive'] = False
-        return state
+            return {"completion_status": {"competitive": False}, "errors": [f"Competitive: {str(e)}"]}
     
-    def _risk_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    async def _risk_node(self, state: Dict[str, Any], writer: "StreamWriter") -> Dict[str, Any]:
+        skipped = self._skip_if_out_of_budget(state, "risk", "Risk")
+        if skipped:
+            return skipped
         try:
-            context = f"Market: {state.get('market_intelligence', 'N/A')}\nCompetitive: {state.get('competitive_landscape', 'N/A')}"
-            result = self.risk_agent.execute(query=state['query'], context=context)
-            state['risk_evaluation'] = result
-            state['completion_status']['risk'] = True
+            fitted, context_tokens = self._fit_context("risk", self.risk_agent, {
+                "market": state.get('market_intelligence'), "competitive": state.get('competitive_landscape')})
+            result, provenance = await self._run_agent(self.risk_agent, "risk_evaluation", state, writer,
+                                                       context=self._risk_context(fitted))
+            return {"risk_evaluation": result, "completion_status": {"risk": True}, "context_tokens": context_tokens,
+                    **provenance}
+        except GuardrailAbort:
+            raise
         except Exception as e:
             logger.error(f"Risk failed: {e}")
-            state['errors'].append(f"Risk: {str(e)}")
-            state['completion_status']['risk'] = False
-        return state
+            return {"completion_status": {"risk": False}, "errors": [f"Risk: {str(e)}"]}
+    
+    async def _competitive_fanout(self, state: Dict[str, Any], writer: "StreamWriter") -> Tuple[str, Dict[str, Any]]:
+        """Per-target profiles run concurrently, so the section arrives whole rather than token by token"""
+        async def run() -> str:
+            result = await self.competitive_agent.aexecute_targets(
+                state['query'], state['targets'], deadline=Deadline.from_state(state.get('deadline_at')))
+            if settings.ENABLE_GUARDRAILS:
+                self._screen("competitive_landscape", self.guardrails.scan(result))
+            if state.get('stream'):
+                writer({"section": "competitive_landscape", "text": result})
+            return result
+        
+        input_hash = self.competitive_agent._cache_key(state['query'], targets=state['targets'], fanout=True)
+        return await self._reuse_or_run("competitive_landscape", input_hash, state, writer, run)
+    
+    def _risk_context(self, sections: Dict[str, Optional[str]]) -> Optional[str]:
+        if sections.get('market') is None and sections.get('competitive') is None:
+            return None
+        return f"Market: {sections.get('market') or 'N/A'}\nCompetitive: {sections.get('competitive') or 'N/A'}"
     
-    def _strategic_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
+    def _fit_context(self, key: str, agent: "BaseAgent",
+                     sections: Dict[str, Optional[str]]) -> Tuple[Dict[str, Optional[str]], Dict[str, Dict[str, int]]]:
+        """Compress upstream sections to the agent's context budget and account for the tokens saved"""
+        fitted, usage = self.context_budget.fit(agent.agent_name, sections)
+        if usage.original_tokens:
+            count_context_tokens(agent.agent_name, usage.original_tokens, usage.sent_tokens)
+            node_span = current_span()
+            if node_span is not None:
+                node_span.set(context_original=usage.original_tokens, context_sent=usage.sent_tokens)
+            if usage.saved_tokens:
+                logger.info(f"{agent.agent_name} context: {usage.original_tokens} -> {usage.sent_tokens} tokens")
+        return fitted, {key: usage.to_dict()}
+    
+    async def _strategic_node(self, state: Dict[str, Any], writer: "StreamWriter") -> Dict[str, Any]:
+        skipped = self._skip_if_out_of_budget(state, "strategic", "Strategic")
+        if skipped:
+            return skipped
         try:
-            result, recommendations = self.strategic_agent._analyze(
-                query=state['query'], market_intelligence=state.get('market_intelligence'),
-                competitive_landscape=state.get('competitive_landscape'), risk_evaluation=state.get('risk_evaluation'))
-            state['executive_briefing'] = result
-            state['strategic_actions'] = recommendations
-            state['completion_status']['strategic'] = True
+            fitted, context_tokens = self._fit_context("strategic", self.strategic_agent, {
+                section: state.get(section) for section in ("market_intelligence", "competitive_landscape", "risk_evaluation")})
+            result, provenance = await self._run_agent(self.strategic_agent, "executive_briefing", state, writer,
+                                                       **fitted)
+            return {"executive_briefing": result, "strategic_actions": self.strategic_agent._parse_recommendations(result),
+                    "completion_status": {"strategic": True}, "context_tokens": context_tokens, **provenance}
+        except GuardrailAbort:
+            raise
         except Exception as e:
             logger.error(f"Strategic failed: {e}")
-            state['errors'].append(f"Strategic: {str(e)}")
-            state['completion_status']['strategic'] = False
-        return state
+            return {"completion_status": {"strategic": False}, "errors": [f"Strategic: {str(e)}"]}
+    
+    async def execute_analysis(self, query: str, targets: list[str] | None = None,
+                               base_analysis_id: Optional[str] = None) -> IntelligenceState:
+        """Run an analysis; with `base_analysis_id`, nodes whose inputs are unchanged reuse that analysis's output"""
+        if base_analysis_id is None:
+            similar = self._get_similar(query, targets)
+            if similar is not None:
+                self._persist(similar)
+                return similar
+        # Identical concurrent requests share one run; each caller gets its own copy of the result
+        key = hashlib.sha256(json.dumps(
+            {"query": query, "targets": targets, "mode": settings.WORKFLOW_MODE, "base": base_analysis_id},
+            sort_keys=True).encode()).hexdigest()
+        result = await self._inflight.do(key, lambda: self._run_analysis(query, targets, base_analysis_id))
+        return result.model_copy(deep=True)
+    
+    async def _run_analysis(self, query: str, targets: list[str] | None = None, base_analysis_id: Optional[str] = None,
+                            resume_state: Optional[Dict[str, Any]] = None) -> IntelligenceState:
+        start_time = time.time()
+        initial_state = resume_state or self._initial_state(query, targets, base_analysis_id=base_analysis_id)
+        if resume_state is None:
+            self._begin_run(initial_state)
+        root = start_span("analysis", trace_id=initial_state['analysis_id'], mode=settings.WORKFLOW_MODE,
+                          resumed=resume_state is not None)
+        try:
+            final_state = initial_state
+            async with self._lease(initial_state['analysis_id']):
+                async for mode, chunk in self._stream_graph(initial_state, root, resume=resume_state is not None):
+                    if mode == "values":
+                        final_state = chunk
+            with use_span(root):
+                result = self._finalize(final_state, start_time)
+        except GuardrailAbort as e:
+            result = self._aborted(final_state, start_time, e)
+        except Exception as e:
+            result = self._failed(initial_state, start_time, e)
+        root.set(status=result.status.value)
+        finish_span(root)
+        if base_analysis_id is None:
+            self._remember(result)
+        self._end_run(result)
+        self._persist(result)
+        return result
+    
+    async def resume_analysis(self, analysis_id: str) -> Optional[IntelligenceState]:
+        """Continue a checkpointed analysis from its last completed node; None if nothing was checkpointed
+        or the run is still live under another owner's lease"""
+        run = self.checkpointer.get_run(analysis_id) if self.checkpointer is not None else None
+        if run is None:
+            return None
+        snapshot = await self.workflow.aget_state(self._graph_config({"analysis_id": analysis_id}))
+        if not snapshot.values:
+            return None
+        if not snapshot.next and run['status'] == "failed":
+            # Every node already ran; rerun with this analysis as the base so only failed sections call the LLM
+            return await self.execute_analysis(run['query'], run['targets'], base_analysis_id=analysis_id)
+        logger.info(f"Resuming analysis {analysis_id} before {', '.join(snapshot.next) or 'finalize'}")
+        state = {**snapshot.values, "stream": False, "deadline_at": Deadline.after(settings.ANALYSIS_TIMEOUT).expires_at}
+
+        async def resume() -> Optional[IntelligenceState]:
+            if not self.checkpointer.claim(analysis_id):
+                return None
+            return await self._run_analysis(run['query'], run['targets'], run['base_analysis_id'], resume_state=state)
+        result = await self._inflight.do(f"resume:{analysis_id}", resume)
+        return result.model_copy(deep=True) if result is not None else None
+    
+    async def recover_inflight(self) -> List[IntelligenceState]:
+        """Resume analyses left running by a process that stopped renewing their lease; call once at startup"""
+        if self.checkpointer is None:
+            return []
+        self.checkpointer.prune(settings.CHECKPOINT_RETENTION)
+        results = []
+        for run in self.checkpointer.inflight():
+            try:
+                result = await self.resume_analysis(run['analysis_id'])
+            except Exception as e:
+                logger.error(f"Recovering analysis {run['analysis_id']} failed: {e}")
+                continue
+            if result is not None:
+                results.append(result)
+        if results:
+            logger.info(f"Recovered {len(results)} interrupted analyses")
+        return results
+    
+    def _begin_run(self, state: Dict[str, Any]):
+        if self.checkpointer is not None:
+            self.checkpointer.begin_run(state['analysis_id'], state['query'], state['targets'],
+                                        state['base_analysis_id'])
+    
+    def _end_run(self, result: IntelligenceState):
+        if self.checkpointer is not None:
+            # Keep the checkpoint while any section is missing, so resuming can fill it in
+            complete = result.status == AnalysisStatus.COMPLETED and all(result.completion_status.values())
+            self.checkpointer.end_run(result.analysis_id, "completed" if complete else "failed")
+    
+    @contextlib.asynccontextmanager
+    async def _lease(self, analysis_id: str):
+        """Renew the run's lease while its graph executes; a cancelled run is marked so it is not recovered"""
+        if self.checkpointer is None:
+            yield
+            return
+        heartbeat = asyncio.create_task(self._heartbeat(analysis_id))
+        try:
+            yield
+        except (asyncio.CancelledError, GeneratorExit):
+            self.checkpointer.end_run(analysis_id, "cancelled")
+            raise
+        finally:
+            heartbeat.cancel()
+    
+    async def _heartbeat(self, analysis_id: str):
+        while True:
+            await asyncio.sleep(settings.CHECKPOINT_LEASE / 3)
+            if not await asyncio.to_thread(self.checkpointer.renew, analysis_id):
+                logger.warning(f"Lost the lease on analysis {analysis_id} to another process")
+                return
+    
+    @staticmethod
+    def _graph_config(state: Dict[str, Any]) -> "RunnableConfig":
+        return {"configurable": {"thread_id": state['analysis_id'], "deadline_at": state.get('deadline_at')}}
+    
+    @staticmethod
+    def _persist(result: IntelligenceState):
+        store = get_result_store()
+        if store is not None:
+            store.put(result.model_copy(deep=True))
+    
+    @staticmethod
+    def _similarity_namespace(targets: list[str] | None) -> str:
+        return "analysis:" + json.dumps([sorted(t.strip().lower() for t in targets or []), settings.WORKFLOW_MODE])
+    
+    def _remember(self, result: IntelligenceState):
+        if not settings.SIMILARITY_CACHE_ENABLED or result.status != AnalysisStatus.COMPLETED:
+            return
+        self._completed[result.analysis_id] = (time.time(), result.model_copy(deep=True))
+        while len(self._completed) > settings.CACHE_MAX_SIZE:
+            self._completed.popitem(last=False)
+        get_similarity_index().add(self._similarity_namespace(result.targets), result.query, result.analysis_id)
+    
+    def _get_similar(self, query: str, targets: list[str] | None) -> Optional[IntelligenceState]:
+        """A completed analysis of a reworded query with the same targets, re-issued under a new id"""
+        if not settings.SIMILARITY_CACHE_ENABLED:
+            return None
+        match = get_similarity_index().lookup(self._similarity_namespace(targets), query)
+        entry = self._completed.get(match.value) if match else None
+        if entry is None or time.time() - entry[0] > settings.CACHE_TTL:
+            return None
+        logger.info(f"Serving '{query}' from analysis {match.value} ('{match.query}', score {match.score:.2f})")
+        return entry[1].model_copy(deep=True, update={
+            "analysis_id": f"ana_{uuid.uuid4().hex[:12]}", "query": query, "targets": targets, "processing_duration": 0.0,
+            "created_at": datetime.utcnow(),
+            "similar_match": {"analysis_id": match.value, "query": match.query, "score": round(match.score, 4)}})
     
-    async def execute_analysis(self, query: str, targets: list[str] | None = None) -> IntelligenceState:
-        analysis_id = f"ana_{uuid.uuid4().hex[:12]}"
+    async def astream_analysis(self, query: str, targets: list[str] | None = None,
+                               base_analysis_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Yield token deltas and completed sections as agents produce them, then the final result"""
         start_time = time.time()
-        initial_state = {
-            "analysis_id": analysis_id, "query": query, "targets": targets,
+        initial_state = self._initial_state(query, targets, stream=True, base_analysis_id=base_analysis_id)
+        self._begin_run(initial_state)
+        root = start_span("analysis", trace_id=initial_state['analysis_id'], mode=settings.WORKFLOW_MODE, stream=True)
+        final_state = initial_state
+        try:
+            async with self._lease(initial_state['analysis_id']):
+                async for mode, chunk in self._stream_graph(initial_state, root):
+                    if mode == "custom":
+                        yield {"type": "delta", **chunk}
+                        continue
+                    for section in SECTIONS:
+                        if chunk.get(section) and not final_state.get(section):
+                            yield {"type": "section", "section": section, "content": chunk[section]}
+                    final_state = chunk
+            with use_span(root):
+                result = self._finalize(final_state, start_time)
+        except GuardrailAbort as e:
+            result = self._aborted(final_state, start_time, e)
+        except Exception as e:
+            result = self._failed(initial_state, start_time, e)
+        root.set(status=result.status.value)
+        finish_span(root)
+        self._end_run(result)
+        self._persist(result)
+        yield {"type": "result", "result": result}
+    
+    def _initial_state(self, query: str, targets: list[str] | None, stream: bool = False,
+                       base_analysis_id: Optional[str] = None) -> Dict[str, Any]:
+        base_nodes = self._base_nodes(base_analysis_id) if base_analysis_id else None
+        errors = []
+        if base_analysis_id and base_nodes is None:
+            logger.warning(f"Base analysis {base_analysis_id} not found; running every node")
+            errors.append(f"Base analysis {base_analysis_id} not found; no nodes reused")
+        return {
+            "analysis_id": f"ana_{uuid.uuid4().hex[:12]}", "query": query, "targets": targets,
             "market_intelligence": None, "competitive_landscape": None, "risk_evaluation": None,
             "strategic_actions": None, "executive_briefing": None, "status": AnalysisStatus.PROCESSING,
             "processing_duration": 0.0, "quality_score": 0.0,
             "completion_status": {"market": False, "competitive": False, "risk": False, "strategic": False},
-            "errors": []
+            "errors": errors, "context_tokens": {}, "base_analysis_id": base_analysis_id,
+            "base_nodes": base_nodes or {}, "node_records": {}, "reused_nodes": [],
+            "deadline_at": Deadline.after(settings.ANALYSIS_TIMEOUT).expires_at, "stream": stream
         }
+    
+    def _base_nodes(self, base_analysis_id: str) -> Optional[Dict[str, Dict[str, str]]]:
+        base_nodes = self.node_store.get(base_analysis_id)
+        if base_nodes is None and self.checkpointer is not None:
+            # A failed analysis keeps its checkpoint, which outlives an in-memory node store
+            saved = self.checkpointer.get_tuple({"configurable": {"thread_id": base_analysis_id}})
+            base_nodes = saved.checkpoint["channel_values"].get("node_records") if saved else None
+        return base_nodes
+    
+    async def _stream_graph(self, initial_state: Dict[str, Any], root: Span,
+                            resume: bool = False) -> AsyncIterator[Tuple[str, Any]]:
+        """Stream (mode, chunk) pairs from the graph; on deadline overrun emit the last state as a partial result.
+        
+        With `resume`, the graph continues from the analysis's last checkpoint instead of starting over.
+        """
+        deadline = Deadline(initial_state['deadline_at'])
+        graph = self.workflow  # built here, so a construction error reaches the caller instead of the producer
+        queue: asyncio.Queue = asyncio.Queue()
+        config = self._graph_config(initial_state)
+        # Nodes put token deltas straight on the queue: LangGraph's "custom" stream mode leaves a waiter
+        # task pending forever when a deadline cancels the graph mid-step
+        config["configurable"]["stream_writer"] = lambda chunk: queue.put_nowait(("custom", chunk))
         
+        async def produce():
+            try:
+                with use_span(root), span("graph"):
+                    stream = graph.astream(None if resume else initial_state, config, stream_mode=["values"])
+                    try:
+                        async for item in stream:
+                            queue.put_nowait(item)
+                    finally:
+                        await stream.aclose()
+            finally:
+                queue.put_nowait(None)
+        
+        # The graph runs in its own task so a deadline cancels it cleanly without touching the consumer
+        producer = asyncio.create_task(produce())
+        latest = initial_state
         try:
-            final_state = self.workflow.invoke(initial_state)
-            duration = time.time() - start_time
-            quality_score = self._calculate_quality(final_state)
-            final_state['processing_duration'] = duration
-            final_state['quality_score'] = quality_score
-            final_state['status'] = AnalysisStatus.COMPLETED if quality_score >= 0.7 else AnalysisStatus.FAILED
-            
-            if settings.ENABLE_GUARDRAILS and final_state['status'] == AnalysisStatus.COMPLETED:
-                is_safe = self._validate_with_guardrails(final_state)
-                if not is_safe:
-                    final_state['status'] = AnalysisStatus.FAILED
-                    final_state['errors'].append("Content safety violations")
-            
-            return IntelligenceState(**final_state)
-        except Exception as e:
-            duration = time.time() - start_time
-            initial_state['status'] = AnalysisStatus.FAILED
-            initial_state['processing_duration'] = duration
-            initial_state['errors'].append(f"Workflow error: {str(e)}")
-            return IntelligenceState(**initial_state)
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=deadline.remaining())
+                except asyncio.TimeoutError:
+                    logger.warning(f"Analysis {initial_state['analysis_id']} hit its {settings.ANALYSIS_TIMEOUT}s deadline")
+                    yield "values", {**latest, "errors": latest['errors'] + ["Analysis deadline exceeded; returning partial result"]}
+                    break
+                if item is None:
+                    await producer
+                    break
+                mode, chunk = item
+                if mode == "values":
+                    latest = chunk
+                yield mode, chunk
+        finally:
+            if not producer.done():
+                producer.cancel()
+                await asyncio.gather(producer, return_exceptions=True)
+    
+    def _finalize(self, final_state: Dict[str, Any], start_time: float) -> IntelligenceState:
+        duration = time.time() - start_time
+        quality_score = self._calculate_quality(final_state)
+        final_state['processing_duration'] = duration
+        final_state['quality_score'] = quality_score
+        final_state['status'] = AnalysisStatus.COMPLETED if quality_score >= 0.7 else AnalysisStatus.FAILED
+        
+        if settings.ENABLE_GUARDRAILS and final_state['status'] == AnalysisStatus.COMPLETED:
+            is_safe = self._validate_with_guardrails(final_state)
+            if not is_safe:
+                final_state['status'] = AnalysisStatus.FAILED
+                final_state['errors'].append("Content safety violations")
+        
+        observe_analysis(final_state['status'].value, duration)
+        self._save_nodes(final_state)
+        return IntelligenceState(**final_state)
+    
+    def _save_nodes(self, final_state: Dict[str, Any]):
+        if final_state.get('node_records'):
+            self.node_store.put(final_state['analysis_id'], final_state['node_records'])
+    
+    def _failed(self, initial_state: Dict[str, Any], start_time: float, error: Exception) -> IntelligenceState:
+        initial_state['status'] = AnalysisStatus.FAILED
+        initial_state['processing_duration'] = time.time() - start_time
+        initial_state['errors'].append(f"Workflow error: {str(error)}")
+        observe_analysis(AnalysisStatus.FAILED.value, initial_state['processing_duration'])
+        return IntelligenceState(**initial_state)
+    
+    def _aborted(self, final_state: Dict[str, Any], start_time: float, abort: GuardrailAbort) -> IntelligenceState:
+        """Whatever finished before the unsafe section, marked failed; later sections were never generated"""
+        logger.warning(f"Analysis {final_state['analysis_id']} aborted: {abort}")
+        self.guardrails.record(abort.violations, abort.section)
+        final_state = {**final_state, "status": AnalysisStatus.FAILED,
+                       "processing_duration": time.time() - start_time,
+                       "errors": final_state['errors'] + [f"{abort}; remaining sections cancelled"]}
+        observe_analysis(AnalysisStatus.FAILED.value, final_state['processing_duration'])
+        self._save_nodes(final_state)
+        return IntelligenceState(**final_state)
     
     def _calculate_quality(self, state: Dict[str, Any]) -> float:
         score = 0.0
         completion_rate = sum(state['completion_status'].values()) / len(state['completion_status'])
         score += completion_rate * 0.6
-        recommendations = state.get('strategic_actions', [])
+        recommendations = state.get('strategic_actions') or []
         if len(recommendations) >= 6:
             score += 0.125
-        if len(state.get('executive_briefing', '')) > 300:
+        if len(state.get('executive_briefing') or '') > 300:
             score += 0.125
         if 0 < state['processing_duration'] <= 60:
             score += 0.15
@@ -146,7 +647,8 @@ class IntelligenceWorkflow:
             ("executive_briefing", state.get("executive_briefing"))
         ]:
             if content:
-                is_safe, violations = self.guardrails.validate_content(content, field)
+                with time_guardrail(field):
+                    is_safe, violations = self.guardrails.validate_content(content, field)
                 if not is_safe:
                     all_safe = False
         return all_safe
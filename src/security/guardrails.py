@@ -1,8 +1,9 @@
 """Content safety guardrails"""
-import re
 import logging
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from dataclasses import dataclass
+from src.security.pattern_scanner import PatternScanner
+from src.security.violation_store import ViolationStore
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +14,17 @@ class GuardrailViolation:
     severity: str
     description: str
     matched_pattern: str
+    span: Optional[Tuple[int, int]] = None
+
+
+class GuardrailAbort(Exception):
+    """A section tripped a high-severity rule; the rest of the analysis is not worth generating"""
+    
+    def __init__(self, section: str, violations: List[GuardrailViolation]):
+        self.section = section
+        self.violations = violations
+        categories = ", ".join(sorted({v.category for v in violations}))
+        super().__init__(f"Content safety violation in {section} ({categories})")
 
 
 class ContentGuardrails:
@@ -37,21 +49,43 @@ class ContentGuardrails:
         r'\b(guaranteed|certain)\b.*\b(profit|return)\b',
     ]
     
-    def __init__(self, strict_mode: bool = True):
+    # (pattern list attribute, category, severity), scanned in this order
+    RULE_SETS = [
+        ("TOXIC_PATTERNS", "Toxic Language", "high"),
+        ("BANNED_TOPICS", "Banned Topic", "high"),
+        ("BIAS_PATTERNS", "Potential Bias", "medium"),
+        ("FINANCIAL_ADVICE", "Financial Advice", "high"),
+    ]
+    
+    _scanners: dict = {}
+    
+    def __init__(self, strict_mode: bool = True, capacity: int = 1000, spill_path: Optional[str] = None):
         self.strict_mode = strict_mode
-        self.violation_log: List[GuardrailViolation] = []
+        self.store = ViolationStore(capacity=capacity, spill_path=spill_path)
+        self.scanner = self._scanner_for(type(self))
+    
+    def close(self):
+        """Close the violation audit log, if one was opened"""
+        self.store.close()
+    
+    def __enter__(self) -> "ContentGuardrails":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    @classmethod
+    def _scanner_for(cls, guardrails_cls) -> PatternScanner:
+        """Compile each rule set once per class instead of once per call"""
+        rules = tuple((pattern, category, severity) for attr, category, severity in guardrails_cls.RULE_SETS
+                      for pattern in getattr(guardrails_cls, attr))
+        if rules not in cls._scanners:
+            cls._scanners[rules] = PatternScanner(rules)
+        return cls._scanners[rules]
     
     def validate_content(self, content: str, content_type: str = "analysis") -> Tuple[bool, List[GuardrailViolation]]:
-        violations = []
-        
-        violations.extend(self._check_patterns(content, self.TOXIC_PATTERNS, "Toxic Language", "high"))
-        violations.extend(self._check_patterns(content, self.BANNED_TOPICS, "Banned Topic", "high"))
-        violations.extend(self._check_patterns(content, self.BIAS_PATTERNS, "Potential Bias", "medium"))
-        violations.extend(self._check_patterns(content, self.FINANCIAL_ADVICE, "Financial Advice", "high"))
-        
-        for v in violations:
-            self.violation_log.append(v)
-            logger.warning(f"Guardrail violation: {v.category} ({v.severity})")
+        violations = self.scan(content)
+        self.record(violations, content_type)
         
         if self.strict_mode:
             is_safe = not any(v.severity in ["high", "medium"] for v in violations)
@@ -60,21 +94,78 @@ class ContentGuardrails:
         
         return is_safe, violations
     
-    def _check_patterns(self, content: str, patterns: List[str], category: str, severity: str) -> List[GuardrailViolation]:
-        violations = []
-        for pattern in patterns:
-            if re.search(pattern, content.lower(), re.IGNORECASE):
-                violations.append(GuardrailViolation(
-                    category=category,
-                    severity=severity,
-                    description=f"Content matches {category.lower()} pattern",
-                    matched_pattern=pattern
-                ))
-        return violations
-    
-    def get_violation_summary(self) -> dict:
-        return {
-            "total": len(self.violation_log),
-            "high": sum(1 for v in self.violation_log if v.severity == "high"),
-            "medium": sum(1 for v in self.violation_log if v.severity == "medium"),
-        }
+    @property
+    def violation_log(self) -> List[GuardrailViolation]:
+        """Most recent violations (bounded by `capacity`)"""
+        return self.store.recent()
+    
+    def record(self, violations: List[GuardrailViolation], content_type: str = "analysis"):
+        for v in violations:
+            self.store.add(v, content_type)
+            logger.warning(f"Guardrail violation: {v.category} ({v.severity})")
+    
+    def scan(self, content: str) -> List[GuardrailViolation]:
+        """Every matching rule across all categories in one pass, with the span of its first match"""
+        return [GuardrailViolation(
+                    category=match.rule.category,
+                    severity=match.rule.severity,
+                    description=f"Content matches {match.rule.category.lower()} pattern",
+                    matched_pattern=match.rule.pattern,
+                    span=match.span
+                ) for match in self.scanner.scan(content)]
+    
+    def get_violation_summary(self, window_seconds: Optional[float] = None) -> dict:
+        """Lifetime counts, or counts over the last `window_seconds` when given"""
+        if window_seconds is not None:
+            return self.store.window(window_seconds)
+        return self.store.summary()
+
+
+class StreamingGuardrail:
+    """Scans a section incrementally as tokens arrive.
+    
+    Rules are line-local (`.` never crosses a newline), so complete lines are scanned once and only the
+    unfinished line is carried over. A line longer than `max_carry` is scanned early and trimmed to an
+    overlap window so the carry stays bounded; the full-section check at node completion still applies.
+    """
+    
+    def __init__(self, guardrails: ContentGuardrails, max_carry: int = 4096):
+        self.guardrails = guardrails
+        self.max_carry = max_carry
+        self.violations: List[GuardrailViolation] = []
+        self._pending = ""
+        self._offset = 0
+        self._seen = set()
+    
+    def feed(self, delta: str) -> List[GuardrailViolation]:
+        """New violations found in text completed by this delta"""
+        self._pending += delta
+        cut = self._pending.rfind("\n") + 1 if "\n" in delta else 0
+        if cut:
+            found = self._scan(self._pending[:cut], self._offset)
+            self._pending = self._pending[cut:]
+            self._offset += cut
+            return found
+        if len(self._pending) > self.max_carry:
+            found = self._scan(self._pending, self._offset)
+            keep = self.max_carry // 2
+            self._offset += len(self._pending) - keep
+            self._pending = self._pending[-keep:]
+            return found
+        return []
+    
+    def finish(self) -> List[GuardrailViolation]:
+        found = self._scan(self._pending, self._offset)
+        self._offset += len(self._pending)
+        self._pending = ""
+        return found
+    
+    def _scan(self, text: str, offset: int) -> List[GuardrailViolation]:
+        found = []
+        for v in self.guardrails.scan(text):
+            if v.matched_pattern not in self._seen:
+                self._seen.add(v.matched_pattern)
+                v.span = (v.span[0] + offset, v.span[1] + offset)
+                found.append(v)
+        self.violations.extend(found)
+        return found
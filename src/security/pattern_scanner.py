@@ -0,0 +1,68 @@
+"""Single-pass multi-pattern scanner: keyword prefilter, then regex confirmation of candidate rules"""
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+
+# A rule anchored on a leading word alternation, e.g. r'\b(hate|violence)\b...', can only match where
+# one of those words occurs, so one pass over the text for all anchor words finds every candidate
+_ANCHOR = re.compile(r'^\\b\((?:\?:)?(\w+(?:\|\w+)*)\)\\b')
+
+
+@dataclass(frozen=True)
+class Rule:
+    pattern: str
+    category: str
+    severity: str
+    compiled: Pattern
+
+
+@dataclass(frozen=True)
+class PatternMatch:
+    rule: Rule
+    span: Tuple[int, int]
+
+
+def anchor_words(pattern: str) -> Optional[List[str]]:
+    match = _ANCHOR.match(pattern)
+    return match.group(1).lower().split("|") if match else None
+
+
+class PatternScanner:
+    """Cost is one prefilter pass plus confirmation of rules whose anchor word actually occurs,
+    so it stays flat as rules are added rather than growing with every pattern"""
+    
+    def __init__(self, rules: Iterable[Tuple[str, str, str]]):
+        self.rules: List[Rule] = [Rule(pattern, category, severity, re.compile(pattern, re.IGNORECASE))
+                                  for pattern, category, severity in rules]
+        self._by_word: Dict[str, List[int]] = defaultdict(list)
+        self._unanchored: List[int] = []
+        for index, rule in enumerate(self.rules):
+            words = anchor_words(rule.pattern)
+            if words is None:
+                self._unanchored.append(index)
+            for word in words or []:
+                self._by_word[word].append(index)
+        # Longest first so a word is never shadowed by a shorter alternative sharing its prefix
+        words = sorted(self._by_word, key=len, reverse=True)
+        self._prefilter = re.compile(r'\b(?:' + '|'.join(map(re.escape, words)) + r')\b', re.IGNORECASE) \
+            if words else None
+    
+    def candidates(self, content: str) -> Dict[int, int]:
+        """Rule index -> earliest offset at which that rule could match"""
+        first: Dict[int, int] = {index: 0 for index in self._unanchored}
+        if self._prefilter is not None:
+            for hit in self._prefilter.finditer(content):
+                for index in self._by_word[hit.group().lower()]:
+                    first.setdefault(index, hit.start())
+        return first
+    
+    def scan(self, content: str) -> List[PatternMatch]:
+        """First match of every rule that matches, in rule order"""
+        matches = []
+        for index, start in sorted(self.candidates(content).items()):
+            rule = self.rules[index]
+            found = rule.compiled.search(content, start)
+            if found:
+                matches.append(PatternMatch(rule, found.span()))
+        return matches
@@ -0,0 +1,194 @@
+"""Client-side Groq rate limiting and daily quota tracking"""
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+from src.config import settings
+from src.orchestration.deadline import Deadline, DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+BucketState = Dict[str, Tuple[float, float]]
+
+GLOBAL_SCOPE = "*"
+
+
+class QuotaExceededError(RuntimeError):
+    """Raised when the daily request quota is used up"""
+
+
+class BucketStore(ABC):
+    """Atomic read-modify-write access to the bucket state of one scope"""
+    
+    @abstractmethod
+    def transact(self, scope: str, fn: Callable[[BucketState], T]) -> T:
+        pass
+
+
+class MemoryBucketStore(BucketStore):
+    def __init__(self):
+        self._state: Dict[str, BucketState] = {}
+        self._lock = threading.Lock()
+    
+    def transact(self, scope: str, fn: Callable[[BucketState], T]) -> T:
+        with self._lock:
+            return fn(self._state.setdefault(scope, {}))
+
+
+class SQLiteBucketStore(BucketStore):
+    """Bucket state shared by every process pointing at the same file"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn().execute("""CREATE TABLE IF NOT EXISTS rate_buckets (
+            scope TEXT NOT NULL, name TEXT NOT NULL, level REAL NOT NULL, updated REAL NOT NULL,
+            PRIMARY KEY (scope, name))""")
+    
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+    
+    def transact(self, scope: str, fn: Callable[[BucketState], T]) -> T:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute("SELECT name, level, updated FROM rate_buckets WHERE scope = ?", (scope,)).fetchall()
+            state = {name: (level, updated) for name, level, updated in rows}
+            result = fn(state)
+            conn.executemany("INSERT OR REPLACE INTO rate_buckets VALUES (?, ?, ?, ?)",
+                             [(scope, name, level, updated) for name, (level, updated) in state.items()])
+            conn.execute("COMMIT")
+            return result
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+
+def _blocked_for(state: BucketState, now: Optional[float] = None) -> float:
+    return max(0.0, state.get("blocked_until", (0.0, 0.0))[0] - (time.time() if now is None else now))
+
+
+def _today() -> float:
+    return float(datetime.now(timezone.utc).date().toordinal())
+
+
+class RateLimiter:
+    """Reserve-then-sleep token buckets per model for requests and tokens, plus a global daily quota.
+    
+    Callers reserve capacity up front; a bucket may go negative and the deficit becomes the
+    caller's wait, so concurrent calls are spaced out instead of all hitting a 429.
+    """
+    
+    def __init__(self, store: BucketStore):
+        self.store = store
+        self.total_wait = 0.0
+    
+    def _limits(self) -> Dict[str, Tuple[float, float]]:
+        """Bucket name -> (capacity, refill per second)"""
+        return {
+            "requests_minute": (settings.RATE_LIMIT_PER_MINUTE, settings.RATE_LIMIT_PER_MINUTE / 60),
+            "requests_hour": (settings.RATE_LIMIT_PER_HOUR, settings.RATE_LIMIT_PER_HOUR / 3600),
+            "tokens_minute": (settings.RATE_LIMIT_TOKENS_PER_MINUTE, settings.RATE_LIMIT_TOKENS_PER_MINUTE / 60),
+        }
+    
+    def reserve(self, model: str, tokens: int) -> float:
+        """Reserve one request and `tokens` tokens; returns seconds to wait before sending"""
+        if not settings.RATE_LIMIT_ENABLED:
+            # The buckets are off, but a 429 from the provider still blocks the model until retry-after
+            return self.store.transact(model, _blocked_for)
+        self.store.transact(GLOBAL_SCOPE, self._count_daily_request)
+        limits = self._limits()
+        costs = {"requests_minute": 1, "requests_hour": 1,
+                 "tokens_minute": min(tokens, settings.RATE_LIMIT_TOKENS_PER_MINUTE)}
+        
+        def take(state: BucketState) -> float:
+            now = time.time()
+            wait = _blocked_for(state, now)
+            for name, (capacity, rate) in limits.items():
+                level, updated = state.get(name, (capacity, now))
+                level = min(capacity, level + (now - updated) * rate) - costs[name]
+                state[name] = (level, now)
+                if level < 0:
+                    wait = max(wait, -level / rate)
+            return wait
+        
+        return self.store.transact(model, take)
+    
+    def _count_daily_request(self, state: BucketState):
+        today = _today()
+        count, day = state.get("daily_requests", (0.0, today))
+        if day != today:
+            count = 0.0
+        if count >= settings.RATE_LIMIT_PER_DAY:
+            raise QuotaExceededError(f"Daily Groq quota of {settings.RATE_LIMIT_PER_DAY} requests exhausted")
+        state["daily_requests"] = (count + 1, today)
+    
+    async def acquire(self, model: str, tokens: int, deadline: Optional[Deadline] = None) -> float:
+        wait = self.reserve(model, tokens)
+        if deadline is not None and wait >= deadline.remaining():
+            raise DeadlineExceeded(f"Rate limit wait of {wait:.1f}s for {model} exceeds the remaining budget")
+        if wait > 0:
+            logger.info(f"Rate limiter: delaying {model} call by {wait:.2f}s")
+            self.total_wait += wait
+            await asyncio.sleep(wait)
+        return wait
+    
+    def record_usage(self, model: str, reserved_tokens: int, actual_tokens: Optional[int]):
+        """Refund (or charge) the difference between the token estimate and the reported usage"""
+        if not settings.RATE_LIMIT_ENABLED or actual_tokens is None:
+            return
+        delta = min(reserved_tokens, settings.RATE_LIMIT_TOKENS_PER_MINUTE) - actual_tokens
+        
+        def adjust(state: BucketState):
+            if "tokens_minute" in state:
+                level, updated = state["tokens_minute"]
+                state["tokens_minute"] = (min(settings.RATE_LIMIT_TOKENS_PER_MINUTE, level + delta), updated)
+        
+        self.store.transact(model, adjust)
+    
+    def penalize(self, model: str, retry_after: float):
+        """Block a model after the provider returned 429 anyway"""
+        until = time.time() + retry_after
+        
+        def block(state: BucketState):
+            state["blocked_until"] = (max(until, state.get("blocked_until", (0.0, 0.0))[0]), time.time())
+        
+        self.store.transact(model, block)
+    
+    def quota_status(self) -> dict:
+        def read(state: BucketState) -> dict:
+            count, day = state.get("daily_requests", (0.0, _today()))
+            used = int(count) if day == _today() else 0
+            return {"daily_limit": settings.RATE_LIMIT_PER_DAY, "used_today": used,
+                    "remaining_today": max(0, settings.RATE_LIMIT_PER_DAY - used)}
+        return {**self.store.transact(GLOBAL_SCOPE, read), "total_wait_seconds": round(self.total_wait, 3)}
+
+
+def estimate_tokens(messages: List[Dict], max_tokens: int) -> int:
+    """Rough prompt size (~4 chars per token) plus the completion budget"""
+    return sum(len(m.get("content") or "") for m in messages) // 4 + max_tokens
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _rate_limiter
+    with _limiter_lock:
+        if _rate_limiter is None:
+            store = SQLiteBucketStore(settings.RATE_LIMIT_STATE_PATH) if settings.RATE_LIMIT_STATE_PATH else MemoryBucketStore()
+            _rate_limiter = RateLimiter(store)
+        return _rate_limiter
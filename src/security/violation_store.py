@@ -0,0 +1,78 @@
+"""Bounded store of guardrail violations with running and time-bucketed aggregates"""
+import json
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+
+
+class ViolationStore:
+    """Keeps the last `capacity` violations, O(1) lifetime counters and per-bucket counts covering
+    `bucket_seconds * bucket_count` of history; optionally appends every violation to a JSONL audit log"""
+    
+    def __init__(self, capacity: int = 1000, bucket_seconds: int = 60, bucket_count: int = 1440,
+                 spill_path: Optional[str] = None):
+        self.bucket_seconds = bucket_seconds
+        self._recent: Deque[Tuple[float, str, object]] = deque(maxlen=capacity)
+        self._buckets: Deque[Tuple[int, Counter]] = deque(maxlen=bucket_count)
+        self._by_severity: Counter = Counter()
+        self._by_category: Counter = Counter()
+        self._total = 0
+        self._lock = threading.Lock()
+        self._spill = None
+        if spill_path:
+            Path(spill_path).parent.mkdir(parents=True, exist_ok=True)
+            self._spill = open(spill_path, "a", buffering=1)
+    
+    def add(self, violation, content_type: str = "analysis", timestamp: Optional[float] = None):
+        timestamp = time.time() if timestamp is None else timestamp
+        bucket = int(timestamp // self.bucket_seconds)
+        with self._lock:
+            self._recent.append((timestamp, content_type, violation))
+            self._total += 1
+            self._by_severity[violation.severity] += 1
+            self._by_category[violation.category] += 1
+            if not self._buckets or self._buckets[-1][0] != bucket:
+                self._buckets.append((bucket, Counter()))
+            counts = self._buckets[-1][1]
+            counts[violation.severity] += 1
+            counts[f"category:{violation.category}"] += 1
+            if self._spill is not None:
+                self._spill.write(json.dumps({
+                    "timestamp": timestamp, "content_type": content_type, "category": violation.category,
+                    "severity": violation.severity, "pattern": violation.matched_pattern,
+                    "span": getattr(violation, "span", None)}) + "\n")
+    
+    def recent(self, limit: Optional[int] = None) -> List:
+        with self._lock:
+            items = [violation for _, _, violation in self._recent]
+        return items[-limit:] if limit else items
+    
+    def summary(self) -> Dict:
+        with self._lock:
+            return {"total": self._total, "high": self._by_severity["high"], "medium": self._by_severity["medium"],
+                    "by_severity": dict(self._by_severity), "by_category": dict(self._by_category)}
+    
+    def window(self, seconds: float, now: Optional[float] = None) -> Dict:
+        """Counts over roughly the last `seconds`, at bucket granularity"""
+        now = time.time() if now is None else now
+        oldest = int((now - seconds) // self.bucket_seconds)
+        totals: Counter = Counter()
+        with self._lock:
+            for bucket, counts in reversed(self._buckets):
+                if bucket < oldest:
+                    break
+                totals.update(counts)
+        by_category = {k.split(":", 1)[1]: v for k, v in totals.items() if k.startswith("category:")}
+        by_severity = {k: v for k, v in totals.items() if not k.startswith("category:")}
+        return {"seconds": seconds, "total": sum(by_severity.values()), "by_severity": by_severity,
+                "by_category": by_category}
+    
+    def __len__(self) -> int:
+        return len(self._recent)
+    
+    def close(self):
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
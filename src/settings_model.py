@@ -0,0 +1,116 @@
+"""Settings schema; src.config imports it on first use because pydantic_settings is slow to load"""
+from typing import Optional, List, Literal, Dict
+from pydantic import Field, field_validator
+from pydantic_settings import BaseSettings
+
+
+class Settings(BaseSettings):
+    """Application settings"""
+    
+    API_TITLE: str = "SRIP - Smart Research Intelligence Platform"
+    API_VERSION: str = "2.0.0"
+    API_HOST: str = "0.0.0.0"
+    API_PORT: int = 8000
+    JOB_MAX_CONCURRENCY: int = 4
+    JOB_MAX_QUEUED: int = 1000
+    JOB_RETENTION: int = 1000
+    JOB_PRIORITY_WEIGHTS: Dict[str, int] = Field(default_factory=lambda: {"high": 6, "normal": 3, "low": 1})
+    DEBUG: bool = False
+    
+    GROQ_API_KEY: str
+    GROQ_DEFAULT_MODEL: str = "llama-3.1-70b-versatile"
+    GROQ_FALLBACK_MODELS: List[str] = Field(
+        default_factory=lambda: ["mixtral-8x7b-32768", "llama-3.1-8b-instant"]
+    )
+    GROQ_MAX_RETRIES: int = 3
+    GROQ_TIMEOUT: int = 60
+    GROQ_MAX_CONNECTIONS: int = 50
+    GROQ_MAX_KEEPALIVE: int = 20
+    GROQ_BASE_URL: Optional[str] = None  # e.g. http://localhost:8090 for the fake server
+    GROQ_CASSETTE_MODE: Literal["off", "record", "replay"] = "off"
+    GROQ_CASSETTE_DIR: str = "data/cassettes"
+    
+    CIRCUIT_FAILURE_THRESHOLD: int = 3
+    CIRCUIT_ERROR_RATE_THRESHOLD: float = 0.5
+    CIRCUIT_RESET_TIMEOUT: int = 60
+    MODEL_HEALTH_WINDOW: int = 600
+    MODEL_HEALTH_MIN_SAMPLES: int = 5
+    MODEL_LATENCY_SLO: float = 20.0  # seconds; models slower than this are tried after the rest
+    
+    HEDGING_ENABLED: bool = False
+    HEDGING_PERCENTILE: float = 0.95
+    HEDGING_MIN_DELAY: float = 2.0
+    HEDGING_DAILY_BUDGET: int = 200
+    HEDGING_AGENT_BUDGETS: Dict[str, int] = Field(default_factory=dict)
+    
+    LANGCHAIN_TRACING_V2: bool = False
+    LANGCHAIN_API_KEY: Optional[str] = None
+    LANGCHAIN_PROJECT: str = "SRIP-Production-V2"
+    
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_PER_HOUR: int = 100
+    RATE_LIMIT_PER_MINUTE: int = 10
+    RATE_LIMIT_TOKENS_PER_MINUTE: int = 30000
+    RATE_LIMIT_PER_DAY: int = 14400
+    RATE_LIMIT_STATE_PATH: Optional[str] = None
+    RATE_LIMIT_DEFAULT_BACKOFF: int = 15
+    
+    ANALYSIS_TIMEOUT: int = 120
+    NODE_MIN_BUDGET: float = 5.0
+    WORKFLOW_MODE: Literal["chained", "parallel"] = "chained"
+    NODE_STORE_BACKEND: Literal["memory", "sqlite"] = "memory"
+    NODE_STORE_PATH: str = "data/nodes.sqlite3"
+    NODE_STORE_MAX_ANALYSES: int = 500
+    CHECKPOINT_ENABLED: bool = True  # persist graph state after every node so a crashed analysis can resume
+    CHECKPOINT_PATH: str = "data/checkpoints.sqlite3"
+    CHECKPOINT_RECOVER_ON_STARTUP: bool = True
+    CHECKPOINT_RETENTION: int = 86400  # seconds a failed analysis stays resumable
+    CHECKPOINT_LEASE: float = 30.0  # seconds a running analysis stays claimed without a heartbeat from its owner
+    RESULT_STORE_ENABLED: bool = True  # persist every analysis for listing, search and fetch-by-id
+    RESULT_STORE_PATH: str = "data/results.sqlite3"
+    RESULT_STORE_BATCH_SIZE: int = 64
+    RESULT_STORE_FLUSH_INTERVAL: float = 1.0
+    CONTEXT_BUDGET_ENABLED: bool = True
+    CONTEXT_BUDGETS: Dict[str, int] = Field(default_factory=lambda: {
+        "CompetitiveIntelligence": 600, "RiskAssessment": 900, "StrategicAdvisor": 1500
+    })
+    MAX_TARGETS: int = 8
+    BATCH_CONCURRENCY: int = 4
+    COMPETITIVE_FANOUT: bool = False  # profile each target separately, cached by (target, market)
+    COMPETITIVE_TARGET_MAX_TOKENS: int = 450
+    MIN_RECOMMENDATIONS: int = 6
+    
+    ENABLE_CACHE: bool = True
+    CACHE_MAX_SIZE: int = 1000
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    CACHE_BACKEND: Literal["memory", "sqlite"] = "memory"
+    CACHE_SQLITE_PATH: str = "data/cache.sqlite3"
+    CACHE_TTL: int = 3600
+    CACHE_AGENT_TTLS: Dict[str, int] = Field(default_factory=dict)
+    SIMILARITY_CACHE_ENABLED: bool = False  # serve reworded queries from earlier answers
+    SIMILARITY_THRESHOLD: float = 0.85
+    SIMILARITY_MAX_ENTRIES: int = 100000
+    ENABLE_GUARDRAILS: bool = True
+    GUARDRAILS_EARLY_ABORT: bool = True  # stop the analysis as soon as a section trips a high-severity rule
+    GUARDRAIL_VIOLATION_RETENTION: int = 1000
+    GUARDRAIL_VIOLATION_LOG: Optional[str] = None  # JSONL audit trail of every violation
+    ENABLE_METRICS: bool = True
+    
+    TRACING_ENABLED: bool = False
+    TRACING_EXPORTER: Literal["jsonl", "otlp"] = "jsonl"
+    TRACING_JSONL_PATH: str = "logs/traces.jsonl"
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    
+    LOG_LEVEL: str = "INFO"
+    LOG_FILE: Optional[str] = "logs/srip.log"
+    
+    @field_validator("GROQ_API_KEY")
+    @classmethod
+    def validate_groq_key(cls, v: str) -> str:
+        if not v or len(v) < 10 or v == "your_groq_api_key_here":
+            raise ValueError("Please set a valid GROQ_API_KEY in .env file")
+        return v
+    
+    class Config:
+        env_file = ".env"
+        case_sensitive = True
@@ -0,0 +1,174 @@
+"""Local OpenAI/Groq-compatible fake server for load tests and benchmarks
+
+Usage: python -m src.simulation.fake_groq --port 8090 --latency lognormal:-0.5,0.4 --rate-limit-rate 0.05
+then point the app at it with GROQ_BASE_URL=http://localhost:8090
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORDS = ("market growth revenue customers adoption pricing platform enterprise segment demand regulatory "
+         "competitors share margin investment expansion risk supply partners channel innovation retention "
+         "analysts forecast region capacity strategy differentiation cost scale signal").split()
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """`fixed:S`, `uniform:LO,HI`, `normal:MEAN,STD` or `lognormal:MU,SIGMA` (seconds)"""
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",")] if params else []
+    if kind == "fixed":
+        return lambda rng: values[0] if values else 0.0
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(values[0], values[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+@dataclass
+class FakeGroqProfile:
+    latency: str = "lognormal:-0.7,0.5"
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    requests_per_minute: Optional[int] = None
+    retry_after: float = 2.0
+    tokens_per_second: float = 300.0
+    completion_tokens: int = 400
+    seed: Optional[int] = None
+
+
+def fake_completion(messages: List[Dict], max_tokens: int) -> str:
+    """Deterministic per prompt: sentences plus a numbered list so downstream parsers have work to do"""
+    prompt = json.dumps(messages, sort_keys=True)
+    rng = random.Random(hashlib.sha256(prompt.encode()).hexdigest())
+    words: List[str] = []
+    lines = []
+    while len(words) < max_tokens * 0.7:
+        sentence = [rng.choice(WORDS) for _ in range(rng.randint(8, 16))]
+        words.extend(sentence)
+        lines.append(" ".join(sentence).capitalize() + f" at {rng.randint(2, 95)}%.")
+    recommendations = [f"{i}. {' '.join(rng.choice(WORDS) for _ in range(10)).capitalize()}: "
+                       f"{' '.join(rng.choice(WORDS) for _ in range(6))}" for i in range(1, 7)]
+    return "\n".join(lines[:len(lines) // 2] + [""] + recommendations + [""] + lines[len(lines) // 2:])
+
+
+def _count_tokens(text: str) -> int:
+    return max(1, len(text.split()))
+
+
+def create_fake_app(profile: Optional[FakeGroqProfile] = None) -> FastAPI:
+    profile = profile or FakeGroqProfile()
+    rng = random.Random(profile.seed)
+    sample_latency = parse_latency(profile.latency)
+    recent: deque = deque()
+    stats = {"requests": 0, "completed": 0, "rate_limited": 0, "errors": 0, "completion_tokens": 0}
+    app = FastAPI(title="Fake Groq")
+    app.state.profile = profile
+    app.state.stats = stats
+    
+    def rejection() -> Optional[JSONResponse]:
+        now = time.monotonic()
+        while recent and now - recent[0] > 60:
+            recent.popleft()
+        over_rpm = profile.requests_per_minute is not None and len(recent) >= profile.requests_per_minute
+        if over_rpm or rng.random() < profile.rate_limit_rate:
+            stats["rate_limited"] += 1
+            return JSONResponse(
+                status_code=429, headers={"retry-after": str(profile.retry_after)},
+                content={"error": {"message": "Rate limit reached (simulated)", "type": "requests",
+                                   "code": "rate_limit_exceeded"}})
+        recent.append(now)
+        if rng.random() < profile.error_rate:
+            stats["errors"] += 1
+            return JSONResponse(status_code=500, content={"error": {"message": "Injected server error",
+                                                                    "type": "internal_server_error"}})
+        return None
+    
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+        rejected = rejection()
+        if rejected is not None:
+            return rejected
+        
+        model = body.get("model", "fake-model")
+        max_tokens = min(body.get("max_tokens") or profile.completion_tokens, profile.completion_tokens)
+        content = fake_completion(body.get("messages", []), max_tokens)
+        usage = {"prompt_tokens": _count_tokens(json.dumps(body.get("messages", []))),
+                 "completion_tokens": _count_tokens(content)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        seconds_per_token = 1 / profile.tokens_per_second if profile.tokens_per_second else 0.0
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        await asyncio.sleep(sample_latency(rng))
+        
+        if not body.get("stream"):
+            await asyncio.sleep(usage["completion_tokens"] * seconds_per_token)
+            stats["completed"] += 1
+            stats["completion_tokens"] += usage["completion_tokens"]
+            return {"id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": content}}],
+                    "usage": usage}
+        
+        async def events():
+            words = content.split(" ")
+            for start in range(0, len(words), 4):
+                piece = " ".join(words[start:start + 4]) + (" " if start + 4 < len(words) else "")
+                chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created,
+                         "model": model, "choices": [{"index": 0, "delta": {"content": piece},
+                                                      "finish_reason": None}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(_count_tokens(piece) * seconds_per_token)
+            final = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                     "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                     "x_groq": {"id": completion_id, "usage": usage}}
+            yield f"data: {json.dumps(final)}\n\n"
+            yield "data: [DONE]\n\n"
+            stats["completed"] += 1
+            stats["completion_tokens"] += usage["completion_tokens"]
+        
+        return StreamingResponse(events(), media_type="text/event-stream")
+    
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+    
+    return app
+
+
+def main(argv=None):
+    import uvicorn
+    parser = argparse.ArgumentParser(description="Fake Groq-compatible server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", default=FakeGroqProfile.latency, help=parse_latency.__doc__)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--requests-per-minute", type=int, default=None)
+    parser.add_argument("--retry-after", type=float, default=2.0)
+    parser.add_argument("--tokens-per-second", type=float, default=300.0)
+    parser.add_argument("--completion-tokens", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+    profile = FakeGroqProfile(
+        latency=args.latency, error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+        requests_per_minute=args.requests_per_minute, retry_after=args.retry_after,
+        tokens_per_second=args.tokens_per_second, completion_tokens=args.completion_tokens, seed=args.seed)
+    uvicorn.run(create_fake_app(profile), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,63 @@
 """Professional Gradio Interface"""
-import gradio as gr
-import plotly.graph_objects as go
+import time
 from datetime import datetime
-import asyncio
 from src.orchestration.workflow import IntelligenceWorkflow
-from src.models import AnalysisStatus
+from src.models import AnalysisStatus, IntelligenceState
+
+SECTION_LABELS = {
+    "market_intelligence": "Market intelligence",
+    "competitive_landscape": "Competitive landscape",
+    "risk_evaluation": "Risk assessment",
+    "executive_briefing": "Strategic synthesis",
+}
 
 class SRIPInterface:
     def __init__(self):
         self.workflow = IntelligenceWorkflow()
     
-    async def analyze_business(self, query: str, targets: str, priority: str, progress=gr.Progress()):
+    async def analyze_business(self, query: str, targets: str, priority: str, progress=None):
+        progress = progress or (lambda *args, **kwargs: None)
         if not query or len(query) < 10:
-            return "❌ Error: Query must be at least 10 characters", None, None
+            yield "❌ Error: Query must be at least 10 characters", None, None
+            return
         
         target_list = None
         if targets and targets.strip():
             target_list = [t.strip() for t in targets.split(",") if t.strip()]
             if len(target_list) > 8:
-                return "❌ Error: Maximum 8 targets allowed", None, None
-        
-        progress(0.1, desc="🔍 Validating...")
-        await asyncio.sleep(0.5)
-        progress(0.2, desc="📊 Market intelligence...")
+                yield "❌ Error: Maximum 8 targets allowed", None, None
+                return
         
+        progress(0.1, desc="🔍 Starting agents...")
+        sections = {}
+        done = set()
+        last_render = 0.0
         try:
-            result = await self.workflow.execute_analysis(query=query, targets=target_list)
-            progress(0.9, desc="✅ Finalizing...")
-            quality_chart = self._create_quality_gauge(result)
-            completion_chart = self._create_completion_chart(result)
-            output = self._format_output(result)
-            return output, quality_chart, completion_chart
+            async for event in self.workflow.astream_analysis(query=query, targets=target_list):
+                if event["type"] == "delta":
+                    sections[event["section"]] = sections.get(event["section"], "") + event["text"]
+                elif event["type"] == "section":
+                    sections[event["section"]] = event["content"]
+                    done.add(event["section"])
+                    progress(0.1 + 0.8 * len(done) / len(SECTION_LABELS), desc=f"✅ {SECTION_LABELS[event['section']]}")
+                else:
+                    result = event["result"]
+                    progress(0.95, desc="✅ Finalizing...")
+                    yield self._format_output(result), self._create_quality_gauge(result), self._create_completion_chart(result)
+                    return
+                # Re-rendering markdown on every token floods the browser; a few frames a second reads as live
+                if time.monotonic() - last_render >= 0.15:
+                    last_render = time.monotonic()
+                    yield self._format_output(self._partial_result(query, target_list, sections)), None, None
         except Exception as e:
-            return f"❌ Analysis failed: {str(e)}", None, None
+            yield f"❌ Analysis failed: {str(e)}", None, None
+    
+    def _partial_result(self, query: str, targets, sections: dict) -> IntelligenceState:
+        return IntelligenceState(analysis_id="pending", query=query, targets=targets,
+                                 status=AnalysisStatus.PROCESSING, **sections)
     
     def _format_output(self, result) -> str:
-        status_emoji = "✅" if result.status == AnalysisStatus.COMPLETED else "❌"
+        status_emoji = {AnalysisStatus.COMPLETED: "✅", AnalysisStatus.PROCESSING: "⏳"}.get(result.status, "❌")
         quality_emoji = "🌟" if result.quality_score >= 0.9 else "⭐" if result.quality_score >= 0.7 else "⚠️"
         
         output = f"""# {status_emoji} Intelligence Analysis Report
@@ -98,6 +120,7 @@ class SRIPInterface:
         return output
     
     def _create_quality_gauge(self, result):
+        import plotly.graph_objects as go
         fig = go.Figure(go.Indicator(
             mode="gauge+number", value=result.quality_score * 100,
             domain={'x': [0, 1], 'y': [0, 1]},
@@ -111,6 +134,7 @@ class SRIPInterface:
         return fig
     
     def _create_completion_chart(self, result):
+        import plotly.graph_objects as go
         metrics = {k: 1 if result.completion_status.get(k.lower()) else 0 
                    for k in ["Market", "Competitive", "Risk", "Strategic"]}
         fig = go.Figure(data=[
@@ -123,7 +147,14 @@ class SRIPInterface:
         return fig
 
 def create_interface():
+    import gradio as gr  # imported here so the module (and SRIPInterface) load without the UI stack
     srip = SRIPInterface()
+    
+    async def analyze(query: str, targets: str, priority: str, progress=gr.Progress()):
+        # Gradio only tracks progress for handlers that declare a gr.Progress default
+        async for outputs in srip.analyze_business(query, targets, priority, progress):
+            yield outputs
+    
     with gr.Blocks(theme=gr.themes.Soft(), title="SRIP - Business Intelligence") as demo:
         gr.Markdown("""# 🚀 SRIP - Smart Research Intelligence Platform
 **Production-Grade Multi-Agent Business Intelligence System**
@@ -146,7 +177,7 @@ Get comprehensive analysis in minutes!""")
         gr.Markdown("---")
         output_md = gr.Markdown(label="Results")
         
-        analyze_btn.click(fn=srip.analyze_business, inputs=[query_input, targets_input, priority_input],
+        analyze_btn.click(fn=analyze, inputs=[query_input, targets_input, priority_input],
                          outputs=[output_md, quality_plot, completion_plot])
     return demo
 
@@ -0,0 +1,98 @@
+"""Unit test configuration - no live Groq calls"""
+import os
+
+os.environ.setdefault("GROQ_API_KEY", "gsk_unit_test_placeholder_key")
+os.environ.setdefault("RESULT_STORE_ENABLED", "false")
+os.environ.setdefault("CHECKPOINT_ENABLED", "false")
+
+import asyncio
+from types import SimpleNamespace
+import pytest
+
+STRATEGIC_TEXT = "summary " * 60 + "\n" + "\n".join(
+    f"{i}. Recommendation number {i} with enough detail to count: rationale" for i in range(1, 7))
+
+
+class FakeCompletions:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+
+    async def create(self, model, messages, **kwargs):
+        self.calls.append(model)
+        await asyncio.sleep(self.delay)
+        message = SimpleNamespace(content=f"answer from {model}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class FakeWorkflow:
+    """Stands in for IntelligenceWorkflow in job and batch tests, tracking peak concurrency and call order"""
+    
+    def __init__(self, fail_on=(), delay: float = 0.05):
+        self.fail_on = fail_on
+        self.delay = delay
+        self.running = 0
+        self.peak = 0
+        self.queries = []
+    
+    async def execute_analysis(self, query, targets=None, base_analysis_id=None):
+        from src.models import AnalysisStatus, IntelligenceState
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        self.queries.append(query)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        if query in self.fail_on:
+            raise RuntimeError("boom")
+        return IntelligenceState(analysis_id=f"ana_{len(self.queries)}", query=query, targets=targets,
+                                 status=AnalysisStatus.COMPLETED, quality_score=0.9)
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    from src.agents import base_agent
+    completions = FakeCompletions(delay=0.1)
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(base_agent, "get_async_client", lambda: client)
+    return completions
+
+
+def _stub_agents(workflow, delay: float = 0.2):
+    calls = []
+
+    def make(name):
+        async def aexecute(query, context=None, **kwargs):
+            calls.append((name, context))
+            await asyncio.sleep(delay)
+            return f"{name} section " * 50
+        return aexecute
+
+    async def strategic(query, **kwargs):
+        return STRATEGIC_TEXT
+
+    workflow.market_agent.aexecute = make("market")
+    workflow.competitive_agent.aexecute = make("competitive")
+    workflow.risk_agent.aexecute = make("risk")
+    workflow.strategic_agent.aexecute = strategic
+    return calls
+
+
+@pytest.fixture
+def stub_agents():
+    """Replace a workflow's agents with fast fakes; returns the (agent, context) call log"""
+    return _stub_agents
+
+
+@pytest.fixture(autouse=True)
+def _reset_shared_state(monkeypatch):
+    from src.cache.response_cache import get_response_cache
+    from src.agents import model_router
+    from src.cache import similarity
+    from src.security import rate_limiter
+    get_response_cache().backend.clear()
+    monkeypatch.setattr(rate_limiter, "_rate_limiter", None)
+    monkeypatch.setattr(model_router, "_router", None)
+    monkeypatch.setattr(similarity, "_index", None)
+    yield
@@ -0,0 +1,233 @@
+"""Unit tests for the base agent execution path"""
+import asyncio
+import time
+from types import SimpleNamespace
+import groq
+import httpx
+import pytest
+from src.agents.model_router import get_model_router
+from src.agents.risk_assessment import RiskAssessmentAgent
+from src.config import settings
+from src.orchestration.deadline import Deadline, DeadlineExceeded
+
+
+@pytest.mark.asyncio
+async def test_aexecute_runs_concurrently(fake_client):
+    agents = [RiskAssessmentAgent() for _ in range(10)]
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    results = await asyncio.gather(*(a.aexecute(f"Query number {i}") for i, a in enumerate(agents)))
+    assert loop.time() - start < 0.5
+    assert len(results) == 10 and len(fake_client.calls) == 10
+
+
+@pytest.mark.asyncio
+async def test_aexecute_uses_cache(fake_client):
+    agent = RiskAssessmentAgent()
+    first = await agent.aexecute("Cloud computing market")
+    second = await agent.aexecute("Cloud computing market")
+    assert first == second
+    assert len(fake_client.calls) == 1
+    assert agent.metrics["cache_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_global_cache_ttl_applies_to_agents(fake_client, monkeypatch):
+    from src.config import get_settings
+    monkeypatch.setattr(get_settings(), "__pydantic_fields_set__", set(get_settings().model_fields_set))
+    monkeypatch.setattr(settings, "CACHE_TTL", 0)  # disables caching even for agents with their own TTL
+    agent = RiskAssessmentAgent()
+    await agent.aexecute("Cloud computing market")
+    await agent.aexecute("Cloud computing market")
+    assert len(fake_client.calls) == 2
+
+
+def test_sync_execute_delegates_to_async_path(fake_client):
+    agent = RiskAssessmentAgent()
+    assert agent.execute("Cloud computing market").startswith("answer from")
+    assert agent.metrics["successful_calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_are_coalesced(fake_client):
+    agents = [RiskAssessmentAgent() for _ in range(5)]
+    results = await asyncio.gather(*(a.aexecute("Cloud computing market") for a in agents))
+    assert len(set(results)) == 1
+    assert len(fake_client.calls) == 1
+    assert sum(a.metrics["coalesced_calls"] for a in agents) == 4
+
+
+@pytest.mark.asyncio
+async def test_shared_call_cancelled_only_with_its_last_caller(fake_client):
+    original = fake_client.create
+    finished = []
+
+    async def create(model, messages, **kwargs):
+        response = await original(model, messages, **kwargs)
+        finished.append(model)
+        return response
+
+    fake_client.create = create
+    first, second = (asyncio.create_task(RiskAssessmentAgent().aexecute("Cloud computing market")) for _ in range(2))
+    await asyncio.sleep(0.02)
+    first.cancel()
+    assert (await second).startswith("answer from")
+    assert len(finished) == 1
+
+    first, second = (asyncio.create_task(RiskAssessmentAgent().aexecute("Edge computing market")) for _ in range(2))
+    await asyncio.sleep(0.02)
+    first.cancel()
+    second.cancel()
+    await asyncio.sleep(0.2)
+    assert len(finished) == 1 and len(fake_client.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_failing_model_is_skipped_once_circuit_opens(fake_client, monkeypatch):
+    monkeypatch.setattr(settings, "CIRCUIT_FAILURE_THRESHOLD", 1)
+    original = fake_client.create
+
+    async def flaky(model, messages, **kwargs):
+        if model == settings.GROQ_DEFAULT_MODEL:
+            fake_client.calls.append(model)
+            raise ConnectionError("provider down")
+        return await original(model, messages, **kwargs)
+
+    fake_client.create = flaky
+    agent = RiskAssessmentAgent()
+    assert "answer from" in await agent.aexecute("First query about markets")
+    assert "answer from" in await agent.aexecute("Second query about markets")
+    assert fake_client.calls.count(settings.GROQ_DEFAULT_MODEL) == 1
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_retry_waits_with_limiter_disabled(fake_client, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    original = fake_client.create
+    sent = []
+
+    async def limited_once(model, messages, **kwargs):
+        sent.append(time.monotonic())
+        if len(sent) == 1:
+            response = httpx.Response(429, headers={"retry-after": "0.3"}, request=httpx.Request("POST", "http://groq"))
+            raise groq.RateLimitError("rate limited", response=response, body=None)
+        return await original(model, messages, **kwargs)
+
+    fake_client.create = limited_once
+    assert "answer from" in await RiskAssessmentAgent().aexecute("Cloud computing market")
+    assert sent[1] - sent[0] >= 0.3
+
+
+@pytest.fixture
+def slow_primary(fake_client, monkeypatch):
+    monkeypatch.setattr(settings, "HEDGING_ENABLED", True)
+    monkeypatch.setattr(settings, "HEDGING_MIN_DELAY", 0.1)
+    original = fake_client.create
+
+    async def create(model, messages, **kwargs):
+        if model == settings.GROQ_DEFAULT_MODEL:
+            await asyncio.sleep(1.0)
+        return await original(model, messages, **kwargs)
+
+    fake_client.create = create
+    for _ in range(5):
+        get_model_router().health(settings.GROQ_DEFAULT_MODEL).record_success(0.05)
+    return fake_client
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged(slow_primary):
+    agent = RiskAssessmentAgent()
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    result = await agent.aexecute("Hedged query about markets")
+    assert loop.time() - start < 0.6
+    assert result == f"answer from {settings.GROQ_FALLBACK_MODELS[0]}"
+    assert agent.metrics["hedged_calls"] == 1 and agent.metrics["hedge_wins"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_cancels_pending_primary(slow_primary):
+    upstream = {"started": 0, "finished": 0, "cancelled": 0}
+    slow = slow_primary.create
+
+    async def tracked(model, messages, **kwargs):
+        upstream["started"] += 1
+        try:
+            result = await slow(model, messages, **kwargs)
+        except asyncio.CancelledError:
+            upstream["cancelled"] += 1
+            raise
+        upstream["finished"] += 1
+        return result
+
+    slow_primary.create = tracked
+    task = asyncio.create_task(RiskAssessmentAgent().aexecute("Cancelled query about markets"))
+    await asyncio.sleep(0.05)  # inside the hedge delay, before any hedge is sent
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await asyncio.sleep(0.05)  # the shared call is cancelled once its last caller leaves
+    assert upstream == {"started": 1, "finished": 0, "cancelled": 1}
+
+
+@pytest.mark.asyncio
+async def test_hedging_respects_agent_budget(slow_primary, monkeypatch):
+    monkeypatch.setattr(settings, "HEDGING_AGENT_BUDGETS", {"RiskAssessment": 0})
+    agent = RiskAssessmentAgent()
+    result = await agent.aexecute("Unhedged query about markets")
+    assert result == f"answer from {settings.GROQ_DEFAULT_MODEL}"
+    assert agent.metrics["hedged_calls"] == 0
+
+
+@pytest.mark.asyncio
+async def test_expired_deadline_stops_before_calling(fake_client):
+    agent = RiskAssessmentAgent()
+    with pytest.raises(DeadlineExceeded):
+        await agent.aexecute("Late query about markets", deadline=Deadline.after(-1))
+    assert fake_client.calls == []
+
+
+@pytest.mark.asyncio
+async def test_astream_yields_chunks_and_caches(fake_client):
+    async def create(model, messages, stream=False, **kwargs):
+        fake_client.calls.append(model)
+
+        async def chunks():
+            for text in ["Risk ", "profile"]:
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+        return chunks()
+
+    fake_client.create = create
+    agent = RiskAssessmentAgent()
+    assert [c async for c in agent.astream("Streaming risk query")] == ["Risk ", "profile"]
+    assert [c async for c in agent.astream("Streaming risk query")] == ["Risk profile"]
+    assert len(fake_client.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_competitive_fanout_caches_per_target(fake_client):
+    from src.agents.competitive_intelligence import CompetitiveIntelligenceAgent, market_key
+    agent = CompetitiveIntelligenceAgent()
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    first = await agent.aexecute_targets("Cloud computing market analysis", ["AWS", "Azure", "GCP"])
+    assert loop.time() - start < 0.25
+    assert len(fake_client.calls) == 3
+    assert "**AWS**" in first and "**GCP**" in first
+    
+    second = await agent.aexecute_targets("Analysis of the cloud computing market", ["AWS", "Oracle"])
+    assert len(fake_client.calls) == 4
+    assert agent.metrics["cache_hits"] == 1
+    assert "Competitors profiled: AWS, Oracle" in second
+    assert market_key("AWS vs Oracle in cloud computing", ["AWS", "Oracle"]) == "cloud computing"
+
+
+@pytest.mark.asyncio
+async def test_similar_query_served_from_cache(fake_client, monkeypatch):
+    monkeypatch.setattr(settings, "SIMILARITY_CACHE_ENABLED", True)
+    agent = RiskAssessmentAgent()
+    first = await agent.aexecute("Cloud infra market analysis")
+    assert await agent.aexecute("the cloud infrastructure market") == first
+    await agent.aexecute("the cloud infrastructure market", context="other context")
+    assert len(fake_client.calls) == 2
@@ -0,0 +1,64 @@
+"""Unit tests for the batch runner"""
+import json
+import pytest
+from src.config import settings
+from src.orchestration.batch import BatchItem, BatchRunner, completed_ids, concurrency_limit, load_items
+from tests.unit.conftest import FakeWorkflow
+
+
+def test_load_items_from_csv_and_jsonl(tmp_path):
+    csv_path = tmp_path / "in.csv"
+    csv_path.write_text("id,query,targets\nc1,Cloud computing market,AWS; Azure\n,Solar panel market,\n,,\n")
+    items = load_items(csv_path)
+    assert [(i.item_id, i.targets) for i in items][0] == ("c1", ["AWS", "Azure"])
+    assert items[1].targets is None and len(items[1].item_id) == 16
+    jsonl_path = tmp_path / "in.jsonl"
+    jsonl_path.write_text(json.dumps({"query": "Solar panel market"}) + "\n\n"
+                          + json.dumps({"query": "EV batteries", "targets": ["CATL"]}) + "\n")
+    items_jsonl = load_items(jsonl_path)
+    assert items_jsonl[0].item_id == items[1].item_id
+    assert items_jsonl[1].targets == ["CATL"]
+
+
+def test_concurrency_capped_by_request_quota(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_PER_MINUTE", 10)
+    assert concurrency_limit(8) == 2
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    assert concurrency_limit(8) == 8
+
+
+@pytest.mark.asyncio
+async def test_runner_bounds_concurrency_and_resumes(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    output = tmp_path / "out.jsonl"
+    items = [BatchItem(f"Market query {n}") for n in range(6)]
+    workflow = FakeWorkflow(fail_on={"Market query 2"}, delay=0.02)
+    reports = []
+    progress = await BatchRunner(workflow, concurrency=2, on_progress=lambda p: reports.append(p.to_dict())).run(
+        items, output)
+    assert workflow.peak == 2
+    assert (progress.completed, progress.failed, progress.remaining) == (5, 1, 0)
+    assert reports[-1]["items_per_minute"] > 0 and reports[-1]["eta_seconds"] == 0
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert len(records) == 6 and records[0]["result"]["query"].startswith("Market query")
+    assert len(completed_ids(output)) == 5
+
+    with output.open("a") as f:
+        f.write('{"item_id": "truncat')
+    retry = FakeWorkflow(delay=0.02)
+    progress = await BatchRunner(retry, concurrency=2).run(items, output)
+    assert retry.queries == ["Market query 2"]
+    assert (progress.skipped, progress.completed) == (5, 1)
+    assert len(completed_ids(output)) == 6
+
+
+@pytest.mark.asyncio
+async def test_runner_skips_duplicate_items(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    output = tmp_path / "out.jsonl"
+    items = [BatchItem("Solar panel market"), BatchItem("Solar panel market"), BatchItem("EV batteries", ["CATL"])]
+    workflow = FakeWorkflow(delay=0)
+    progress = await BatchRunner(workflow, concurrency=2).run(items, output)
+    assert sorted(workflow.queries) == ["EV batteries", "Solar panel market"]
+    assert (progress.total, progress.completed, progress.remaining) == (2, 2, 0)
+    assert len(output.read_text().splitlines()) == 2
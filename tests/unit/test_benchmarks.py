@@ -0,0 +1,40 @@
+"""Unit tests for benchmark helpers"""
+from benchmarks import bench_micro
+from benchmarks.common import percentiles
+from benchmarks.compare import flatten
+
+
+def test_percentiles():
+    stats = percentiles([float(i) for i in range(1, 101)])
+    assert stats["p50"] == 51.0
+    assert stats["p99"] == 99.0
+    assert stats["max"] == 100.0
+    assert percentiles([]) == {}
+
+
+def test_flatten_keeps_numeric_leaves_only():
+    flat = flatten({"pipeline": {"latency_s": {"p50": 1.2}, "statuses": {"completed": 3}, "cache": False},
+                    "environment": {"commit": "abc"}})
+    assert flat == {"pipeline.latency_s.p50": 1.2, "pipeline.statuses.completed": 3}
+
+
+def test_micro_benchmarks_report_throughput():
+    results = bench_micro.run(iterations=20, similarity_entries=1000)
+    assert results["guardrails.validate_content"]["clean"]["ops_per_sec"] > 0
+    assert results["strategic._parse_recommendations"]["p99_us"] > 0
+    assert {"memory_get_hit", "sqlite_set", "make_key"} <= results["cache"].keys()
+    assert results["similarity"]["lookup"]["ops_per_sec"] > 0
+
+
+def test_pipeline_run_leaves_settings_and_working_tree_alone(tmp_path, monkeypatch):
+    from benchmarks import bench_pipeline
+    from src.config import settings
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(settings, "CHECKPOINT_ENABLED", True)
+    monkeypatch.setattr(settings, "RESULT_STORE_ENABLED", True)
+    before = {name: getattr(settings, name) for name in ("ENABLE_CACHE", "GROQ_BASE_URL", "WORKFLOW_MODE")}
+    report = bench_pipeline.run(analyses=2, concurrency=2, mode="parallel")
+    assert report["statuses"] == {"completed": 2} and report["config"]["workflow_mode"] == "parallel"
+    assert not (tmp_path / "data").exists()
+    assert settings.CHECKPOINT_ENABLED and settings.RESULT_STORE_ENABLED
+    assert {name: getattr(settings, name) for name in before} == before
@@ -0,0 +1,96 @@
+"""Unit tests for durable workflow checkpoints and crash recovery"""
+import asyncio
+import sqlite3
+import pytest
+from src.config import settings
+from src.models import AnalysisStatus
+from src.orchestration.workflow import IntelligenceWorkflow
+
+
+@pytest.fixture
+def checkpoints(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CHECKPOINT_ENABLED", True)
+    monkeypatch.setattr(settings, "CHECKPOINT_PATH", str(tmp_path / "checkpoints.sqlite3"))
+    monkeypatch.setattr(settings, "ENABLE_CACHE", False)
+
+
+def _runs() -> dict:
+    with sqlite3.connect(settings.CHECKPOINT_PATH) as conn:
+        return dict(conn.execute("SELECT analysis_id, status FROM runs").fetchall())
+
+
+def _stall(workflow) -> asyncio.Event:
+    stalled = asyncio.Event()
+
+    async def hang(query, context=None, **kwargs):
+        stalled.set()
+        await asyncio.sleep(30)
+    workflow.competitive_agent.aexecute = hang
+    return stalled
+
+
+@pytest.mark.asyncio
+async def test_crashed_analysis_recovered_from_last_completed_node(checkpoints, stub_agents, monkeypatch):
+    monkeypatch.setattr(settings, "CHECKPOINT_LEASE", 0.3)
+    crashed = IntelligenceWorkflow()
+    stub_agents(crashed, delay=0)
+    stalled = _stall(crashed)
+    task = asyncio.create_task(crashed.execute_analysis("Cloud computing market analysis"))
+    await stalled.wait()
+
+    restarted = IntelligenceWorkflow()
+    calls = stub_agents(restarted, delay=0)
+    await asyncio.sleep(0.5)
+    assert await restarted.recover_inflight() == []  # the first process is alive and renewing its lease
+    crashed.checkpointer.renew = lambda analysis_id: True  # now it hangs while competitive analysis runs
+    await asyncio.sleep(0.5)
+    [run] = restarted.checkpointer.inflight()
+
+    [result] = await restarted.recover_inflight()
+    assert [name for name, _ in calls] == ["competitive", "risk"]
+    assert result.analysis_id == run['analysis_id'] and result.status == AnalysisStatus.COMPLETED
+    assert result.market_intelligence.startswith("market section")
+    task.cancel()  # the old owner cannot touch a run it lost
+    await asyncio.gather(task, return_exceptions=True)
+    assert restarted.checkpointer.get_run(result.analysis_id) is None
+    assert await restarted.resume_analysis(result.analysis_id) is None
+
+
+@pytest.mark.asyncio
+async def test_cancelled_analysis_is_not_recovered(checkpoints, stub_agents, monkeypatch):
+    monkeypatch.setattr(settings, "CHECKPOINT_LEASE", 0.1)
+    workflow = IntelligenceWorkflow()
+    stub_agents(workflow, delay=0)
+    stalled = _stall(workflow)
+    task = asyncio.create_task(workflow.execute_analysis("Cloud computing market analysis"))
+    await stalled.wait()
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    await asyncio.sleep(0.2)  # the shared run is cancelled after its last caller, then the lease lapses
+    assert list(_runs().values()) == ["cancelled"]
+    restarted = IntelligenceWorkflow()
+    calls = stub_agents(restarted, delay=0)
+    assert await restarted.recover_inflight() == [] and calls == []
+
+
+@pytest.mark.asyncio
+async def test_resuming_failed_analysis_reruns_only_failed_nodes(checkpoints, stub_agents, monkeypatch):
+    monkeypatch.setattr(settings, "WORKFLOW_MODE", "parallel")
+    workflow = IntelligenceWorkflow()
+    calls = stub_agents(workflow, delay=0)
+    healthy_risk = workflow.risk_agent.aexecute
+
+    async def failing(query, context=None, **kwargs):
+        raise RuntimeError("Groq unavailable")
+    workflow.risk_agent.aexecute = failing
+    failed = await workflow.execute_analysis("Cloud computing market analysis")
+    assert failed.completion_status["risk"] is False
+    workflow.node_store = type(workflow.node_store)(10)  # node records now only survive in the checkpoint
+
+    calls.clear()
+    workflow.risk_agent.aexecute = healthy_risk
+    resumed = await workflow.resume_analysis(failed.analysis_id)
+    assert [name for name, _ in calls] == ["risk"]
+    assert resumed.status == AnalysisStatus.COMPLETED
+    assert sorted(resumed.reused_nodes) == ["competitive_landscape", "market_intelligence"]
+    assert await workflow.resume_analysis("ana_unknown") is None
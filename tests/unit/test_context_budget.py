@@ -0,0 +1,71 @@
+"""Unit tests for context budgeting"""
+import pytest
+from src.config import settings
+from src.orchestration.context_budget import ContextBudget, approx_tokens, compress
+from src.orchestration.workflow import IntelligenceWorkflow
+
+REPORT = """**MARKET SCALE AND TRAJECTORY**
+- Current market size: $480B in 2023
+- Growth is steady and broad-based across regions
+The market has expanded rapidly. Analysts expect a CAGR of 17% through 2028. Adoption continues among enterprises.
+
+**KEY PLAYERS**
+- AWS leads with 32% share
+- Microsoft Azure follows with 23%
+- Many smaller regional providers compete on price
+Competition is intense and differentiated by services.
+"""
+
+
+def test_compress_prefers_facts_with_headings():
+    out = compress(REPORT, 50)
+    assert approx_tokens(out) <= 50
+    assert out.splitlines()[0] == "**MARKET SCALE AND TRAJECTORY**"
+    assert "- AWS leads with 32% share" in out and "**KEY PLAYERS**" in out
+    assert "Competition is intense" not in out
+    assert compress(REPORT, 50) == out
+
+
+def test_compress_leaves_short_text_alone():
+    assert compress(REPORT, 1000) == REPORT
+    assert compress(None, 10) is None
+
+
+def test_fit_shares_budget_and_reports_savings():
+    budget = ContextBudget({"RiskAssessment": 80})
+    fitted, usage = budget.fit("RiskAssessment", {"market": REPORT, "competitive": "Short note.", "risk": None})
+    assert fitted["competitive"] == "Short note." and fitted["risk"] is None
+    assert usage.sent_tokens <= 80 < usage.original_tokens
+    assert usage.to_dict()["saved"] == usage.original_tokens - usage.sent_tokens
+
+
+def test_fit_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "CONTEXT_BUDGET_ENABLED", False)
+    fitted, usage = ContextBudget({"RiskAssessment": 10}).fit("RiskAssessment", {"market": REPORT})
+    assert fitted["market"] == REPORT and usage.saved_tokens == 0
+
+
+@pytest.mark.asyncio
+async def test_workflow_sends_budgeted_context(monkeypatch):
+    monkeypatch.setattr(settings, "CONTEXT_BUDGETS", {"CompetitiveIntelligence": 60, "RiskAssessment": 60,
+                                                      "StrategicAdvisor": 120})
+    workflow = IntelligenceWorkflow()
+    seen = {}
+    
+    def make(name):
+        async def aexecute(query, context=None, **kwargs):
+            seen[name] = (context, kwargs)
+            return REPORT * 3
+        return aexecute
+    
+    workflow.market_agent.aexecute = make("market")
+    workflow.competitive_agent.aexecute = make("competitive")
+    workflow.risk_agent.aexecute = make("risk")
+    workflow.strategic_agent.aexecute = make("strategic")
+    result = await workflow.execute_analysis("Cloud computing market analysis")
+    assert approx_tokens(seen["competitive"][0]) <= 60
+    strategic_kwargs = seen["strategic"][1]
+    assert sum(approx_tokens(strategic_kwargs[k]) for k in ("market_intelligence", "competitive_landscape",
+                                                            "risk_evaluation")) <= 120
+    assert set(result.context_tokens) == {"competitive", "risk", "strategic"}
+    assert all(usage["saved"] > 0 for usage in result.context_tokens.values())
@@ -0,0 +1,120 @@
+"""Unit tests for the fake Groq server and cassette record/replay"""
+import groq
+import httpx
+import pytest
+from groq import AsyncGroq
+from src.agents.cassette import CassetteMissError
+from src.agents.model_router import get_model_router
+from src.agents.risk_assessment import RiskAssessmentAgent
+from src.cache.response_cache import get_response_cache
+from src.config import settings
+from src.security import rate_limiter
+from src.simulation.fake_groq import FakeGroqProfile, create_fake_app, parse_latency
+
+MESSAGES = [{"role": "user", "content": "Cloud computing market"}]
+
+
+def _client(profile: FakeGroqProfile) -> AsyncGroq:
+    transport = httpx.ASGITransport(app=create_fake_app(profile))
+    return AsyncGroq(api_key="gsk_fake", base_url="http://fake-groq", max_retries=0,
+                     http_client=httpx.AsyncClient(transport=transport))
+
+
+@pytest.mark.asyncio
+async def test_fake_server_returns_deterministic_completions():
+    client = _client(FakeGroqProfile(latency="fixed:0", tokens_per_second=0))
+    first = await client.chat.completions.create(model="m", messages=MESSAGES, max_tokens=200)
+    second = await client.chat.completions.create(model="m", messages=MESSAGES, max_tokens=200)
+    assert first.choices[0].message.content == second.choices[0].message.content
+    assert "1. " in first.choices[0].message.content
+    assert 0 < first.usage.completion_tokens <= first.usage.total_tokens
+
+
+@pytest.mark.asyncio
+async def test_fake_server_streams_chunks():
+    client = _client(FakeGroqProfile(latency="fixed:0", tokens_per_second=0))
+    stream = await client.chat.completions.create(model="m", messages=MESSAGES, max_tokens=100, stream=True)
+    parts = [chunk.choices[0].delta.content async for chunk in stream if chunk.choices[0].delta.content]
+    full = await client.chat.completions.create(model="m", messages=MESSAGES, max_tokens=100)
+    assert len(parts) > 1
+    assert "".join(parts) == full.choices[0].message.content
+
+
+@pytest.mark.asyncio
+async def test_fake_server_injects_429_and_errors():
+    limited = _client(FakeGroqProfile(latency="fixed:0", rate_limit_rate=1.0))
+    with pytest.raises(groq.RateLimitError) as excinfo:
+        await limited.chat.completions.create(model="m", messages=MESSAGES, max_tokens=10)
+    assert excinfo.value.response.headers["retry-after"] == "2.0"
+    failing = _client(FakeGroqProfile(latency="fixed:0", error_rate=1.0))
+    with pytest.raises(groq.InternalServerError):
+        await failing.chat.completions.create(model="m", messages=MESSAGES, max_tokens=10)
+
+
+@pytest.mark.asyncio
+async def test_fake_server_enforces_requests_per_minute():
+    client = _client(FakeGroqProfile(latency="fixed:0", tokens_per_second=0, requests_per_minute=2))
+    for _ in range(2):
+        await client.chat.completions.create(model="m", messages=MESSAGES, max_tokens=10)
+    with pytest.raises(groq.RateLimitError):
+        await client.chat.completions.create(model="m", messages=MESSAGES, max_tokens=10)
+
+
+def test_parse_latency():
+    import random
+    rng = random.Random(1)
+    assert parse_latency("fixed:0.25")(rng) == 0.25
+    assert 0.1 <= parse_latency("uniform:0.1,0.2")(rng) <= 0.2
+    with pytest.raises(ValueError):
+        parse_latency("pareto:1")
+
+
+@pytest.fixture
+def cassette_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "GROQ_CASSETTE_DIR", str(tmp_path))
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_cassette_records_then_replays_without_network(cassette_dir, fake_client, monkeypatch):
+    monkeypatch.setattr(settings, "GROQ_CASSETTE_MODE", "record")
+    recorded = await RiskAssessmentAgent().aexecute("Cloud computing market")
+    assert len(list(cassette_dir.glob("*.json"))) == 1
+    
+    monkeypatch.setattr(settings, "GROQ_CASSETTE_MODE", "replay")
+    get_response_cache().backend.clear()
+    calls_before = len(fake_client.calls)
+    assert await RiskAssessmentAgent().aexecute("Cloud computing market") == recorded
+    get_response_cache().backend.clear()
+    streamed = [delta async for delta in RiskAssessmentAgent().astream("Cloud computing market")]
+    assert len(fake_client.calls) == calls_before
+    assert "".join(streamed) == recorded
+
+
+@pytest.mark.asyncio
+async def test_cassette_replay_miss_fails(cassette_dir, fake_client, monkeypatch):
+    monkeypatch.setattr(settings, "GROQ_CASSETTE_MODE", "replay")
+    agent = RiskAssessmentAgent()
+    with pytest.raises(CassetteMissError):
+        await agent.aexecute("Unrecorded market query")
+    with pytest.raises(CassetteMissError):
+        [delta async for delta in agent.astream("Unrecorded market query")]
+    assert fake_client.calls == []
+    assert all(health["state"] == "closed" for health in get_model_router().snapshot())
+
+
+@pytest.mark.asyncio
+async def test_replays_skip_rate_limiter_and_quota(cassette_dir, fake_client, monkeypatch):
+    monkeypatch.setattr(settings, "GROQ_CASSETTE_MODE", "record")
+    queries = [f"Cloud computing market {n}" for n in range(5)]
+    for query in queries:
+        await RiskAssessmentAgent().aexecute(query)
+    get_response_cache().backend.clear()
+    monkeypatch.setattr(settings, "GROQ_CASSETTE_MODE", "replay")
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(settings, "RATE_LIMIT_PER_MINUTE", 1)
+    monkeypatch.setattr(rate_limiter, "_rate_limiter", None)
+    for query in queries:
+        await RiskAssessmentAgent().aexecute(query)
+    status = rate_limiter.get_rate_limiter().quota_status()
+    assert status["used_today"] == 0 and status["total_wait_seconds"] == 0
@@ -21,3 +21,55 @@ def test_clean_content():
     is_safe, violations = guardrails.validate_content(clean)
     assert is_safe
     assert len(violations) == 0
+
+def test_violations_report_spans():
+    guardrails = ContentGuardrails(strict_mode=True)
+    text = "Outlook is solid. Buy this stock now."
+    is_safe, violations = guardrails.validate_content(text)
+    assert not is_safe
+    assert [v.category for v in violations] == ["Financial Advice"]
+    start, end = violations[0].span
+    assert text[start:end].lower() == "buy this stock"
+
+def test_scanner_compiled_once_per_class():
+    assert ContentGuardrails().scanner is ContentGuardrails().scanner
+
+def test_scanner_matches_reference_regex_search():
+    import re
+    guardrails = ContentGuardrails()
+    patterns = [p for attr, _, _ in guardrails.RULE_SETS for p in getattr(guardrails, attr)]
+    for text in ["NEVER trust a Company\nthat sells", "sell\nstock", "they always win the market",
+                 "Guaranteed returns and certain profit", "buyer of stocks", "illegal scheme, stupid users"]:
+        expected = [p for p in patterns if re.search(p, text.lower(), re.IGNORECASE)]
+        assert [v.matched_pattern for v in guardrails.scan(text)] == expected
+
+def test_scanner_handles_unanchored_and_many_rules():
+    from src.security.pattern_scanner import PatternScanner
+    rules = [(rf'\b(term{i}|alias{i})\b.*\b(risk)\b', "Custom", "medium") for i in range(300)]
+    rules.append((r'\d{3}-\d{2}-\d{4}', "PII", "high"))
+    scanner = PatternScanner(rules)
+    matches = scanner.scan("alias250 carries risk; id 123-45-6789")
+    assert [m.rule.category for m in matches] == ["Custom", "PII"]
+    assert matches[0].rule.pattern == rules[250][0]
+
+def test_streaming_guardrail_matches_across_chunk_boundaries():
+    from src.security.guardrails import StreamingGuardrail
+    text = "Solid outlook.\nWe say: buy this st"
+    rest = "ock today.\nMore text"
+    validator = StreamingGuardrail(ContentGuardrails())
+    assert validator.feed(text) == []
+    found = validator.feed(rest)
+    assert [v.category for v in found] == ["Financial Advice"]
+    start, end = found[0].span
+    assert (text + rest)[start:end] == "buy this stock"
+    assert validator.finish() == []
+
+def test_streaming_guardrail_bounds_carry_on_long_lines():
+    from src.security.guardrails import StreamingGuardrail
+    validator = StreamingGuardrail(ContentGuardrails(), max_carry=100)
+    for _ in range(50):
+        validator.feed("growth " * 10)
+    assert len(validator._pending) <= 100
+    validator.feed("illegal scheme ")
+    validator.feed("x" * 120)
+    assert [v.category for v in validator.violations] == ["Banned Topic"]
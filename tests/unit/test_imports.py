@@ -0,0 +1,35 @@
+"""Unit tests guarding cold-start imports"""
+import json
+import os
+import subprocess
+import sys
+from benchmarks.bench_import import BUDGET_MODULE, BUDGET_MS, HEAVY, measure, parse_importtime
+
+PROBE = """
+import json, sys
+import src.orchestration.workflow, src.security.guardrails, src.ui.gradio_app
+from src import config
+src.security.guardrails.ContentGuardrails().close()
+print(json.dumps({"heavy": [m for m in %r if m in sys.modules], "settings_built": config._settings is not None}))
+""" % (HEAVY,)
+
+
+def test_workflow_import_is_lazy():
+    env = {k: v for k, v in os.environ.items() if k != "GROQ_API_KEY"}
+    proc = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, env=env, check=True)
+    # No Groq key needed, no settings built, and none of the heavy stacks loaded until first use
+    assert json.loads(proc.stdout) == {"heavy": [], "settings_built": False}
+
+
+def test_workflow_import_within_budget():
+    # Wall-clock timing on a shared runner is noisy: take the best of several fresh interpreters and allow
+    # headroom. test_workflow_import_is_lazy is the strict gate; `benchmarks.bench_import` checks the median
+    result = measure(BUDGET_MODULE, repeat=5)
+    assert result["min_ms"] < BUDGET_MS * 1.5, result
+
+
+def test_parse_importtime():
+    stderr = ("import time: self [us] | cumulative | imported package\n"
+              "import time:       120 |        120 |   json.decoder\n"
+              "import time:       300 |        420 | json\n")
+    assert parse_importtime(stderr) == [("json.decoder", 120, 120), ("json", 300, 420)]
@@ -0,0 +1,87 @@
+"""Unit tests for the API job queue"""
+import asyncio
+import pytest
+from src.api.jobs import Job, JobQueue, WeightedFairQueue
+from src.config import settings
+from src.models import AnalysisRequest, AnalysisStatus
+from src.orchestration.workflow import IntelligenceWorkflow
+from tests.unit.conftest import FakeWorkflow
+
+
+def _job(priority: str, n: int = 0) -> Job:
+    return Job(request=AnalysisRequest(query=f"Market analysis query {n}", priority=priority))
+
+
+def test_weighted_fair_queue_interleaves_by_weight():
+    queue = WeightedFairQueue({"high": 6, "normal": 3, "low": 1})
+    for n in range(10):
+        for priority in ("low", "normal", "high"):
+            queue.push(_job(priority, n))
+    served = [queue.pop().request.priority for _ in range(10)]
+    assert served.count("high") == 6 and served.count("normal") == 3 and served.count("low") == 1
+    assert served[0] == "high"
+
+
+def test_weighted_fair_queue_is_fifo_within_class():
+    queue = WeightedFairQueue({"high": 6, "normal": 3, "low": 1})
+    jobs = [_job("normal", n) for n in range(3)]
+    for job in jobs:
+        queue.push(job)
+    assert queue.remove(jobs[1])
+    assert [queue.pop(), queue.pop(), queue.pop()] == [jobs[0], jobs[2], None]
+
+
+@pytest.mark.asyncio
+async def test_job_queue_bounds_concurrency_and_prioritises():
+    workflow = FakeWorkflow()
+    queue = JobQueue(workflow_factory=lambda: workflow, max_concurrency=2)
+    await queue.start()
+    low = [queue.submit(AnalysisRequest(query=f"Batch analysis {n}", priority="low")) for n in range(4)]
+    high = queue.submit(AnalysisRequest(query="Urgent market analysis", priority="high"))
+    await asyncio.sleep(0.3)
+    await queue.stop()
+    assert workflow.peak == 2
+    assert workflow.queries.index("Urgent market analysis") <= 1
+    assert all(job.status == AnalysisStatus.COMPLETED for job in low + [high])
+
+
+@pytest.mark.asyncio
+async def test_cancel_pending_and_running_jobs():
+    workflow = FakeWorkflow()
+    queue = JobQueue(workflow_factory=lambda: workflow, max_concurrency=1)
+    await queue.start()
+    running = queue.submit(AnalysisRequest(query="Running market analysis"))
+    pending = queue.submit(AnalysisRequest(query="Pending market analysis"))
+    await asyncio.sleep(0.01)
+    assert queue.cancel(pending.job_id)
+    assert queue.cancel(running.job_id)
+    await asyncio.sleep(0.05)
+    await queue.stop()
+    assert pending.status == AnalysisStatus.CANCELLED
+    assert running.status == AnalysisStatus.CANCELLED
+    assert workflow.queries == ["Running market analysis"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_job_stops_agent_calls(fake_client, monkeypatch):
+    monkeypatch.setattr(settings, "WORKFLOW_MODE", "parallel")
+    fake_client.delay = 0.3
+    original = fake_client.create
+    finished = []
+
+    async def create(model, messages, **kwargs):
+        response = await original(model, messages, **kwargs)
+        finished.append(model)
+        return response
+
+    fake_client.create = create
+    queue = JobQueue(workflow_factory=IntelligenceWorkflow, max_concurrency=1)
+    await queue.start()
+    job = queue.submit(AnalysisRequest(query="Cloud computing market analysis"))
+    while len(fake_client.calls) < 3:
+        await asyncio.sleep(0.01)
+    assert queue.cancel(job.job_id)
+    await asyncio.sleep(0.6)
+    await queue.stop()
+    assert job.status == AnalysisStatus.CANCELLED
+    assert finished == []
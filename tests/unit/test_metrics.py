@@ -0,0 +1,44 @@
+"""Unit tests for the Prometheus /metrics endpoint"""
+import time
+from fastapi.testclient import TestClient
+from prometheus_client.parser import text_string_to_metric_families
+from src.api.app import create_app
+from src.api.jobs import JobQueue
+from src.config import settings
+from src.orchestration.workflow import IntelligenceWorkflow
+
+
+def _samples(client: TestClient) -> dict:
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    return {(sample.name, tuple(sorted(sample.labels.items()))): sample.value
+            for family in text_string_to_metric_families(response.text) for sample in family.samples}
+
+
+def _total(samples: dict, name: str, **labels) -> float:
+    return sum(value for (sample, sample_labels), value in samples.items()
+               if sample == name and set(labels.items()) <= set(sample_labels))
+
+
+def test_metrics_endpoint_counts_agent_node_and_cache_activity(fake_client, monkeypatch):
+    monkeypatch.setattr(settings, "ENABLE_METRICS", True)
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    fake_client.delay = 0
+    workflow = IntelligenceWorkflow()
+    with TestClient(create_app(queue=JobQueue(workflow_factory=lambda: workflow))) as client:
+        before = _samples(client)
+        job_id = client.post("/jobs", json={"query": "Cloud computing market analysis"}).json()["job_id"]
+        deadline = time.time() + 10
+        while client.get(f"/jobs/{job_id}").json()["status"] in ("pending", "processing"):
+            assert time.time() < deadline
+            time.sleep(0.02)
+        after = _samples(client)
+
+    def delta(name, **labels):
+        return _total(after, name, **labels) - _total(before, name, **labels)
+
+    assert delta("srip_agent_call_seconds_count", outcome="success") == len(fake_client.calls) == 4
+    assert delta("srip_cache_requests_total", result="miss") >= 4
+    for node in ("market_analysis", "competitive_analysis", "risk_assessment", "strategic_planning"):
+        assert delta("srip_node_seconds_count", node=node, outcome="ok") == 1
+    assert delta("srip_analysis_seconds_count") == 1
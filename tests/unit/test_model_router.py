@@ -0,0 +1,66 @@
+"""Unit tests for model health and routing"""
+import pytest
+from src.agents.model_router import CircuitState, ModelRouter
+from src.config import settings
+
+
+@pytest.fixture
+def breaker_settings(monkeypatch):
+    monkeypatch.setattr(settings, "CIRCUIT_FAILURE_THRESHOLD", 2)
+    monkeypatch.setattr(settings, "CIRCUIT_RESET_TIMEOUT", 0)
+
+
+def test_breaker_opens_and_half_opens(breaker_settings, monkeypatch):
+    monkeypatch.setattr(settings, "CIRCUIT_RESET_TIMEOUT", 60)
+    router = ModelRouter()
+    health = router.health("primary")
+    health.record_failure(1.0)
+    health.record_failure(1.0)
+    assert health.state == CircuitState.OPEN
+    assert router.route(["primary", "fallback"]) == ["fallback"]
+    assert not health.try_acquire()
+    monkeypatch.setattr(settings, "CIRCUIT_RESET_TIMEOUT", 0)
+    assert health.try_acquire()
+    assert health.state == CircuitState.HALF_OPEN
+    assert not health.try_acquire()
+    health.record_success(0.5)
+    assert health.state == CircuitState.CLOSED
+
+
+def test_failed_probe_reopens(breaker_settings):
+    router = ModelRouter()
+    health = router.health("primary")
+    health.record_failure(1.0)
+    health.record_failure(1.0)
+    assert health.try_acquire()
+    health.record_failure(1.0)
+    assert health.state == CircuitState.OPEN
+
+
+def test_route_keeps_configured_order_within_slo(monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_LATENCY_SLO", 10.0)
+    router = ModelRouter()
+    for _ in range(3):
+        router.health("primary").record_success(8.0)
+        router.health("fallback").record_success(1.0)
+    assert router.route(["primary", "fallback", "unseen"]) == ["primary", "fallback", "unseen"]
+    assert router.route(["unseen", "fallback"]) == ["unseen", "fallback"]
+    assert router.route(["a", "b"]) == ["a", "b"]
+
+
+def test_route_demotes_models_over_slo(monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_LATENCY_SLO", 5.0)
+    router = ModelRouter()
+    for _ in range(3):
+        router.health("primary").record_success(30.0)
+        router.health("slow").record_success(8.0)
+        router.health("fallback").record_success(1.0)
+    assert router.route(["primary", "slow", "fallback", "unseen"]) == ["fallback", "unseen", "slow", "primary"]
+
+
+def test_latency_percentile():
+    health = ModelRouter().health("m")
+    for latency in [1.0, 2.0, 3.0, 4.0, 10.0]:
+        health.record_success(latency)
+    assert health.latency_percentile(0.5) == 3.0
+    assert health.latency_percentile(0.95) == 10.0
@@ -0,0 +1,28 @@
+"""Unit tests for the node store"""
+import pytest
+from src.orchestration.node_store import MemoryNodeStore, SQLiteNodeStore
+
+RECORDS = {"market_intelligence": {"input_hash": "abc", "output": "market text"}}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteNodeStore(str(tmp_path / "nodes.sqlite3"), max_analyses=2)
+    return MemoryNodeStore(max_analyses=2)
+
+
+def test_round_trip_and_retention(store):
+    store.put("ana_1", RECORDS)
+    assert store.get("ana_1") == RECORDS
+    assert store.get("ana_missing") is None
+    store.put("ana_2", RECORDS)
+    store.put("ana_3", RECORDS)
+    assert store.get("ana_1") is None
+    assert store.get("ana_3") == RECORDS
+
+
+def test_sqlite_store_survives_reopen(tmp_path):
+    path = str(tmp_path / "nodes.sqlite3")
+    SQLiteNodeStore(path, max_analyses=10).put("ana_1", RECORDS)
+    assert SQLiteNodeStore(path, max_analyses=10).get("ana_1") == RECORDS
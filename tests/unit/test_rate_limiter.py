@@ -0,0 +1,65 @@
+"""Unit tests for the client-side rate limiter"""
+import pytest
+from src.config import settings
+from src.security.rate_limiter import MemoryBucketStore, QuotaExceededError, RateLimiter, SQLiteBucketStore
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(settings, "RATE_LIMIT_PER_MINUTE", 6)
+    monkeypatch.setattr(settings, "RATE_LIMIT_PER_HOUR", 1000)
+    monkeypatch.setattr(settings, "RATE_LIMIT_TOKENS_PER_MINUTE", 6000)
+    monkeypatch.setattr(settings, "RATE_LIMIT_PER_DAY", 100)
+
+
+def test_burst_then_spacing(limits):
+    limiter = RateLimiter(MemoryBucketStore())
+    waits = [limiter.reserve("model-a", 10) for _ in range(8)]
+    assert waits[:6] == [0.0] * 6
+    assert waits[6] == pytest.approx(10.0, abs=0.1)
+    assert waits[7] == pytest.approx(20.0, abs=0.1)
+    assert limiter.reserve("model-b", 10) == 0.0
+
+
+def test_token_bucket_and_usage_refund(limits):
+    limiter = RateLimiter(MemoryBucketStore())
+    assert limiter.reserve("model-a", 6000) == 0.0
+    limiter.record_usage("model-a", 6000, 3000)
+    assert limiter.reserve("model-a", 3000) == 0.0
+    assert limiter.reserve("model-a", 600) == pytest.approx(6.0, abs=0.1)
+
+
+def test_daily_quota(limits, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_PER_DAY", 2)
+    limiter = RateLimiter(MemoryBucketStore())
+    limiter.reserve("model-a", 10)
+    limiter.reserve("model-b", 10)
+    with pytest.raises(QuotaExceededError):
+        limiter.reserve("model-a", 10)
+    assert limiter.quota_status()["remaining_today"] == 0
+
+
+def test_penalize_blocks_model(limits):
+    limiter = RateLimiter(MemoryBucketStore())
+    limiter.penalize("model-a", 30)
+    assert limiter.reserve("model-a", 10) == pytest.approx(30.0, abs=0.1)
+
+
+def test_penalty_applies_with_limiter_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    limiter = RateLimiter(MemoryBucketStore())
+    assert limiter.reserve("model-a", 10) == 0.0
+    limiter.penalize("model-a", 30)
+    assert limiter.reserve("model-a", 10) == pytest.approx(30.0, abs=0.1)
+    assert limiter.reserve("model-b", 10) == 0.0
+
+
+def test_sqlite_store_shared_across_limiters(limits, tmp_path):
+    path = str(tmp_path / "limits.sqlite3")
+    first = RateLimiter(SQLiteBucketStore(path))
+    second = RateLimiter(SQLiteBucketStore(path))
+    for _ in range(6):
+        first.reserve("model-a", 10)
+    assert second.reserve("model-a", 10) == pytest.approx(10.0, abs=0.1)
+    assert second.quota_status()["used_today"] == 7
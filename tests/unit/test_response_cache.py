@@ -0,0 +1,78 @@
+"""Unit tests for the response cache"""
+import time
+from src.cache.response_cache import MemoryCacheBackend, ResponseCache, SQLiteCacheBackend, agent_ttl
+from src.config import get_settings, settings
+
+
+def test_memory_lru_evicts_by_bytes():
+    backend = MemoryCacheBackend(max_bytes=30)
+    backend.set("a", "x" * 10)
+    backend.set("b", "y" * 10)
+    backend.get("a")
+    backend.set("c", "z" * 15)
+    assert backend.get("b") is None
+    assert backend.get("a") == "x" * 10
+    assert backend.get("c") == "z" * 15
+    assert backend.total_bytes == 25
+
+
+def test_memory_ttl_expiry():
+    backend = MemoryCacheBackend(max_bytes=1000)
+    backend.set("k", "value", ttl=0.05)
+    assert backend.get("k") == "value"
+    time.sleep(0.06)
+    assert backend.get("k") is None
+    assert backend.total_bytes == 0
+
+
+def test_zero_ttl_disables_caching(tmp_path):
+    cache = ResponseCache(MemoryCacheBackend(max_bytes=1000))
+    cache.set("k", "value", ttl=0)
+    assert cache.get("k") is None and cache.backend.total_bytes == 0
+    for backend in (MemoryCacheBackend(max_bytes=1000), SQLiteCacheBackend(str(tmp_path / "c.sqlite3"), 1000)):
+        backend.set("k", "value", ttl=0)
+        assert backend.get("k") is None
+
+
+def test_sqlite_backend_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    writer = SQLiteCacheBackend(path, max_bytes=1000)
+    reader = SQLiteCacheBackend(path, max_bytes=1000)
+    writer.set("k", "persisted")
+    assert reader.get("k") == "persisted"
+    writer.set("k", "updated")
+    assert reader.stats()["bytes"] == len("updated")
+
+
+def test_sqlite_backend_evicts_least_recently_used(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.sqlite3"), max_bytes=25)
+    backend.EVICT_BATCH = 1
+    backend.set("a", "x" * 10)
+    time.sleep(0.01)
+    backend.set("b", "y" * 10)
+    time.sleep(0.01)
+    backend.get("a")
+    backend.set("c", "z" * 10)
+    assert backend.get("b") is None
+    assert backend.get("a") is not None
+    assert backend.stats()["bytes"] == 20
+
+
+def test_key_includes_targets():
+    first = ResponseCache.make_key("Market", "cloud market", None, targets=["AWS", "Azure"])
+    second = ResponseCache.make_key("Market", "cloud market", None, targets=["AWS", "Oracle"])
+    assert first != second
+    assert first == ResponseCache.make_key("Market", "cloud market", None, targets=["AWS", "Azure"])
+
+
+def test_agent_ttl_precedence(monkeypatch):
+    # Keep the explicitly-set marker this test adds from leaking into later tests
+    monkeypatch.setattr(get_settings(), "__pydantic_fields_set__", set(get_settings().model_fields_set))
+    assert agent_ttl("MarketIntelligence", 21600) == 21600
+    assert agent_ttl("Custom", None) == settings.CACHE_TTL
+    monkeypatch.setattr(settings, "CACHE_TTL", 60)
+    assert agent_ttl("MarketIntelligence", 21600) == 60
+    monkeypatch.setattr(settings, "CACHE_TTL", 0)
+    assert agent_ttl("MarketIntelligence", 21600) == 0
+    monkeypatch.setattr(settings, "CACHE_AGENT_TTLS", {"MarketIntelligence": 120})
+    assert agent_ttl("MarketIntelligence", 21600) == 120
@@ -0,0 +1,119 @@
+"""Unit tests for the persistent analysis result store"""
+import sqlite3
+from datetime import datetime, timedelta
+import pytest
+from src.models import AnalysisStatus, IntelligenceState
+from src.orchestration.result_store import ResultStore
+
+
+def _state(analysis_id: str, query: str, targets=None, status=AnalysisStatus.COMPLETED, minutes: int = 0,
+           **sections) -> IntelligenceState:
+    return IntelligenceState(analysis_id=analysis_id, query=query, targets=targets, status=status,
+                             created_at=datetime(2026, 1, 1) + timedelta(minutes=minutes), **sections)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultStore(str(tmp_path / "results.sqlite3"), batch_size=2, flush_interval=60)
+
+
+def test_get_sees_queued_and_flushed_results(store, tmp_path):
+    store.put(_state("ana_1", "Cloud computing market", market_intelligence="Hyperscalers dominate"))
+    assert store.get("ana_1").market_intelligence == "Hyperscalers dominate"
+    assert store.list()["total"] == 0
+    store.flush()
+    assert store.list()["total"] == 1
+    reopened = ResultStore(str(tmp_path / "results.sqlite3"))
+    assert reopened.get("ana_1").query == "Cloud computing market"
+    assert reopened.get("missing") is None
+
+
+def test_failed_batch_is_retried_not_dropped(store, monkeypatch):
+    write = store._write
+    
+    def locked(batch):
+        raise sqlite3.OperationalError("database is locked")
+    
+    monkeypatch.setattr(store, "_write", locked)
+    for n in range(3):
+        store.put(_state(f"ana_{n}", f"Market analysis {n}"))
+    store.flush()
+    assert store.get("ana_2") is not None
+    monkeypatch.setattr(store, "_write", write)
+    store.flush()
+    assert store.list()["total"] == 3
+    assert not store._pending
+
+
+def test_record_that_always_fails_is_dropped_after_max_attempts(store, monkeypatch):
+    write = store._write
+    
+    def reject_bad(batch):
+        if any(state.analysis_id == "ana_bad" for state in batch):
+            raise sqlite3.IntegrityError("bad record")
+        write(batch)
+    
+    monkeypatch.setattr(store, "_write", reject_bad)
+    for analysis_id in ("ana_0", "ana_bad", "ana_2"):
+        store.put(_state(analysis_id, f"Market analysis {analysis_id}"))
+    for _ in range(store.max_attempts - 1):
+        store.flush()
+    assert store.get("ana_bad") is not None and store.list()["total"] == 2
+    store.flush()
+    assert store.get("ana_bad") is None
+    assert not store._pending and not store._attempts and store._queue.empty()
+    assert sorted(item["analysis_id"] for item in store.list()["items"]) == ["ana_0", "ana_2"]
+
+
+def test_list_paginates_newest_first_with_filters(store):
+    for i in range(5):
+        store.put(_state(f"ana_{i}", f"Query {i}", targets=["AWS"] if i % 2 else ["Azure"], minutes=i,
+                         status=AnalysisStatus.FAILED if i == 4 else AnalysisStatus.COMPLETED))
+    store.flush()
+    page = store.list(limit=2, offset=1)
+    assert [item["analysis_id"] for item in page["items"]] == ["ana_3", "ana_2"]
+    assert page["total"] == 5
+    assert [item["analysis_id"] for item in store.list(target="aws")["items"]] == ["ana_3", "ana_1"]
+    assert store.list(status="failed")["total"] == 1
+
+
+def test_search_ranks_across_sections_and_reindexes_updates(store):
+    store.put(_state("ana_1", "Cloud computing market", risk_evaluation="Regulatory pressure on data residency"))
+    store.put(_state("ana_2", "Electric vehicle batteries", executive_briefing="Lithium supply is tight"))
+    store.flush()
+    hits = store.search("lithium")
+    assert [item["analysis_id"] for item in hits["items"]] == ["ana_2"]
+    assert "[Lithium]" in hits["items"][0]["snippet"]
+    assert store.search("data resid")["items"][0]["analysis_id"] == "ana_1"
+    assert store.search('") OR *')["total"] == 0
+    store.put(_state("ana_2", "Electric vehicle batteries", executive_briefing="Cobalt supply is tight"))
+    store.flush()
+    assert store.search("lithium")["total"] == 0
+    assert store.search("cobalt")["total"] == 1
+
+
+def test_api_serves_history_without_running_analyses(store):
+    from fastapi.testclient import TestClient
+    from src.api.app import create_app
+    store.put(_state("ana_1", "Cloud computing market", targets=["AWS"], market_intelligence="Hyperscalers"))
+    store.flush()
+    client = TestClient(create_app(results=store))
+    assert client.get("/analyses/ana_1").json()["market_intelligence"] == "Hyperscalers"
+    assert client.get("/analyses/missing").status_code == 404
+    assert client.get("/analyses", params={"target": "AWS"}).json()["total"] == 1
+    assert client.get("/analyses/search", params={"q": "hyperscalers"}).json()["items"][0]["analysis_id"] == "ana_1"
+
+
+def test_app_opens_the_store_on_first_request(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    from src.api.app import create_app
+    from src.config import settings
+    from src.orchestration import result_store
+    path = tmp_path / "results.sqlite3"
+    monkeypatch.setattr(settings, "RESULT_STORE_ENABLED", True)
+    monkeypatch.setattr(settings, "RESULT_STORE_PATH", str(path))
+    monkeypatch.setattr(result_store, "_store", None)
+    client = TestClient(create_app())
+    assert not path.exists() and result_store._store is None
+    assert client.get("/analyses").json()["total"] == 0
+    assert path.exists()
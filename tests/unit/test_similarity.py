@@ -0,0 +1,56 @@
+"""Unit tests for the near-duplicate query index"""
+import random
+import time
+from src.cache.similarity import SimilarityIndex, normalize_query
+
+
+def test_normalize_ignores_filler_order_and_abbreviations():
+    assert normalize_query("cloud infra market analysis") == normalize_query(
+        "Analysis of the cloud infrastructure markets")
+    assert normalize_query("Cloud computing market") != normalize_query("Cloud storage market")
+
+
+def test_us_expands_only_as_the_country():
+    assert normalize_query("Give us an overview of the cloud infrastructure market") == normalize_query(
+        "cloud infrastructure market")
+    assert normalize_query("US cloud market") == normalize_query("United States cloud market")
+
+
+def test_reworded_query_matches_with_score():
+    index = SimilarityIndex(threshold=0.8)
+    index.add("analysis", "Cloud infra market analysis", "ana_1")
+    match = index.lookup("analysis", "Give me an overview of the cloud infrastructure market")
+    assert match.value == "ana_1" and match.score == 1.0
+    assert match.query == "Cloud infra market analysis"
+    assert index.lookup("analysis", "Cloud gaming market") is None
+    assert index.lookup("other", "cloud infrastructure market") is None
+
+
+def test_threshold_is_configurable():
+    index = SimilarityIndex(threshold=0.5)
+    index.add("analysis", "European electric vehicle battery market", "ana_1")
+    match = index.lookup("analysis", "European electric vehicle battery suppliers")
+    assert match is not None and 0.5 <= match.score < 1.0
+    assert index.lookup("analysis", "European electric vehicle battery suppliers", threshold=0.9) is None
+
+
+def test_oldest_entries_evicted():
+    index = SimilarityIndex(max_entries=2)
+    for i, query in enumerate(["solar panel market", "wind turbine market", "hydrogen fuel market"]):
+        index.add("analysis", query, f"ana_{i}")
+    assert len(index) == 2
+    assert index.lookup("analysis", "solar panel market") is None
+    assert index.lookup("analysis", "hydrogen fuel market").value == "ana_2"
+
+
+def test_lookup_stays_fast_with_many_entries():
+    rng = random.Random(3)
+    vocab = [f"term{i}" for i in range(3000)]
+    index = SimilarityIndex()
+    for i in range(20_000):
+        index.add("analysis", " ".join(rng.sample(vocab, rng.randint(3, 8))), f"ana_{i}")
+    queries = [" ".join(rng.sample(vocab, rng.randint(3, 8))) for _ in range(500)]
+    start = time.perf_counter()
+    for query in queries:
+        index.lookup("analysis", query)
+    assert (time.perf_counter() - start) / len(queries) < 0.001
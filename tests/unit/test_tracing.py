@@ -0,0 +1,83 @@
+"""Unit tests for span tracing and the trace report"""
+import json
+import pytest
+from src.config import settings
+from src.monitoring import tracing
+from src.monitoring.trace_report import load_spans, render
+from src.orchestration.workflow import IntelligenceWorkflow
+from src.agents.risk_assessment import RiskAssessmentAgent
+
+
+@pytest.fixture
+def trace_file(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(settings, "TRACING_ENABLED", True)
+    monkeypatch.setattr(settings, "TRACING_JSONL_PATH", str(path))
+    monkeypatch.setattr(tracing, "_tracer", None)
+    return path
+
+
+def _read(path):
+    tracing.get_tracer().flush()
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_spans_nest_and_record_errors(trace_file):
+    with tracing.span("analysis", trace_id="ana_test") as root:
+        with tracing.span("groq.attempt", model="m", attempt=1):
+            pass
+        with pytest.raises(ValueError):
+            with tracing.span("groq.http"):
+                raise ValueError("boom")
+    spans = {s["name"]: s for s in _read(trace_file)}
+    assert spans["groq.attempt"]["parent_id"] == root.span_id
+    assert spans["groq.attempt"]["trace_id"] == "ana_test"
+    assert spans["groq.http"]["status"] == "error"
+    assert spans["groq.http"]["attributes"]["error"] == "boom"
+    assert tracing.current_span() is None
+
+
+def test_disabled_tracing_exports_nothing(trace_file, stub_agents, monkeypatch):
+    monkeypatch.setattr(settings, "TRACING_ENABLED", False)
+    with tracing.span("analysis"):
+        pass
+    assert tracing.get_tracer() is None
+    assert not trace_file.exists()
+
+
+@pytest.mark.asyncio
+async def test_analysis_trace_hierarchy_and_report(trace_file, stub_agents, monkeypatch):
+    monkeypatch.setattr(settings, "WORKFLOW_MODE", "parallel")
+    workflow = IntelligenceWorkflow()
+    stub_agents(workflow, delay=0.05)
+    result = await workflow.execute_analysis("Cloud computing market analysis")
+    
+    tracing.get_tracer().flush()
+    spans = load_spans(trace_file, result.analysis_id)
+    by_name = {s["name"]: s for s in spans}
+    assert by_name["analysis"]["parent_id"] is None
+    assert by_name["analysis"]["attributes"]["status"] == result.status.value
+    assert by_name["graph"]["parent_id"] == by_name["analysis"]["span_id"]
+    for node in ("node.market_analysis", "node.competitive_analysis", "node.risk_assessment", "node.strategic_planning"):
+        assert by_name[node]["parent_id"] == by_name["graph"]["span_id"]
+    
+    report = render(spans)
+    assert "node.market_analysis" in report
+    assert "Time by span kind" in report
+
+
+@pytest.mark.asyncio
+async def test_agent_call_spans_carry_model_attempt_and_cache(trace_file, fake_client):
+    agent = RiskAssessmentAgent()
+    with tracing.span("node.risk_assessment", trace_id="ana_agent"):
+        await agent.aexecute("Cloud computing market")
+        await agent.aexecute("Cloud computing market")
+    spans = _read(trace_file)
+    executes = [s for s in spans if s["name"] == "agent.execute"]
+    assert [s["attributes"]["cache"] for s in sorted(executes, key=lambda s: s["start"])] == ["miss", "hit"]
+    attempt = next(s for s in spans if s["name"] == "groq.attempt")
+    http = next(s for s in spans if s["name"] == "groq.http")
+    assert attempt["attributes"]["model"] == settings.GROQ_DEFAULT_MODEL
+    assert attempt["attributes"]["attempt"] == 1
+    assert http["parent_id"] == attempt["span_id"]
+    assert all(s["trace_id"] == "ana_agent" for s in spans)
@@ -0,0 +1,69 @@
+"""Unit tests for the guardrail violation store"""
+import json
+from src.security.guardrails import ContentGuardrails, GuardrailViolation
+from src.security.violation_store import ViolationStore
+
+
+def _violation(category="Financial Advice", severity="high"):
+    return GuardrailViolation(category, severity, "test", r"\b(buy)\b", span=(0, 3))
+
+
+def test_ring_buffer_keeps_recent_but_counts_everything():
+    store = ViolationStore(capacity=3)
+    for i in range(10):
+        store.add(_violation(severity="high" if i % 2 else "medium"))
+    assert len(store) == 3
+    summary = store.summary()
+    assert summary["total"] == 10
+    assert summary["high"] == 5 and summary["medium"] == 5
+    assert summary["by_category"] == {"Financial Advice": 10}
+
+
+def test_window_aggregates_by_bucket():
+    store = ViolationStore(bucket_seconds=60)
+    now = 1_000_000.0
+    store.add(_violation("Banned Topic"), timestamp=now - 3600)
+    store.add(_violation("Financial Advice"), timestamp=now - 30)
+    store.add(_violation("Potential Bias", "medium"), timestamp=now)
+    recent = store.window(120, now=now)
+    assert recent["total"] == 2
+    assert recent["by_category"] == {"Financial Advice": 1, "Potential Bias": 1}
+    assert store.window(7200, now=now)["total"] == 3
+
+
+def test_spill_writes_jsonl_audit_log(tmp_path):
+    path = tmp_path / "audit" / "violations.jsonl"
+    store = ViolationStore(spill_path=str(path))
+    store.add(_violation(), content_type="market_intelligence")
+    store.close()
+    record = json.loads(path.read_text())
+    assert record["content_type"] == "market_intelligence"
+    assert record["span"] == [0, 3]
+
+
+def test_guardrails_log_is_bounded():
+    guardrails = ContentGuardrails(capacity=5)
+    for _ in range(20):
+        guardrails.validate_content("Buy this stock for guaranteed profit")
+    assert len(guardrails.violation_log) == 5
+    assert guardrails.get_violation_summary()["total"] == 40
+    assert guardrails.get_violation_summary(window_seconds=60)["total"] == 40
+
+
+def test_guardrails_close_their_audit_log(tmp_path):
+    path = tmp_path / "violations.jsonl"
+    with ContentGuardrails(spill_path=str(path)) as guardrails:
+        guardrails.validate_content("Buy this stock for guaranteed profit")
+    assert guardrails.store._spill is None
+    assert len(path.read_text().splitlines()) == 2
+
+
+def test_workflow_configures_guardrails_from_settings(tmp_path, monkeypatch):
+    from src.config import settings
+    from src.orchestration.workflow import IntelligenceWorkflow
+    monkeypatch.setattr(settings, "GUARDRAIL_VIOLATION_RETENTION", 5)
+    monkeypatch.setattr(settings, "GUARDRAIL_VIOLATION_LOG", str(tmp_path / "violations.jsonl"))
+    workflow = IntelligenceWorkflow()
+    assert workflow.guardrails.store._recent.maxlen == 5 and workflow.guardrails.store._spill is not None
+    workflow.close()
+    assert workflow.guardrails.store._spill is None
@@ -0,0 +1,345 @@
+"""Unit tests for workflow orchestration"""
+import asyncio
+import time
+import pytest
+from src.config import settings
+from src.orchestration.workflow import IntelligenceWorkflow, SECTIONS
+from tests.unit.conftest import STRATEGIC_TEXT
+
+
+@pytest.fixture
+def parallel_mode(monkeypatch):
+    monkeypatch.setattr(settings, "WORKFLOW_MODE", "parallel")
+
+
+@pytest.mark.asyncio
+async def test_chained_mode_passes_context(stub_agents):
+    workflow = IntelligenceWorkflow()
+    calls = stub_agents(workflow, delay=0)
+    result = await workflow.execute_analysis("Cloud computing market analysis")
+    assert [name for name, _ in calls] == ["market", "competitive", "risk"]
+    assert calls[1][1].startswith("market section")
+    assert all(result.completion_status.values())
+
+
+@pytest.mark.asyncio
+async def test_parallel_mode_fans_out(parallel_mode, stub_agents):
+    workflow = IntelligenceWorkflow()
+    calls = stub_agents(workflow, delay=0.3)
+    start = time.time()
+    result = await workflow.execute_analysis("Cloud computing market analysis")
+    assert time.time() - start < 0.8
+    assert sorted(name for name, _ in calls) == ["competitive", "market", "risk"]
+    assert all(context is None for _, context in calls)
+    assert all(result.completion_status.values())
+    assert len(result.strategic_actions) == 6
+
+
+@pytest.mark.asyncio
+async def test_parallel_mode_collects_errors(parallel_mode, stub_agents):
+    workflow = IntelligenceWorkflow()
+    stub_agents(workflow, delay=0)
+
+    async def failing(query, context=None, **kwargs):
+        raise RuntimeError("boom")
+
+    workflow.risk_agent.aexecute = failing
+    result = await workflow.execute_analysis("Cloud computing market analysis")
+    assert result.completion_status == {"market": True, "competitive": True, "risk": False, "strategic": True}
+    assert result.errors == ["Risk: boom"]
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_analyses_share_one_run(stub_agents):
+    workflow = IntelligenceWorkflow()
+    calls = stub_agents(workflow, delay=0.05)
+    results = await asyncio.gather(*(workflow.execute_analysis("Cloud computing market", ["AWS"]) for _ in range(4)))
+    assert len(calls) == 3
+    assert len({r.analysis_id for r in results}) == 1
+    assert results[0] is not results[1]
+
+
+@pytest.mark.asyncio
+async def test_separate_workflows_do_not_coalesce(stub_agents):
+    first, second = IntelligenceWorkflow(), IntelligenceWorkflow()
+    first_calls = stub_agents(first, delay=0.05)
+    second_calls = stub_agents(second, delay=0.05)
+    results = await asyncio.gather(first.execute_analysis("Cloud computing market"),
+                                   second.execute_analysis("Cloud computing market"))
+    assert len(first_calls) == len(second_calls) == 3
+    assert results[0].analysis_id != results[1].analysis_id
+
+
+@pytest.mark.asyncio
+async def test_deadline_returns_partial_result(monkeypatch, stub_agents):
+    monkeypatch.setattr(settings, "ANALYSIS_TIMEOUT", 0.5)
+    monkeypatch.setattr(settings, "NODE_MIN_BUDGET", 0)
+    workflow = IntelligenceWorkflow()
+    stub_agents(workflow, delay=0.3)
+    start = time.time()
+    result = await workflow.execute_analysis("Deadline bound market analysis")
+    assert time.time() - start < 0.8
+    assert result.market_intelligence is not None
+    assert result.completion_status["market"] and not result.completion_status["strategic"]
+    assert any("deadline" in e for e in result.errors)
+
+
+@pytest.mark.asyncio
+async def test_deadline_tears_down_the_graph(monkeypatch, stub_agents):
+    monkeypatch.setattr(settings, "ANALYSIS_TIMEOUT", 0.5)
+    monkeypatch.setattr(settings, "NODE_MIN_BUDGET", 0)
+    workflow = IntelligenceWorkflow()
+    stub_agents(workflow, delay=0.3)
+    before = asyncio.all_tasks()
+    result = await workflow.execute_analysis("Deadline bound market analysis")
+    assert any("deadline" in e for e in result.errors)
+    assert asyncio.all_tasks() - before == set()
+
+
+@pytest.mark.asyncio
+async def test_nodes_skipped_without_budget(monkeypatch, stub_agents):
+    monkeypatch.setattr(settings, "NODE_MIN_BUDGET", settings.ANALYSIS_TIMEOUT + 1)
+    workflow = IntelligenceWorkflow()
+    calls = stub_agents(workflow, delay=0)
+    result = await workflow.execute_analysis("Budgetless market analysis")
+    assert calls == []
+    assert not any(result.completion_status.values())
+    assert len(result.errors) == 4
+
+
+@pytest.mark.asyncio
+async def test_astream_analysis_emits_deltas_then_result(stub_agents):
+    workflow = IntelligenceWorkflow()
+    stub_agents(workflow, delay=0)
+
+    async def stream(query, context=None, **kwargs):
+        for word in ["streamed ", "market ", "text"]:
+            yield word
+
+    workflow.market_agent.astream = stream
+    workflow.competitive_agent.astream = stream
+    workflow.risk_agent.astream = stream
+
+    async def strategic_stream(query, **kwargs):
+        yield STRATEGIC_TEXT
+
+    workflow.strategic_agent.astream = strategic_stream
+    events = [e async for e in workflow.astream_analysis("Streaming market analysis")]
+    deltas = [e for e in events if e["type"] == "delta" and e["section"] == "market_intelligence"]
+    assert [d["text"] for d in deltas] == ["streamed ", "market ", "text"]
+    assert {e["section"] for e in events if e["type"] == "section"} == {
+        "market_intelligence", "competitive_landscape", "risk_evaluation", "executive_briefing"}
+    assert events[-1]["type"] == "result"
+    assert events[-1]["result"].market_intelligence == "streamed market text"
+    assert len(events[-1]["result"].strategic_actions) == 6
+
+
+@pytest.mark.asyncio
+async def test_node_and_analysis_latency_metrics_recorded(stub_agents):
+    from prometheus_client import REGISTRY
+
+    def count(name, **labels):
+        return REGISTRY.get_sample_value(f"{name}_count", labels) or 0
+
+    before_node = count("srip_node_seconds", node="market_analysis", outcome="ok")
+    workflow = IntelligenceWorkflow()
+    stub_agents(workflow, delay=0)
+    result = await workflow.execute_analysis("Metrics market analysis")
+    assert count("srip_node_seconds", node="market_analysis", outcome="ok") == before_node + 1
+    assert count("srip_analysis_seconds", status=result.status.value, mode=settings.WORKFLOW_MODE) >= 1
+
+
+UNSAFE_TEXT = "Outlook is strong.\nInvestors should buy this stock now for guaranteed profit.\n" + "filler " * 80
+
+
+@pytest.mark.asyncio
+async def test_unsafe_section_cancels_parallel_siblings(parallel_mode, stub_agents):
+    workflow = IntelligenceWorkflow()
+    stub_agents(workflow, delay=1.0)
+    finished = []
+    
+    async def unsafe_market(query, context=None, **kwargs):
+        return UNSAFE_TEXT
+    
+    async def slow(query, context=None, **kwargs):
+        await asyncio.sleep(1.0)
+        finished.append("slow")
+        return "section " * 50
+    
+    workflow.market_agent.aexecute = unsafe_market
+    workflow.competitive_agent.aexecute = slow
+    workflow.risk_agent.aexecute = slow
+    start = time.time()
+    result = await workflow.execute_analysis("Cloud computing market analysis")
+    await asyncio.sleep(1.1)
+    assert time.time() - start < 2.0
+    assert finished == []
+    assert result.status.value == "failed"
+    assert any("Content safety violation in market_intelligence" in e for e in result.errors)
+    assert workflow.guardrails.get_violation_summary()["high"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_unsafe_section_skips_downstream_in_chained_mode(stub_agents):
+    workflow = IntelligenceWorkflow()
+    calls = stub_agents(workflow, delay=0)
+    
+    async def unsafe_market(query, context=None, **kwargs):
+        return UNSAFE_TEXT
+    
+    workflow.market_agent.aexecute = unsafe_market
+    result = await workflow.execute_analysis("Cloud computing market analysis")
+    assert calls == []
+    assert result.status.value == "failed"
+    assert result.executive_briefing is None
+
+
+@pytest.mark.asyncio
+async def test_streaming_abort_stops_generation_mid_section(stub_agents):
+    workflow = IntelligenceWorkflow()
+    stub_agents(workflow, delay=0)
+    emitted = []
+    
+    async def unsafe_stream(query, context=None, **kwargs):
+        for line in UNSAFE_TEXT.splitlines(keepends=True) + ["never reached\n"] * 20:
+            emitted.append(line)
+            yield line
+    
+    workflow.market_agent.astream = unsafe_stream
+    events = [event async for event in workflow.astream_analysis("Cloud computing market analysis")]
+    result = events[-1]["result"]
+    assert result.status.value == "failed"
+    assert len(emitted) <= 3
+    assert not any(e["type"] == "section" for e in events)
+
+
+@pytest.mark.asyncio
+async def test_streaming_screens_full_section_on_completion(stub_agents):
+    workflow = IntelligenceWorkflow()
+    stub_agents(workflow, delay=0)
+    
+    async def long_line_stream(query, context=None, **kwargs):
+        # The match spans more than the streaming carry, so only the completion check sees it
+        yield "An illegal "
+        for _ in range(1000):
+            yield "filler "
+        yield "scheme follows.\n"
+    
+    workflow.market_agent.astream = long_line_stream
+    events = [event async for event in workflow.astream_analysis("Cloud computing market analysis")]
+    result = events[-1]["result"]
+    assert result.status.value == "failed"
+    assert any("Content safety violation in market_intelligence" in e for e in result.errors)
+
+
+@pytest.mark.asyncio
+async def test_streaming_without_guardrails(monkeypatch, stub_agents):
+    monkeypatch.setattr(settings, "ENABLE_GUARDRAILS", False)
+    workflow = IntelligenceWorkflow()
+    stub_agents(workflow, delay=0)
+    
+    async def stream(query, context=None, **kwargs):
+        yield "section text " * 50
+    
+    for agent in (workflow.market_agent, workflow.competitive_agent, workflow.risk_agent, workflow.strategic_agent):
+        agent.astream = stream
+    events = [event async for event in workflow.astream_analysis("Cloud computing market analysis")]
+    assert any(e["type"] == "section" and e["section"] == "market_intelligence" for e in events)
+
+
+@pytest.mark.asyncio
+async def test_competitive_fanout_mode(monkeypatch, stub_agents):
+    monkeypatch.setattr(settings, "COMPETITIVE_FANOUT", True)
+    workflow = IntelligenceWorkflow()
+    calls = stub_agents(workflow, delay=0)
+    fanned = []
+    
+    async def aexecute_targets(query, targets, deadline=None):
+        fanned.append(targets)
+        return "merged profiles " * 40
+    
+    workflow.competitive_agent.aexecute_targets = aexecute_targets
+    result = await workflow.execute_analysis("Cloud computing market analysis", targets=["AWS", "Azure"])
+    assert fanned == [["AWS", "Azure"]]
+    assert "competitive" not in [name for name, _ in calls]
+    assert result.competitive_landscape.startswith("merged profiles")
+
+
+def _counting_agents(workflow):
+    calls = []
+    
+    def make(name):
+        async def aexecute(query, context=None, **kwargs):
+            calls.append(name)
+            if name == "strategic":
+                return STRATEGIC_TEXT
+            return f"{name} section for {kwargs.get('targets')} " * 30
+        return aexecute
+    
+    for name in ("market", "competitive", "risk", "strategic"):
+        getattr(workflow, f"{name}_agent").aexecute = make(name)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_incremental_reanalysis_reruns_only_changed_nodes(parallel_mode):
+    workflow = IntelligenceWorkflow()
+    calls = _counting_agents(workflow)
+    base = await workflow.execute_analysis("Cloud computing market analysis", targets=["AWS"])
+    assert sorted(calls) == ["competitive", "market", "risk", "strategic"]
+    
+    calls.clear()
+    same = await workflow.execute_analysis("Cloud computing market analysis", targets=["AWS"],
+                                           base_analysis_id=base.analysis_id)
+    assert calls == []
+    assert sorted(same.reused_nodes) == sorted(SECTIONS)
+    assert same.executive_briefing == base.executive_briefing and same.strategic_actions == base.strategic_actions
+    
+    calls.clear()
+    changed = await workflow.execute_analysis("Cloud computing market analysis", targets=["AWS", "Azure"],
+                                              base_analysis_id=same.analysis_id)
+    assert sorted(calls) == ["competitive", "strategic"]
+    assert sorted(changed.reused_nodes) == ["market_intelligence", "risk_evaluation"]
+    assert all(changed.completion_status.values())
+
+
+@pytest.mark.asyncio
+async def test_incremental_reanalysis_in_chained_mode_keeps_market():
+    workflow = IntelligenceWorkflow()
+    calls = _counting_agents(workflow)
+    base = await workflow.execute_analysis("Cloud computing market analysis", targets=["AWS"])
+    
+    calls.clear()
+    changed = await workflow.execute_analysis("Cloud computing market analysis", targets=["AWS", "Azure"],
+                                              base_analysis_id=base.analysis_id)
+    # Risk reads the competitive section in chained mode, so it reruns with it
+    assert calls == ["competitive", "risk", "strategic"]
+    assert changed.reused_nodes == ["market_intelligence"]
+    assert changed.market_intelligence == base.market_intelligence
+    assert all(changed.completion_status.values())
+
+
+@pytest.mark.asyncio
+async def test_unknown_base_analysis_runs_everything():
+    workflow = IntelligenceWorkflow()
+    calls = _counting_agents(workflow)
+    result = await workflow.execute_analysis("Cloud computing market analysis", base_analysis_id="ana_missing")
+    assert len(calls) == 4
+    assert result.reused_nodes == []
+    assert any("ana_missing not found" in e for e in result.errors)
+
+
+@pytest.mark.asyncio
+async def test_reworded_query_served_from_similar_analysis(monkeypatch, stub_agents):
+    monkeypatch.setattr(settings, "SIMILARITY_CACHE_ENABLED", True)
+    workflow = IntelligenceWorkflow()
+    calls = stub_agents(workflow, delay=0)
+    first = await workflow.execute_analysis("Cloud infra market analysis", targets=["AWS"])
+    second = await workflow.execute_analysis("Analysis of the cloud infrastructure market", targets=["aws"])
+    assert len(calls) == 3
+    assert second.analysis_id != first.analysis_id
+    assert second.similar_match == {"analysis_id": first.analysis_id, "query": "Cloud infra market analysis",
+                                    "score": 1.0}
+    assert second.market_intelligence == first.market_intelligence
+    await workflow.execute_analysis("Analysis of the cloud infrastructure market", targets=["Azure"])
+    assert len(calls) == 6